@@ -0,0 +1,138 @@
+# app/config.py
+"""
+Runtime settings for NLQS, read once from environment variables with
+defaults suitable for local development.
+"""
+
+import os
+
+# OpenAI-compatible LLM endpoint (Groq by default)
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "https://api.groq.com/openai/v1")
+LLM_MODEL = os.getenv("LLM_MODEL", "llama3-70b-8192")
+
+# Maximum concurrent in-flight requests (and pooled connections) per LLM host
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+
+# Deadline in seconds for one LLM call, including all retries
+LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+
+# Retries on 429/5xx/connection errors, with jittered exponential backoff
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_BACKOFF_BASE_SECONDS = float(os.getenv("LLM_BACKOFF_BASE_SECONDS", "0.5"))
+LLM_BACKOFF_MAX_SECONDS = float(os.getenv("LLM_BACKOFF_MAX_SECONDS", "8"))
+
+# NL->SQL translation cache (exact + semantic tiers, persisted in SQLite)
+TRANSLATION_CACHE_ENABLED = os.getenv("TRANSLATION_CACHE_ENABLED", "true").lower() == "true"
+TRANSLATION_CACHE_PATH = os.getenv("TRANSLATION_CACHE_PATH", "data/translation_cache.db")
+TRANSLATION_CACHE_MAX_ENTRIES = int(os.getenv("TRANSLATION_CACHE_MAX_ENTRIES", "10000"))
+TRANSLATION_CACHE_TTL_SECONDS = float(os.getenv("TRANSLATION_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+# Minimum cosine similarity for a semantic (nearest-neighbour) hit
+TRANSLATION_CACHE_SIMILARITY = float(os.getenv("TRANSLATION_CACHE_SIMILARITY", "0.9"))
+
+# SQLite database and execution engine
+DB_PATH = os.getenv("DB_PATH", "data/sample.db")
+# Reusable read-only connections (and worker threads) for SELECT queries
+SQLITE_READ_POOL_SIZE = int(os.getenv("SQLITE_READ_POOL_SIZE", str(min(8, os.cpu_count() or 4))))
+# Page cache per connection in KiB, and bytes of the file to memory-map
+SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", str(64 * 1024)))
+SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", str(1024 ** 3)))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+# Journal mode the engine sets on the database ("wal" lets readers proceed while
+# the writer commits). It is stored in the database file, so it is opt-in: empty
+# keeps the file's own mode, leaving e.g. the bundled data/sample.db untouched
+SQLITE_JOURNAL_MODE = os.getenv("SQLITE_JOURNAL_MODE", "").lower()
+
+# SELECT result cache: total and per-result byte budgets (estimated), cleared
+# whenever SQLite's data_version shows a committed write
+SQL_RESULT_CACHE_ENABLED = os.getenv("SQL_RESULT_CACHE_ENABLED", "true").lower() == "true"
+SQL_RESULT_CACHE_MAX_BYTES = int(os.getenv("SQL_RESULT_CACHE_MAX_BYTES", str(64 * 1024 ** 2)))
+SQL_RESULT_CACHE_MAX_ENTRY_BYTES = int(os.getenv("SQL_RESULT_CACHE_MAX_ENTRY_BYTES", str(8 * 1024 ** 2)))
+
+# Cost guard for generated SQL: reject statements whose query plan would visit
+# more than SQL_MAX_QUERY_COST rows (estimated from table row counts), append
+# a LIMIT to unbounded SELECTs, and cancel statements running past the timeout
+SQL_COST_GUARD_ENABLED = os.getenv("SQL_COST_GUARD_ENABLED", "true").lower() == "true"
+SQL_MAX_QUERY_COST = int(os.getenv("SQL_MAX_QUERY_COST", "50000000"))
+SQL_AUTO_LIMIT = os.getenv("SQL_AUTO_LIMIT", "true").lower() == "true"
+SQL_QUERY_TIMEOUT_SECONDS = float(os.getenv("SQL_QUERY_TIMEOUT_SECONDS", "10"))
+
+# Workload log for the index advisor: SELECT families with call counts and
+# timings, aggregated in memory and flushed to SQL_WORKLOAD_LOG_PATH
+SQL_WORKLOAD_LOG = os.getenv("SQL_WORKLOAD_LOG", "true").lower() == "true"
+SQL_WORKLOAD_LOG_PATH = os.getenv("SQL_WORKLOAD_LOG_PATH", "data/workload.db")
+SQL_WORKLOAD_FLUSH_SECONDS = float(os.getenv("SQL_WORKLOAD_FLUSH_SECONDS", "5"))
+
+# Result size limits: rows in a buffered response, rows in a stream, rows per page
+MAX_RESULT_ROWS = int(os.getenv("MAX_RESULT_ROWS", "10000"))
+MAX_STREAM_ROWS = int(os.getenv("MAX_STREAM_ROWS", "1000000"))
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "1000"))
+DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "100"))
+# Rows fetched per fetchmany() call / streamed chunk
+RESULT_BATCH_SIZE = int(os.getenv("RESULT_BATCH_SIZE", "500"))
+# Key signing page tokens; set it explicitly when running several workers
+PAGE_TOKEN_SECRET = os.getenv("PAGE_TOKEN_SECRET", "")
+
+# Schema pruning: above this many tables, prompts include only the top-k
+# relevant tables (plus their foreign-key neighbours) for each question
+SCHEMA_PRUNE_MIN_TABLES = int(os.getenv("SCHEMA_PRUNE_MIN_TABLES", "20"))
+SCHEMA_TOP_K = int(os.getenv("SCHEMA_TOP_K", "5"))
+
+# Concurrent requests with the same normalized question share one in-flight
+# computation (one translation, one SQL execution or RAG answer)
+QUERY_COALESCING_ENABLED = os.getenv("QUERY_COALESCING_ENABLED", "true").lower() == "true"
+
+# Batch queries: questions per request, and concurrent SQL/RAG pipelines per batch
+BATCH_MAX_QUESTIONS = int(os.getenv("BATCH_MAX_QUESTIONS", "5000"))
+BATCH_PARALLELISM = int(os.getenv("BATCH_PARALLELISM", "8"))
+
+# Document ingestion: parser processes, PDF pages per parse task (chunks are
+# embedded EMBEDDING_BATCH_SIZE at a time)
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", str(os.cpu_count() or 2)))
+INGEST_PAGES_PER_TASK = int(os.getenv("INGEST_PAGES_PER_TASK", "16"))
+
+# Embedding backend: "torch" (sentence-transformers) or "onnx" (int8-quantized
+# ONNX Runtime export of the same model, exported on first use into EMBEDDING_ONNX_DIR)
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_ONNX_DIR = os.getenv("EMBEDDING_ONNX_DIR", "data/onnx")
+# Sentences per forward pass (also the indexer's embedding batches; EMBED_BATCH_SIZE
+# is its former name), and intra-op CPU threads (0 = library default)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", os.getenv("EMBED_BATCH_SIZE", "32")))
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
+
+# Vector index: "auto" picks by corpus size (flat, then IVF-Flat, then IVF-PQ),
+# or force one of "flat", "ivf_flat", "ivf_pq", "hnsw"
+FAISS_INDEX_TYPE = os.getenv("FAISS_INDEX_TYPE", "auto").lower()
+FAISS_FLAT_MAX_VECTORS = int(os.getenv("FAISS_FLAT_MAX_VECTORS", "50000"))
+FAISS_PQ_MIN_VECTORS = int(os.getenv("FAISS_PQ_MIN_VECTORS", "1000000"))
+# Query-time recall/latency knobs: IVF lists probed, HNSW candidate list size
+FAISS_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+FAISS_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+# IVF-PQ re-ranks refine_factor * k candidates exactly against the flat vectors (1 = off)
+FAISS_REFINE_FACTOR = int(os.getenv("FAISS_REFINE_FACTOR", "8"))
+# Memory-map the index at load time (shared page cache across workers)
+FAISS_MMAP = os.getenv("FAISS_MMAP", "true").lower() == "true"
+
+# FAISS index served by the RAG path (app/rag/build_vectorstore.py builds it)
+RAG_INDEX_PATH = os.getenv("RAG_INDEX_PATH", "vectorstore/db_faiss")
+
+# RAG caches: question embeddings and top-k retrieval results (entries each),
+# cleared when the indexer publishes a new index version
+RAG_EMBEDDING_CACHE_SIZE = int(os.getenv("RAG_EMBEDDING_CACHE_SIZE", "4096"))
+RAG_RETRIEVAL_CACHE_SIZE = int(os.getenv("RAG_RETRIEVAL_CACHE_SIZE", "4096"))
+# Seconds between checks for a new index version (hot reload)
+RAG_INDEX_CHECK_SECONDS = float(os.getenv("RAG_INDEX_CHECK_SECONDS", "5"))
+
+# Intent classification: below this rule confidence, the embedding tier
+# (nearest centroid of labelled examples) decides
+INTENT_CONFIDENCE_THRESHOLD = float(os.getenv("INTENT_CONFIDENCE_THRESHOLD", "0.75"))
+INTENT_EMBEDDING_TIER = os.getenv("INTENT_EMBEDDING_TIER", "true").lower() == "true"
+
+# Speculative routing: below this final classifier confidence, the SQL and RAG
+# pipelines run concurrently and the first valid answer wins. Each speculation
+# costs an extra LLM call, so at most SPECULATIVE_BUDGET_PER_MINUTE start per minute
+SPECULATIVE_ROUTING_ENABLED = os.getenv("SPECULATIVE_ROUTING_ENABLED", "true").lower() == "true"
+SPECULATIVE_CONFIDENCE_THRESHOLD = float(os.getenv("SPECULATIVE_CONFIDENCE_THRESHOLD", "0.65"))
+SPECULATIVE_BUDGET_PER_MINUTE = float(os.getenv("SPECULATIVE_BUDGET_PER_MINUTE", "30"))
+# A speculative RAG answer only counts when the closest retrieved chunk is within
+# this squared L2 distance (2 - 2 * cosine for normalized embeddings: 1.1 ~ cosine 0.45)
+SPECULATIVE_RAG_MAX_DISTANCE = float(os.getenv("SPECULATIVE_RAG_MAX_DISTANCE", "1.1"))
@@ -0,0 +1,302 @@
+# app/core/cost_guard.py
+"""
+Pre-execution cost guard for generated SQL.
+
+Before a statement runs, its `EXPLAIN QUERY PLAN` is walked as SQLite's
+nested loops: each SCAN multiplies the work of the loops inside it by the
+table's row count (from the schema provider), each indexed SEARCH by a few
+rows, and an automatic index marks a join column with no index. Statements
+whose estimate exceeds SQL_MAX_QUERY_COST are rejected before they touch a
+row.
+
+Estimates miss selectivity, so every statement also runs under a wall-clock
+deadline: a progress handler aborts the statement once the deadline has
+passed. Both failures raise QueryTooExpensive, which the executor turns into
+a structured "too_expensive" error result.
+"""
+
+import math
+import re
+import sqlite3
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+from app.core.result_cache import SQL_TOKENS, normalize_sql
+
+# Virtual machine instructions between two deadline checks
+PROGRESS_CHECK_OPCODES = 10_000
+
+# Rows assumed for a scanned subquery or CTE when no referenced table is known
+UNKNOWN_ROWS = 1000
+
+# Loop steps of a query plan: "SCAN t", "SCAN t USING INDEX i", "SEARCH t USING INDEX i (a=?)"
+_LOOP = re.compile(r"^(SCAN|SEARCH)(?: TABLE)? (\S+)(?: AS (\S+))?(?: USING (.*))?$")
+
+# "FROM orders o", "JOIN customers AS c", ", items i": alias -> table
+_ALIAS = re.compile(r"(?:\bfrom|\bjoin|,)\s+([\w\"`\[\]]+)\s+(?:as\s+)?(\w+)")
+_NOT_ALIASES = {
+    "where", "join", "inner", "left", "right", "full", "cross", "natural", "outer", "on",
+    "using", "group", "order", "limit", "union", "except", "intersect", "window", "having",
+    "as", "indexed", "not",
+}
+
+# Outermost LIMIT [OFFSET] (nothing but the clause after it)
+_TRAILING_LIMIT = re.compile(r"\blimit\s+(\d+)(?:\s+offset\s+(\d+)|\s*,\s*(\d+))?$")
+_ANY_TRAILING_LIMIT = re.compile(r"\blimit\b[^()]*$")
+
+# Aggregates and DISTINCT consume every row before the first one is returned
+_AGGREGATE = re.compile(r"\b(?:count|sum|avg|min|max|total|group_concat)\s*\(|\bdistinct\b|\bgroup by\b")
+
+
+class QueryTooExpensive(RuntimeError):
+    """Raised when a statement's estimated cost or run time exceeds its budget."""
+
+    def __init__(self, message: str, details: Optional[dict] = None):
+        super().__init__(message)
+        self.details = details or {}
+
+
+class PlanEstimate(NamedTuple):
+    """
+    Estimated rows visited by a statement, with the plan steps responsible.
+    """
+    cost: int
+    full_scans: List[str]
+    missing_indexes: List[str]
+    plan: List[str]
+
+
+def _limit_rows(normalized: str) -> Optional[int]:
+    """
+    Returns LIMIT + OFFSET of the outermost query, or None without a LIMIT.
+    """
+    match = _TRAILING_LIMIT.search(normalized)
+    if match is None or ")" in normalized[match.start():]:
+        return None
+    limit, offset, comma_count = match.groups()
+    if comma_count is not None:
+        # "LIMIT offset, count"
+        return int(limit) + int(comma_count)
+    return int(limit) + int(offset or 0)
+
+
+def ensure_limit(sql: str, limit: int) -> str:
+    """
+    Appends a LIMIT to a SELECT whose outermost query has none.
+
+    Parameters:
+        sql (str): The SELECT statement.
+        limit (int): Rows to cap the result at.
+
+    Returns:
+        str: The statement, unchanged if it already has a LIMIT.
+    """
+    if _ANY_TRAILING_LIMIT.search(normalize_sql(sql)):
+        return sql
+    return f"{_trim_statement(sql)} LIMIT {limit}"
+
+
+def _trim_statement(sql: str) -> str:
+    """
+    Drops trailing comments, whitespace and semicolons, which would swallow or
+    end the statement before an appended clause. The rest is kept verbatim,
+    since unaliased result columns are named after their source text.
+    """
+    end = position = 0
+    for match in SQL_TOKENS.finditer(sql):
+        gap = sql[position:match.start()].rstrip()
+        if gap.strip():
+            end = position + len(gap)
+        if match.group(1) is not None:
+            end = match.end()
+        position = match.end()
+    if sql[position:].strip():
+        end = len(sql[position:].rstrip()) + position
+    body = sql[:end]
+    while body.endswith(";"):
+        body = _trim_statement(body[:-1])
+    return body
+
+
+def table_aliases(normalized: str, tables) -> Dict[str, str]:
+    """
+    Maps the names a normalized statement uses for known tables (aliases and
+    the table names themselves) to the lowercase table name.
+    """
+    aliases = {
+        alias: table.strip('"`[]')
+        for table, alias in _ALIAS.findall(normalized)
+        if alias not in _NOT_ALIASES and table.strip('"`[]') in tables
+    }
+    for table in tables:
+        if re.search(rf"\b{re.escape(table)}\b", normalized):
+            aliases.setdefault(table, table)
+    return aliases
+
+
+class _PlanWalker:
+    """
+    Folds EXPLAIN QUERY PLAN rows into a nested-loop cost estimate.
+    """
+
+    def __init__(self, rows, row_counts: Dict[str, int], aliases: Dict[str, str]):
+        self.children = defaultdict(list)
+        for node_id, parent, _, detail in rows:
+            self.children[parent].append((node_id, detail))
+        self.row_counts = row_counts
+        self.aliases = aliases
+        referenced = [row_counts[t] for t in set(aliases.values()) if t in row_counts]
+        self.unknown_rows = max(referenced, default=UNKNOWN_ROWS)
+        self.full_scans: List[str] = []
+        self.missing_indexes: List[str] = []
+
+    def _table(self, name: str) -> str:
+        name = name.strip('"`[]').lower()
+        return self.aliases.get(name, name)
+
+    def _rows(self, table: str) -> int:
+        return self.row_counts.get(table, self.unknown_rows)
+
+    def _step(self, kind: str, table: str, using: Optional[str]):
+        """
+        Returns (rows per loop iteration, one-off setup cost) of a loop step.
+        """
+        n = max(self._rows(table), 1)
+        if kind == "SCAN":
+            if table in self.row_counts:
+                self.full_scans.append(f"{table} (~{n} rows)")
+            return n, 0
+        condition = using[using.find("(") + 1:using.rfind(")")] if using and "(" in using else ""
+        setup = 0
+        if using and "AUTOMATIC" in using:
+            # SQLite builds a throwaway index because the join column has none
+            columns = ", ".join(part.split("=")[0].strip() for part in condition.split(" AND "))
+            self.missing_indexes.append(f"{table} ({columns})")
+            setup = n
+        if "rowid=?" in condition and "AND" not in condition:
+            return 1, setup
+        if "<" in condition or ">" in condition:
+            # SQLite's own guess: a range keeps about a quarter of the rows
+            return max(n // 4, 1), setup
+        return max(int(math.log2(n)), 1), setup
+
+    def cost(self, parent: int = 0, cap: Optional[int] = None) -> float:
+        """
+        Rows visited by the loops under `parent`; `cap` bounds the outer loop
+        (a LIMIT on a plan that can stop early).
+        """
+        total = 0.0
+        loops = 1.0
+        outer = True
+        for node_id, detail in self.children[parent]:
+            match = _LOOP.match(detail)
+            if match and not detail.startswith("SCAN CONSTANT"):
+                kind, name, alias, using = match.groups()
+                rows, setup = self._step(kind, self._table(alias or name), using)
+                if outer and cap is not None:
+                    rows = min(rows, cap)
+                outer = False
+                total += setup
+                loops *= rows
+                total += loops + loops * self.cost(node_id)
+            elif "TEMP B-TREE" in detail:
+                # One pass over the rows produced so far to sort or group them
+                total += loops + self.cost(node_id)
+            else:
+                # Subqueries and compound parts: correlated ones run once per outer row
+                sub = self.cost(node_id)
+                total += sub * loops if detail.startswith("CORRELATED") else sub
+        return total
+
+
+def estimate_cost(conn: sqlite3.Connection, sql: str, row_counts: Dict[str, int]) -> PlanEstimate:
+    """
+    Estimates how many rows a statement will visit from its query plan.
+
+    Parameters:
+        conn (sqlite3.Connection): Connection to plan the statement on.
+        sql (str): The statement.
+        row_counts (dict): Lowercase table name -> row count.
+
+    Returns:
+        PlanEstimate: Cost, full table scans, missing join indexes and plan lines.
+    """
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()
+    normalized = normalize_sql(sql)
+    aliases = table_aliases(normalized, row_counts)
+    walker = _PlanWalker(rows, row_counts, aliases)
+    plan = [row[3] for row in rows]
+    # Without sorting, aggregation or a filter to skip rows, the outer loop
+    # stops once LIMIT rows are produced
+    limit = _limit_rows(normalized)
+    streams = (
+        limit is not None
+        and _AGGREGATE.search(normalized) is None
+        and re.search(r"\bwhere\b", normalized) is None
+        and not any("TEMP B-TREE" in line for line in plan)
+    )
+    cost = walker.cost(cap=limit if streams else None)
+    return PlanEstimate(int(cost), walker.full_scans, walker.missing_indexes, plan)
+
+
+def check_cost(conn: sqlite3.Connection, sql: str, row_counts: Dict[str, int], budget: int) -> PlanEstimate:
+    """
+    Raises QueryTooExpensive if a statement's estimated cost exceeds the budget.
+
+    Returns:
+        PlanEstimate: The estimate, for statements within budget.
+    """
+    estimate = estimate_cost(conn, sql, row_counts)
+    if estimate.cost > budget:
+        hints = []
+        if estimate.full_scans:
+            hints.append("full scans of " + ", ".join(estimate.full_scans))
+        if estimate.missing_indexes:
+            hints.append("no index for " + ", ".join(estimate.missing_indexes))
+        raise QueryTooExpensive(
+            f"Query is too expensive: it would visit about {estimate.cost:,} rows "
+            f"(budget {budget:,})" + (f"; {'; '.join(hints)}" if hints else "") + ".",
+            {
+                "estimated_cost": estimate.cost,
+                "budget": budget,
+                "full_scans": estimate.full_scans,
+                "missing_indexes": estimate.missing_indexes,
+            },
+        )
+    return estimate
+
+
+@contextmanager
+def deadline(conn: sqlite3.Connection, seconds: float) -> Iterator[None]:
+    """
+    Aborts statements stepped on `conn` inside the block once `seconds` have
+    passed, raising QueryTooExpensive instead of SQLite's "interrupted" error.
+    A non-positive `seconds` disables the deadline.
+    """
+    if seconds <= 0:
+        yield
+        return
+
+    expires = time.monotonic() + seconds
+    expired = False
+
+    def check() -> int:
+        nonlocal expired
+        expired = time.monotonic() > expires
+        # A non-zero return interrupts the running statement
+        return 1 if expired else 0
+
+    conn.set_progress_handler(check, PROGRESS_CHECK_OPCODES)
+    try:
+        yield
+    except sqlite3.OperationalError as e:
+        if expired:
+            raise QueryTooExpensive(
+                f"Query exceeded its {seconds:g}s execution budget and was cancelled.",
+                {"timeout_seconds": seconds},
+            ) from e
+        raise
+    finally:
+        conn.set_progress_handler(None, 0)
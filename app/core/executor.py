@@ -4,87 +4,617 @@ This module handles execution of raw SQL queries against a SQLite database.
 It distinguishes between SELECT (read) and MODIFY (write) operations,
 returns structured results for SELECT queries, and reports the outcome
 or error for other query types. Designed for secure and robust database interaction.
+
+Queries run on a SQLiteEngine: a bounded pool of reusable read-only
+connections plus a single serialized writer connection, driven by a worker
+thread pool so async handlers await results instead of blocking the event
+loop. sqlite3 releases the GIL while stepping a statement, so concurrent
+SELECTs run in parallel.
+
+SELECT results are cached in memory by normalized SQL text (see
+app/core/result_cache.py). Before each lookup the engine reads
+`PRAGMA data_version` on a dedicated watcher connection; it changes after
+any committed write, from this process or another, and clears the cache.
+
+Every statement passes the cost guard (app/core/cost_guard.py) first: its
+query plan is costed against table row counts, unbounded SELECTs get a
+LIMIT, and execution is cancelled past SQL_QUERY_TIMEOUT_SECONDS.
+Executed SELECTs are timed into the workload log read by the index advisor.
 """
 
+import asyncio
+import contextvars
+import queue
 import sqlite3
-from typing import Any, Dict
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Iterator, Optional
 
-# Path to the SQLite database file
-DB_PATH = "data/sample.db"
+from app.config import (
+    DB_PATH,
+    SQL_AUTO_LIMIT,
+    SQL_COST_GUARD_ENABLED,
+    SQL_MAX_QUERY_COST,
+    SQL_QUERY_TIMEOUT_SECONDS,
+    MAX_PAGE_SIZE,
+    MAX_RESULT_ROWS,
+    MAX_STREAM_ROWS,
+    RESULT_BATCH_SIZE,
+    SQLITE_BUSY_TIMEOUT_MS,
+    SQLITE_CACHE_SIZE_KB,
+    SQLITE_JOURNAL_MODE,
+    SQLITE_MMAP_SIZE,
+    SQLITE_READ_POOL_SIZE,
+    SQL_RESULT_CACHE_ENABLED,
+    SQL_WORKLOAD_LOG,
+)
+from app.core.cost_guard import QueryTooExpensive, check_cost, deadline, ensure_limit
+from app.core.metrics import SQL_IN_FLIGHT, stage
+from app.core.result_cache import ResultCache, is_cacheable, normalize_sql
+from app.db.schema import SchemaProvider, get_schema_provider
+from app.db.workload import WorkloadLog
 
-def execute_sql(sql: str) -> Dict[str, Any]:
+# Statement keywords that only read; everything else goes to the writer
+READ_KEYWORDS = {"select", "with", "explain", "values"}
+
+
+def _query_type(sql: str) -> str:
     """
-    Executes a given SQL query on the SQLite database.
+    Returns the lowercase leading keyword of a SQL statement (e.g. "select").
+    """
+    return sql.strip().split()[0].lower()
 
-    Parameters:
-        sql (str): The SQL query to execute.
 
-    Returns:
-        dict: A structured dictionary containing query results or error info.
+def _error_result(error: Exception) -> Dict[str, Any]:
     """
-    if not sql or not sql.strip():
+    Converts an execution exception into the structured ERROR result.
+    """
+    if isinstance(error, QueryTooExpensive):
+        # Rejected or cancelled by the cost guard
         return {
             "query_type": "ERROR",
-            "summary": "Empty SQL query provided."
+            "error": "too_expensive",
+            "summary": str(error),
+            **error.details,
         }
+    if isinstance(error, sqlite3.OperationalError):
+        # Catch common DB issues like bad SQL syntax
+        return {
+            "query_type": "ERROR",
+            "summary": f"OperationalError: {str(error)}"
+        }
+    if isinstance(error, sqlite3.DatabaseError):
+        # Catch broader DB errors
+        return {
+            "query_type": "ERROR",
+            "summary": f"DatabaseError: {str(error)}"
+        }
+    # Catch any other unexpected errors
+    return {
+        "query_type": "ERROR",
+        "summary": f"UnexpectedError: {str(error)}"
+    }
 
-    try:
-        # Automatically handles connection closing
-        with sqlite3.connect(DB_PATH) as conn:
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
 
-            # Determine the type of SQL operation (e.g., SELECT, INSERT)
-            query_type = sql.strip().split()[0].lower()
+class SQLiteEngine:
+    """
+    Pooled SQLite executor with read-only reader connections and one writer.
+    """
 
-            # Execute the SQL query
-            cursor.execute(sql)
+    def __init__(self, db_path: str = DB_PATH, pool_size: int = SQLITE_READ_POOL_SIZE,
+                 cache_results: bool = SQL_RESULT_CACHE_ENABLED,
+                 log_workload: bool = SQL_WORKLOAD_LOG):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.cache: Optional[ResultCache] = ResultCache() if cache_results else None
+        self._watcher: Optional[sqlite3.Connection] = None
+        self._watcher_lock = threading.Lock()
+        self._schema: Optional[SchemaProvider] = None
+        self.workload: Optional[WorkloadLog] = WorkloadLog() if log_workload else None
+        self._readers: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._opened = 0
+        self._open_lock = threading.Lock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.Lock()
+        # One thread per reader plus one for the writer
+        self._executor = ThreadPoolExecutor(
+            max_workers=pool_size + 1, thread_name_prefix="sqlite-exec"
+        )
 
-            # Handle SELECT queries separately
-            if query_type == "select":
-                rows = cursor.fetchall()
+    def _configure(self, conn: sqlite3.Connection, read_only: bool) -> sqlite3.Connection:
+        # Tuned for read-heavy analytical workloads
+        conn.row_factory = sqlite3.Row
+        conn.execute(f"PRAGMA busy_timeout = {SQLITE_BUSY_TIMEOUT_MS}")
+        conn.execute(f"PRAGMA cache_size = -{SQLITE_CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {SQLITE_MMAP_SIZE}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        if read_only:
+            conn.execute("PRAGMA query_only = ON")
+        return conn
 
-                if not rows:
-                    return {
-                        "query_type": "SELECT",
-                        "columns": [],
-                        "rows": [],
-                        "summary": "No results found."
-                    }
+    def _writer_conn(self) -> sqlite3.Connection:
+        # Caller holds the writer lock
+        if self._writer is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            if SQLITE_JOURNAL_MODE:
+                # Persists in the database file (WAL lets readers proceed while the writer commits)
+                conn.execute(f"PRAGMA journal_mode = {SQLITE_JOURNAL_MODE}")
+            if conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+                # Durable in WAL mode, and commits skip an fsync
+                conn.execute("PRAGMA synchronous = NORMAL")
+            self._writer = self._configure(conn, read_only=False)
+        return self._writer
 
-                # Extract column names and convert rows to lists
-                columns = rows[0].keys()
-                data = [list(row) for row in rows]
+    def _acquire_reader(self) -> sqlite3.Connection:
+        try:
+            return self._readers.get_nowait()
+        except queue.Empty:
+            pass
 
-                return {
-                    "query_type": "SELECT",
-                    "columns": list(columns),
-                    "rows": data,
-                    "summary": f"{len(rows)} rows returned."
-                }
-            else:
+        with self._open_lock:
+            can_open = self._opened < self.pool_size
+            if can_open:
+                self._opened += 1
+
+        if not can_open:
+            # Pool exhausted: wait for a connection to be returned
+            return self._readers.get()
+
+        try:
+            # Apply the configured journal mode before opening readers
+            with self._writer_lock:
+                self._writer_conn()
+            conn = sqlite3.connect(
+                f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False
+            )
+            return self._configure(conn, read_only=True)
+        except Exception:
+            with self._open_lock:
+                self._opened -= 1
+            raise
+
+    def _release_reader(self, conn: sqlite3.Connection):
+        self._readers.put(conn)
+
+    def _data_version(self) -> int:
+        """
+        Returns SQLite's data_version as seen by the watcher connection.
+
+        The watcher never writes, so its value changes whenever any other
+        connection (the writer, or another process) commits.
+        """
+        with self._watcher_lock:
+            if self._watcher is None:
+                with self._writer_lock:
+                    self._writer_conn()
+                self._watcher = sqlite3.connect(
+                    f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False
+                )
+            return self._watcher.execute("PRAGMA data_version").fetchone()[0]
+
+    def _row_counts(self) -> Dict[str, int]:
+        if self._schema is None:
+            self._schema = get_schema_provider() if self.db_path == DB_PATH else SchemaProvider(self.db_path)
+        return {table["name"].lower(): table["row_count"] for table in self._schema.get_tables()}
+
+    def _check_cost(self, conn: sqlite3.Connection, sql: str):
+        """
+        Raises QueryTooExpensive if the statement's plan is over budget.
+        """
+        # EXPLAIN statements cannot be planned, and only describe a plan anyway
+        if SQL_COST_GUARD_ENABLED and _query_type(sql) != "explain":
+            with stage("sql_plan"):
+                check_cost(conn, sql, self._row_counts(), SQL_MAX_QUERY_COST)
+
+    def _select(self, sql: str, max_rows: int, auto_limit: bool = False) -> Dict[str, Any]:
+        """
+        Runs a SELECT on a pooled reader, serving and filling the result cache.
+        """
+        key = None
+        if self.cache is not None and is_cacheable(sql):
+            # Read the version before running: a write racing the query tags
+            # its result as stale instead of letting it outlive the write
+            version = self._data_version()
+            self.cache.set_version(version)
+            key = (normalize_sql(sql), max_rows)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        if auto_limit and SQL_AUTO_LIMIT and _query_type(sql) in ("select", "with"):
+            # One extra row tells _run_select the result was truncated
+            sql = ensure_limit(sql, max_rows + 1)
+
+        conn = self._acquire_reader()
+        try:
+            self._check_cost(conn, sql)
+            started = time.perf_counter()
+            with stage("sql_execute"), deadline(conn, SQL_QUERY_TIMEOUT_SECONDS):
+                result = self._run_select(conn, sql, max_rows)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        finally:
+            self._release_reader(conn)
+
+        if self.workload is not None:
+            self.workload.record(sql, elapsed_ms)
+
+        if key is not None:
+            self.cache.put(key, version, result)
+        return result
+
+    def execute(self, sql: str) -> Dict[str, Any]:
+        """
+        Executes a given SQL query on a pooled connection (blocking).
+
+        SELECT results are capped at MAX_RESULT_ROWS; larger results are
+        truncated and flagged, and should be paginated or streamed instead.
+
+        Parameters:
+            sql (str): The SQL query to execute.
+
+        Returns:
+            dict: A structured dictionary containing query results or error info.
+        """
+        if not sql or not sql.strip():
+            return {
+                "query_type": "ERROR",
+                "summary": "Empty SQL query provided."
+            }
+
+        try:
+            # Determine the type of SQL operation (e.g., SELECT, INSERT)
+            query_type = _query_type(sql)
+
+            if query_type in READ_KEYWORDS:
+                return self._select(sql, MAX_RESULT_ROWS, auto_limit=True)
+
+            # Writes are serialized on the single writer connection
+            with self._writer_lock:
+                conn = self._writer_conn()
+                self._check_cost(conn, sql)
+                try:
+                    with stage("sql_execute"), deadline(conn, SQL_QUERY_TIMEOUT_SECONDS):
+                        cursor = conn.execute(sql)
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
                 # For non-SELECT queries (INSERT, UPDATE, DELETE, etc.)
-                conn.commit()
                 return {
                     "query_type": "MODIFY",
                     "summary": f"{cursor.rowcount} rows affected."
                 }
 
-    except sqlite3.OperationalError as e:
-        # Catch common DB issues like bad SQL syntax
-        return {
-            "query_type": "ERROR",
-            "summary": f"OperationalError: {str(e)}"
-        }
-    except sqlite3.DatabaseError as e:
-        # Catch broader DB errors
-        return {
-            "query_type": "ERROR",
-            "summary": f"DatabaseError: {str(e)}"
-        }
-    except Exception as e:
-        # Catch any other unexpected errors
+        except Exception as e:
+            return _error_result(e)
+
+    def execute_page(self, sql: str, offset: int, page_size: int) -> Dict[str, Any]:
+        """
+        Executes one page of a SELECT query (blocking).
+
+        Parameters:
+            sql (str): The SELECT query to paginate.
+            offset (int): Number of rows to skip.
+            page_size (int): Maximum rows to return (capped at MAX_PAGE_SIZE).
+
+        Returns:
+            dict: A SELECT result with "offset" and "has_more" added, or error info.
+        """
+        if not sql or not sql.strip():
+            return {
+                "query_type": "ERROR",
+                "summary": "Empty SQL query provided."
+            }
+        if _query_type(sql) not in READ_KEYWORDS:
+            return {
+                "query_type": "ERROR",
+                "summary": "Pagination is only supported for SELECT queries."
+            }
+
+        page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+        offset = max(0, offset)
+        # Fetch one extra row to learn whether another page exists
+        paged_sql = f"SELECT * FROM ({sql.strip().rstrip(';')}) LIMIT {page_size + 1} OFFSET {offset}"
+
+        try:
+            result = self._select(paged_sql, page_size)
+        except Exception as e:
+            return _error_result(e)
+
+        result["offset"] = offset
+        result["has_more"] = result.pop("truncated", False)
+        if result["rows"]:
+            result["summary"] = f"{len(result['rows'])} rows returned (from row {offset + 1})."
+        return result
+
+    def stream(self, sql: str, batch_size: int = RESULT_BATCH_SIZE,
+               max_rows: int = MAX_STREAM_ROWS) -> Iterator[Dict[str, Any]]:
+        """
+        Executes a SELECT query and yields its result incrementally (blocking).
+
+        Yields a {"type": "columns"} event, then {"type": "rows"} events of at
+        most batch_size rows fetched with fetchmany(), then a {"type": "end"}
+        event. Memory is bounded by the batch size, not the result size.
+        Errors are yielded as a single {"type": "error"} event.
+
+        Parameters:
+            sql (str): The SELECT query to stream.
+            batch_size (int): Rows per fetchmany() call and per yielded event.
+            max_rows (int): Server-enforced cap on streamed rows.
+        """
+        if not sql or not sql.strip() or _query_type(sql) not in READ_KEYWORDS:
+            yield {"type": "error", "query_type": "ERROR",
+                   "summary": "Streaming is only supported for SELECT queries."}
+            return
+
+        try:
+            conn = self._acquire_reader()
+        except Exception as e:
+            yield {"type": "error", **_error_result(e)}
+            return
+
+        try:
+            # Streams are paced by the client, so only the plan is checked, not
+            # the run time; the plan is costed as if capped at max_rows
+            planned = sql
+            if _query_type(sql) in ("select", "with"):
+                planned = ensure_limit(sql, max_rows)
+            self._check_cost(conn, planned)
+            cursor = conn.cursor()
+            cursor.row_factory = None
+            cursor.execute(sql)
+            yield {"type": "columns", "columns": [col[0] for col in cursor.description or []]}
+
+            sent = 0
+            truncated = False
+            while True:
+                batch = cursor.fetchmany(min(batch_size, max_rows - sent + 1))
+                if not batch:
+                    break
+                if sent + len(batch) > max_rows:
+                    batch = batch[:max_rows - sent]
+                    truncated = True
+                sent += len(batch)
+                if batch:
+                    yield {"type": "rows", "rows": batch}
+                if truncated:
+                    break
+
+            yield {"type": "end", "row_count": sent, "truncated": truncated}
+        except Exception as e:
+            yield {"type": "error", **_error_result(e)}
+        finally:
+            self._release_reader(conn)
+
+    def _run_select(self, conn: sqlite3.Connection, sql: str, max_rows: int) -> Dict[str, Any]:
+        # Plain tuples from fetchmany(): no per-row Row objects or list copies
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(sql)
+        columns = [col[0] for col in cursor.description or []]
+
+        rows = []
+        truncated = False
+        while True:
+            batch = cursor.fetchmany(RESULT_BATCH_SIZE)
+            if not batch:
+                break
+            rows.extend(batch)
+            if len(rows) > max_rows:
+                del rows[max_rows:]
+                truncated = True
+                break
+
+        if not rows:
+            return {
+                "query_type": "SELECT",
+                "columns": columns,
+                "rows": [],
+                "summary": "No results found."
+            }
+
+        summary = f"{len(rows)} rows returned."
+        if truncated:
+            summary = f"{len(rows)} rows returned (truncated at the row limit; paginate or stream for more)."
+
         return {
-            "query_type": "ERROR",
-            "summary": f"UnexpectedError: {str(e)}"
+            "query_type": "SELECT",
+            "columns": columns,
+            "rows": rows,
+            "summary": summary,
+            "truncated": truncated,
         }
+
+    async def execute_async(self, sql: str) -> Dict[str, Any]:
+        """
+        Runs execute() on the engine's worker threads and awaits the result.
+        """
+        loop = asyncio.get_running_loop()
+        # The caller's context carries its request timings into the worker thread
+        context = contextvars.copy_context()
+        with SQL_IN_FLIGHT.track():
+            return await loop.run_in_executor(self._executor, context.run, self.execute, sql)
+
+    async def execute_page_async(self, sql: str, offset: int, page_size: int) -> Dict[str, Any]:
+        """
+        Runs execute_page() on the engine's worker threads and awaits the result.
+        """
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        with SQL_IN_FLIGHT.track():
+            return await loop.run_in_executor(
+                self._executor, context.run, self.execute_page, sql, offset, page_size
+            )
+
+    async def stream_async(self, sql: str, batch_size: int = RESULT_BATCH_SIZE,
+                           max_rows: int = MAX_STREAM_ROWS) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async wrapper around stream(): a producer thread runs the generator,
+        fetching one batch each time the consumer asks for the next event.
+
+        If the consumer stops early (e.g. the client disconnects), the producer
+        sees the stop flag before its next fetch and closes the generator on
+        its own thread, returning the reader to the pool; the generator is
+        never closed while a fetch is still running.
+        """
+        loop = asyncio.get_running_loop()
+        events = self.stream(sql, batch_size, max_rows)
+        delivered: "asyncio.Queue[Any]" = asyncio.Queue()
+        demand = threading.Semaphore(0)
+        stop = threading.Event()
+        done = object()
+
+        def deliver(item):
+            try:
+                loop.call_soon_threadsafe(delivered.put_nowait, item)
+            except RuntimeError:
+                # The event loop is closed: nobody is waiting any more
+                pass
+
+        def produce():
+            try:
+                while True:
+                    demand.acquire()
+                    if stop.is_set():
+                        return
+                    event = next(events, done)
+                    deliver(event)
+                    if event is done:
+                        return
+            except BaseException as e:
+                deliver(e)
+            finally:
+                events.close()
+
+        # A stream holds its reader between batches and is paced by the client,
+        # so it gets its own thread: engine threads blocked waiting for a reader
+        # must never starve the stream that would release one.
+        context = contextvars.copy_context()
+        threading.Thread(target=context.run, args=(produce,), name="sqlite-stream", daemon=True).start()
+        try:
+            while True:
+                demand.release()
+                event = await delivered.get()
+                if event is done:
+                    break
+                if isinstance(event, BaseException):
+                    raise event
+                yield event
+        finally:
+            stop.set()
+            # Wakes a producer waiting for demand; one mid-fetch stops after it
+            demand.release()
+
+    def close(self):
+        """
+        Stops the worker threads and closes every pooled connection.
+        """
+        self._executor.shutdown(wait=True)
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._watcher_lock:
+            if self._watcher is not None:
+                self._watcher.close()
+                self._watcher = None
+        if self.cache is not None:
+            self.cache.clear()
+        if self.workload is not None:
+            self.workload.close()
+        self._opened = 0
+
+
+_engine: Optional[SQLiteEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> SQLiteEngine:
+    """
+    Returns the process-wide SQLite engine, creating it on first use.
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = SQLiteEngine()
+        return _engine
+
+
+def peek_engine() -> Optional[SQLiteEngine]:
+    """
+    Returns the process-wide engine if it has been created, without creating it.
+    """
+    return _engine
+
+
+def close_engine():
+    """
+    Closes the process-wide engine (called on application shutdown).
+    """
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.close()
+            _engine = None
+
+
+def execute_sql(sql: str) -> Dict[str, Any]:
+    """
+    Executes a given SQL query on the SQLite database.
+
+    Parameters:
+        sql (str): The SQL query to execute.
+
+    Returns:
+        dict: A structured dictionary containing query results or error info.
+    """
+    return get_engine().execute(sql)
+
+
+async def execute_sql_async(sql: str) -> Dict[str, Any]:
+    """
+    Executes a given SQL query on the engine's worker threads without
+    blocking the event loop.
+
+    Parameters:
+        sql (str): The SQL query to execute.
+
+    Returns:
+        dict: A structured dictionary containing query results or error info.
+    """
+    return await get_engine().execute_async(sql)
+
+
+async def execute_page_async(sql: str, offset: int, page_size: int) -> Dict[str, Any]:
+    """
+    Executes one page of a SELECT query without blocking the event loop.
+
+    Parameters:
+        sql (str): The SELECT query to paginate.
+        offset (int): Number of rows to skip.
+        page_size (int): Maximum rows to return.
+
+    Returns:
+        dict: A structured dictionary containing the page or error info.
+    """
+    return await get_engine().execute_page_async(sql, offset, page_size)
+
+
+def stream_sql(sql: str, batch_size: int = RESULT_BATCH_SIZE) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Streams a SELECT query's columns and row batches as async events.
+
+    Parameters:
+        sql (str): The SELECT query to stream.
+        batch_size (int): Rows per batch.
+
+    Returns:
+        AsyncIterator[dict]: "columns", "rows", "end" (or "error") events.
+    """
+    return get_engine().stream_async(sql, batch_size)
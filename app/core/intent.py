@@ -1,45 +1,251 @@
 # app/core/intent.py
 """
-This module defines a simple keyword-based intent classifier that determines
-whether a natural language question should be processed as a structured SQL
-query or passed to a Retrieval-Augmented Generation (RAG) pipeline.
+This module defines the intent classifier that determines whether a natural
+language question should be processed as a structured SQL query or passed to
+a Retrieval-Augmented Generation (RAG) pipeline.
 
-Currently based on keyword matching but can be upgraded to a machine learning
-or LLM-based classifier for more nuanced detection.
+Classification runs in two tiers:
+1. Rules: one precompiled regex scans the question once for SQL cues (with
+   their inflections: "count", "counting", "averages"...), weaker SQL cues
+   ("from", "where", "top") and document-question cues ("explain", "policy").
+2. Embeddings: when the rules are ambiguous (no cue, only weak cues, or
+   conflicting cues), the question is matched to the nearest centroid of
+   MiniLM embeddings of labelled example questions.
+
+Every prediction carries a confidence score, so callers can hedge on
+low-confidence routes. A misroute to RAG costs a full LLM call.
 """
 
-from typing import Literal
+import asyncio
+import re
+import threading
+from typing import List, Literal, NamedTuple, Optional
 
-def classify_intent(question: str) -> Literal["sql", "rag"]:
+import numpy as np
+
+from app.config import INTENT_CONFIDENCE_THRESHOLD, INTENT_EMBEDDING_TIER
+from app.core.metrics import INTENTS
+
+# Strong SQL cues: aggregation, ranking and listing words with their inflections
+_SQL_CUES = [
+    r"count(?:s|ed|ing)?", r"tall(?:y|ies|ied)", r"total(?:s|l?ed|l?ing)?", r"sum(?:s|med|ming)?",
+    r"averag(?:e|es|ed|ing)", r"avg", r"median", r"max(?:imum|imums)?", r"min(?:imum|imums)?",
+    r"highest", r"lowest", r"largest", r"smallest", r"biggest",
+    r"list(?:s|ed|ing)?", r"show(?:s|ed|n|ing)?", r"display(?:s|ed|ing)?",
+    r"rank(?:s|ed|ing)?", r"sort(?:s|ed|ing)?", r"group(?:s|ed|ing)?",
+    r"how many", r"how much", r"number of", r"group by", r"order by", r"top \d+",
+    r"per (?:month|year|day|week|country|customer|region|category)",
+    r"(?:greater|less|more|fewer|later|earlier|older|newer|higher|lower) than", r"between \S+ and", r"select", r"rows?",
+]
+
+# Weak SQL cues: common in SQL questions, but also in prose questions
+_WEAK_SQL_CUES = ["from", "where", "top", "most", "least", "each", "all", "which"]
+
+# Document (RAG) cues
+_RAG_CUES = [
+    r"explain(?:s|ed|ing)?", r"explanations?", r"describ(?:e|es|ed|ing)", r"descriptions?",
+    r"summar(?:y|ies|ize|izes|ized|izing|ise|ised|ising)", r"defin(?:e|es|ed|ing|ition|itions)",
+    r"polic(?:y|ies)", r"procedures?", r"guidelines?", r"documents?", r"documentation",
+    r"manuals?", r"handbook", r"why", r"how (?:do|does|can|should|to|is|are)",
+    r"what is (?:the )?(?:purpose|meaning|difference)", r"according to", r"tell me about",
+    r"what does (?:\w+ ){1,5}(?:say|mean)",
+]
+
+# One pass over the lowercased question; the named group says which cue matched.
+# Matching is only attempted at word starts, which skips most positions early.
+_CUES = re.compile(
+    r"(?<!\w)(?=\w)(?:"
+    rf"(?P<sql>{'|'.join(_SQL_CUES)})"
+    rf"|(?P<rag>{'|'.join(_RAG_CUES)})"
+    rf"|(?P<weak>{'|'.join(_WEAK_SQL_CUES)})"
+    r")\b"
+)
+
+# Weak cues count half a strong cue
+_WEAK_WEIGHT = 0.5
+
+# Labelled examples whose embeddings form the second-tier centroids
+INTENT_EXAMPLES = {
+    "sql": [
+        "How many customers signed up last year?",
+        "Show all orders placed in March",
+        "List the top 10 products by revenue",
+        "What is the total revenue per country?",
+        "Average order value by customer segment",
+        "Which customers have not ordered in 90 days?",
+        "Find employees hired after 2020",
+        "Count invoices that are still unpaid",
+        "What was the highest sale last month?",
+        "Give me the customers from India",
+        "Orders with an amount above 500",
+        "Revenue broken down by region and quarter",
+        "Which product sold the most units?",
+        "Number of tickets opened each week",
+        "Sales figures for the electronics category",
+        "Customers sorted by signup date",
+    ],
+    "rag": [
+        "What is our refund policy?",
+        "Explain how the onboarding process works",
+        "Summarize the security guidelines",
+        "What does the contract say about termination?",
+        "Why was the pricing model changed?",
+        "How do I reset my password?",
+        "Describe the escalation procedure for incidents",
+        "What are the benefits of the premium plan?",
+        "Tell me about the company history",
+        "What is the purpose of the data retention rules?",
+        "How should travel expenses be approved?",
+        "What are the terms of the warranty?",
+        "Who is responsible for approving new vendors?",
+        "What does the handbook say about remote work?",
+        "Give an overview of the product roadmap",
+        "What happens if a payment is late?",
+    ],
+}
+
+
+class IntentPrediction(NamedTuple):
     """
-    Classifies the intent of a natural language question.
+    A routing decision with its confidence (0.5 = coin flip, 1.0 = certain).
+    """
+    intent: Literal["sql", "rag"]
+    confidence: float
+    tier: Literal["rules", "embedding", "default"]
+    # Question embedding computed by the embedding tier, reusable downstream
+    embedding: Optional[List[float]] = None
+
+
+def classify_rules(question: str) -> IntentPrediction:
+    """
+    First tier: scores SQL and RAG cues found by the precompiled matcher.
+    """
+    sql = rag = weak = 0
+    for match in _CUES.finditer(question.lower()):
+        kind = match.lastgroup
+        if kind == "sql":
+            sql += 1
+        elif kind == "rag":
+            rag += 1
+        else:
+            weak += 1
+
+    sql_score = sql + _WEAK_WEIGHT * weak
+    if sql_score == rag:
+        # No cue at all, or a perfect conflict: RAG is the historical default
+        return IntentPrediction("rag", 0.5, "default")
+
+    intent = "sql" if sql_score > rag else "rag"
+    confidence = 0.5 + 0.5 * abs(sql_score - rag) / (sql_score + rag)
+    if intent == "sql" and sql == 0:
+        # Only weak cues: lean SQL (the historical behaviour), but not confidently
+        confidence = min(confidence, 0.6)
+    return IntentPrediction(intent, round(confidence, 3), "rules")
+
+
+class EmbeddingIntentClassifier:
+    """
+    Second tier: nearest centroid over embeddings of labelled example questions.
+    """
+
+    # Scales cosine-similarity margins into a softmax confidence
+    TEMPERATURE = 20.0
+
+    def __init__(self, examples=INTENT_EXAMPLES, embedder=None):
+        self.examples = examples
+        self._embedder = embedder
+        self._labels: List[str] = []
+        self._centroids: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def _get_embedder(self):
+        if self._embedder is None:
+            from app.rag.embedder import get_embedder
+            self._embedder = get_embedder()
+        return self._embedder
+
+    def _ensure_centroids(self) -> np.ndarray:
+        with self._lock:
+            if self._centroids is None:
+                labels = list(self.examples)
+                centroids = []
+                for label in labels:
+                    vectors = np.asarray(self._get_embedder().embed_documents(self.examples[label]), dtype=np.float32)
+                    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+                    centroid = vectors.mean(axis=0)
+                    centroids.append(centroid / np.linalg.norm(centroid))
+                self._labels, self._centroids = labels, np.stack(centroids)
+            return self._centroids
+
+    def predict(self, question: str, embedding: Optional[List[float]] = None) -> IntentPrediction:
+        centroids = self._ensure_centroids()
+        if embedding is None:
+            embedding = self._get_embedder().embed_query(question)
+        vector = np.asarray(embedding, dtype=np.float32)
+        scores = centroids @ (vector / (np.linalg.norm(vector) or 1.0))
+
+        weights = np.exp(self.TEMPERATURE * (scores - scores.max()))
+        probabilities = weights / weights.sum()
+        best = int(np.argmax(probabilities))
+        return IntentPrediction(
+            self._labels[best], round(float(probabilities[best]), 3), "embedding", list(embedding)
+        )
+
+
+_embedding_classifier = EmbeddingIntentClassifier()
+
+
+def predict_intent(question: str, use_embeddings: bool = INTENT_EMBEDDING_TIER) -> IntentPrediction:
+    """
+    Classifies a question with its confidence: rules first, then the embedding
+    tier when the rules are below INTENT_CONFIDENCE_THRESHOLD.
 
     Parameters:
         question (str): The input question from the user.
+        use_embeddings (bool): Allow the embedding tier (loads the embedding model).
 
     Returns:
-        Literal["sql", "rag"]: 
-            - "sql" if the question matches typical SQL-related patterns.
-            - "rag" if it's more suitable for a document-based QA model.
+        IntentPrediction: Intent, confidence, deciding tier and any embedding computed.
     """
-
     if not question or not question.strip():
         # Default to RAG if the question is empty or invalid
-        return "rag"
+        return IntentPrediction("rag", 0.5, "default")
 
-    # Keywords that typically indicate SQL-based structured data queries
-    keywords_sql = [
-        "show", "list", "count", "top", "group by", "from", "where", "order by",
-        "most", "least", "total", "average", "sum", "max", "min"
-    ]
+    prediction = classify_rules(question)
+    if prediction.confidence < INTENT_CONFIDENCE_THRESHOLD and use_embeddings:
+        try:
+            prediction = _embedding_classifier.predict(question)
+        except Exception:
+            # Embedding model unavailable: the rules' best guess stands
+            pass
+    INTENTS.inc(intent=prediction.intent, tier=prediction.tier)
+    return prediction
 
-    # Normalize question to lowercase and pad spaces for accurate matching
-    question_lower = f" {question.lower()} "
 
-    # If any SQL keyword is present, classify as SQL
-    for keyword in keywords_sql:
-        if f" {keyword} " in question_lower:
-            return "sql"
+async def predict_intent_async(question: str, use_embeddings: bool = INTENT_EMBEDDING_TIER) -> IntentPrediction:
+    """
+    Async variant of predict_intent: confident rule decisions return inline,
+    and only the embedding tier is moved to a worker thread.
+    """
+    if not question or not question.strip() or not use_embeddings:
+        return predict_intent(question, use_embeddings=False)
+    prediction = classify_rules(question)
+    if prediction.confidence >= INTENT_CONFIDENCE_THRESHOLD:
+        INTENTS.inc(intent=prediction.intent, tier=prediction.tier)
+        return prediction
+    return await asyncio.to_thread(predict_intent, question, use_embeddings)
 
-    # Default to RAG for anything that doesn't appear SQL-related
-    return "rag"
+
+def classify_intent(question: str) -> Literal["sql", "rag"]:
+    """
+    Classifies the intent of a natural language question.
+
+    Parameters:
+        question (str): The input question from the user.
+
+    Returns:
+        Literal["sql", "rag"]:
+            - "sql" if the question matches typical SQL-related patterns.
+            - "rag" if it's more suitable for a document-based QA model.
+    """
+    return predict_intent(question).intent
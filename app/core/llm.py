@@ -0,0 +1,294 @@
+# app/core/llm.py
+"""
+Async client for the OpenAI-compatible LLM endpoint (Groq by default), shared
+by the SQL translator and the RAG answer path.
+
+All calls go through one pooled HTTP client per host. A semaphore caps the
+number of in-flight requests to the provider, every call has a deadline that
+covers its retries, and 429/5xx/connection failures are retried with jittered
+exponential backoff. Calls await the network instead of blocking the event
+loop, so throughput scales with the concurrency the provider allows. The
+OpenAI SDK is imported when the first client is built, keeping it (and the
+API key check) out of application import time.
+
+stream_chat() yields the completion token by token as the provider sends it.
+Failures are only retried before the first token, since a partial answer has
+already reached the caller.
+"""
+
+import asyncio
+import logging
+import os
+import random
+from typing import AsyncIterator, Dict, List, Optional
+from urllib.parse import urlparse
+
+from app.config import (
+    LLM_BACKOFF_BASE_SECONDS,
+    LLM_BACKOFF_MAX_SECONDS,
+    LLM_BASE_URL,
+    LLM_MAX_CONCURRENCY,
+    LLM_MAX_RETRIES,
+    LLM_MODEL,
+    LLM_TIMEOUT_SECONDS,
+)
+from app.core.metrics import LLM_IN_FLIGHT, LLM_REQUESTS, LLM_TOKENS
+
+logger = logging.getLogger(__name__)
+
+
+class LLMError(RuntimeError):
+    """Raised when an LLM call fails after retries or exceeds its deadline."""
+
+
+def _is_retryable(error: Exception) -> bool:
+    from openai import APIConnectionError, APIStatusError, APITimeoutError
+
+    if isinstance(error, (APIConnectionError, APITimeoutError)):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Returns the server-suggested delay from a Retry-After header, if any."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+class AsyncLLMClient:
+    """
+    Pooled, concurrency-capped async chat-completion client for one LLM host.
+    """
+
+    def __init__(
+        self,
+        base_url: str = LLM_BASE_URL,
+        api_key: Optional[str] = None,
+        model: str = LLM_MODEL,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        timeout: float = LLM_TIMEOUT_SECONDS,
+        max_retries: int = LLM_MAX_RETRIES,
+        transport=None,
+    ):
+        # The SDK and HTTP stack load with the first client, not at import time
+        import httpx
+        from openai import AsyncOpenAI
+
+        api_key = api_key or os.getenv("GROQ_API_KEY")
+        if not api_key:
+            raise LLMError("GROQ_API_KEY not found in environment variables.")
+
+        self.base_url = base_url
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        # One keep-alive pool per host; retries are handled here, not by the SDK
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_concurrency,
+                max_keepalive_connections=max_concurrency,
+            ),
+            timeout=httpx.Timeout(timeout),
+            # An httpx transport to send requests through (tests pass a stub)
+            transport=transport,
+        )
+        self._client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            http_client=self._http,
+            max_retries=0,
+        )
+
+    async def chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0,
+        timeout: Optional[float] = None,
+    ) -> str:
+        """
+        Sends a chat completion request and returns the message content.
+
+        Parameters:
+            messages (list): OpenAI-style chat messages.
+            temperature (float): Sampling temperature.
+            timeout (float, optional): Deadline in seconds for this call,
+                including retries. Defaults to the client timeout.
+
+        Returns:
+            str: The content of the first completion choice.
+
+        Raises:
+            LLMError: If the call fails after retries or misses its deadline.
+        """
+        deadline = timeout or self.timeout
+        try:
+            return await asyncio.wait_for(
+                self._chat_with_retries(messages, temperature), timeout=deadline
+            )
+        except asyncio.TimeoutError as e:
+            raise LLMError(f"LLM call exceeded its {deadline:.1f}s deadline.") from e
+
+    async def complete(self, prompt: str, **kwargs) -> str:
+        """
+        Convenience wrapper for a single user-message completion.
+        """
+        return await self.chat([{"role": "user", "content": prompt}], **kwargs)
+
+    async def stream_chat(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[str]:
+        """
+        Sends a streaming chat completion request and yields content deltas as
+        they arrive. Holds a concurrency slot until the stream ends or the
+        caller stops iterating.
+
+        Parameters:
+            messages (list): OpenAI-style chat messages.
+            temperature (float): Sampling temperature.
+            timeout (float, optional): Deadline in seconds for the whole stream,
+                including retries. Defaults to the client timeout.
+
+        Yields:
+            str: Non-empty content deltas of the first choice.
+
+        Raises:
+            LLMError: If the call fails (before the first token, after retries)
+                or the stream misses its deadline.
+        """
+        import httpx
+        from openai import OpenAIError
+
+        loop = asyncio.get_running_loop()
+        deadline = timeout or self.timeout
+        expires = loop.time() + deadline
+        attempt = 0
+        while True:
+            sent = False
+            try:
+                async with self._semaphore:
+                    with LLM_IN_FLIGHT.track():
+                        stream = await asyncio.wait_for(
+                            self._client.chat.completions.create(
+                                model=self.model,
+                                messages=messages,
+                                temperature=temperature,
+                                stream=True,
+                            ),
+                            timeout=expires - loop.time(),
+                        )
+                        try:
+                            chunks = stream.__aiter__()
+                            while True:
+                                try:
+                                    chunk = await asyncio.wait_for(chunks.__anext__(), timeout=expires - loop.time())
+                                except StopAsyncIteration:
+                                    break
+                                usage = getattr(chunk, "usage", None)
+                                if usage is not None:
+                                    LLM_TOKENS.inc(usage.prompt_tokens or 0, kind="prompt")
+                                    LLM_TOKENS.inc(usage.completion_tokens or 0, kind="completion")
+                                content = chunk.choices[0].delta.content if chunk.choices else None
+                                if content:
+                                    sent = True
+                                    yield content
+                        finally:
+                            await stream.close()
+                LLM_REQUESTS.inc(outcome="ok")
+                return
+
+            except asyncio.TimeoutError as e:
+                LLM_REQUESTS.inc(outcome="error")
+                raise LLMError(f"LLM stream exceeded its {deadline:.1f}s deadline.") from e
+
+            except (OpenAIError, httpx.HTTPError) as e:
+                # Transport errors mid-stream surface unwrapped from httpx
+                if sent or not _is_retryable(e) or attempt >= self.max_retries:
+                    LLM_REQUESTS.inc(outcome="error")
+                    raise LLMError(f"LLM request failed: {e}") from e
+                LLM_REQUESTS.inc(outcome="retry")
+
+                backoff = min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2 ** attempt)
+                delay = max(random.uniform(0, backoff), _retry_after(e) or 0)
+                attempt += 1
+                logger.warning("LLM stream failed (%s); retry %d in %.2fs", e, attempt, delay)
+                await asyncio.sleep(min(delay, max(0.0, expires - loop.time())))
+
+    async def stream_complete(self, prompt: str, **kwargs) -> AsyncIterator[str]:
+        """
+        Convenience wrapper streaming a single user-message completion.
+        """
+        async for token in self.stream_chat([{"role": "user", "content": prompt}], **kwargs):
+            yield token
+
+    async def _chat_with_retries(self, messages: List[Dict[str, str]], temperature: float) -> str:
+        from openai import OpenAIError
+
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    with LLM_IN_FLIGHT.track():
+                        response = await self._client.chat.completions.create(
+                            model=self.model,
+                            messages=messages,
+                            temperature=temperature,
+                        )
+                LLM_REQUESTS.inc(outcome="ok")
+                if response.usage is not None:
+                    LLM_TOKENS.inc(response.usage.prompt_tokens or 0, kind="prompt")
+                    LLM_TOKENS.inc(response.usage.completion_tokens or 0, kind="completion")
+                return (response.choices[0].message.content or "").strip()
+
+            except OpenAIError as e:
+                if not _is_retryable(e) or attempt >= self.max_retries:
+                    LLM_REQUESTS.inc(outcome="error")
+                    raise LLMError(f"LLM request failed: {e}") from e
+                LLM_REQUESTS.inc(outcome="retry")
+
+                # Full-jitter exponential backoff, honouring Retry-After if larger
+                backoff = min(LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_BASE_SECONDS * 2 ** attempt)
+                delay = max(random.uniform(0, backoff), _retry_after(e) or 0)
+                attempt += 1
+                logger.warning("LLM request failed (%s); retry %d in %.2fs", e, attempt, delay)
+                await asyncio.sleep(delay)
+
+    async def aclose(self):
+        """
+        Closes the pooled HTTP connections.
+        """
+        await self._http.aclose()
+
+
+# Shared clients, one per LLM host
+_clients: Dict[str, AsyncLLMClient] = {}
+
+
+def get_llm_client(base_url: str = LLM_BASE_URL) -> AsyncLLMClient:
+    """
+    Returns the process-wide client for the given LLM host, creating it on first use.
+    """
+    host = urlparse(base_url).netloc
+    if host not in _clients:
+        _clients[host] = AsyncLLMClient(base_url=base_url)
+    return _clients[host]
+
+
+async def close_llm_clients():
+    """
+    Closes every shared client (called on application shutdown).
+    """
+    while _clients:
+        _, client = _clients.popitem()
+        await client.aclose()
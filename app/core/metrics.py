@@ -0,0 +1,326 @@
+# app/core/metrics.py
+"""
+Process-wide metrics and per-request stage timings.
+
+- Counters, gauges and histograms with labels, rendered in the Prometheus
+  text exposition format for the /metrics endpoint. Callbacks registered with
+  register_collector() add values owned elsewhere (e.g. cache statistics) at
+  scrape time.
+- stage("name") times a pipeline stage: it feeds the nlqs_stage_seconds
+  histogram and, inside a request, that request's timings, which
+  ServerTimingMiddleware returns as a `Server-Timing` header.
+
+Request timings live in a context variable. asyncio tasks and
+asyncio.to_thread() copy the context, so stages timed in worker threads are
+attributed to the request that started them.
+"""
+
+import bisect
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds: sub-millisecond SQL up to slow LLM completions
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+LabelValues = Tuple[str, ...]
+# (metric name, type, help, [(labels, value)]) as produced by collectors
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """
+    Monotonically increasing count, per label combination.
+    """
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}" for key, v in values]
+
+
+class Gauge(Counter):
+    """
+    Value that goes up and down, e.g. requests in flight.
+    """
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track(self, **labels) -> Iterator[None]:
+        """
+        Counts the block as in flight while it runs.
+        """
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """
+    Cumulative bucketed distribution of observations, with sum and count.
+    """
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (last is +Inf), sum]
+        self._values: Dict[LabelValues, list] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    Set of metrics and scrape-time collectors rendered together.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Family]]] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered.")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[Family]]):
+        """
+        Adds a callback returning (name, type, help, samples) families at scrape time.
+        """
+        with self._lock:
+            self._collectors.append(collector)
+
+    def render(self) -> str:
+        """
+        Returns every metric in the Prometheus text exposition format (0.0.4).
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+            collectors = list(self._collectors)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for collector in collectors:
+            for name, kind, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labelnames))
+
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, help, labelnames))
+
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labelnames, buckets))
+
+
+# Service-wide metrics, shared by the modules that record them
+REQUEST_SECONDS = histogram(
+    "nlqs_request_seconds", "HTTP request latency.", ("method", "route", "status")
+)
+REQUESTS_IN_FLIGHT = gauge("nlqs_requests_in_flight", "HTTP requests being served.")
+STAGE_SECONDS = histogram(
+    "nlqs_stage_seconds", "Latency of each pipeline stage (classify, translate, sql_execute, ...).",
+    ("stage",),
+)
+INTENTS = counter("nlqs_intent_predictions_total", "Intent predictions by intent and deciding tier.",
+                  ("intent", "tier"))
+LLM_REQUESTS = counter("nlqs_llm_requests_total", "LLM completion attempts by outcome.", ("outcome",))
+LLM_TOKENS = counter("nlqs_llm_tokens_total", "LLM tokens reported by the API.", ("kind",))
+LLM_IN_FLIGHT = gauge("nlqs_llm_requests_in_flight", "LLM completions awaiting a response.")
+SQL_IN_FLIGHT = gauge("nlqs_sql_queries_in_flight", "SQL statements submitted to the engine.")
+SPECULATIONS = counter("nlqs_speculative_routes_total",
+                       "Low-confidence questions run on both pipelines, by winner (or write, write_dropped, over_budget).",
+                       ("outcome",))
+COALESCED_REQUESTS = counter("nlqs_coalesced_requests_total",
+                             "Requests answered by joining an identical in-flight computation.", ("flight",))
+
+
+_request_timings: contextvars.ContextVar[Optional[List[Tuple[str, float]]]] = contextvars.ContextVar(
+    "request_timings", default=None
+)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Times a pipeline stage into nlqs_stage_seconds and the current request's
+    Server-Timing breakdown. Works around sync code and awaits alike.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage=name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings.append((name, elapsed))
+
+
+def server_timing(timings: Sequence[Tuple[str, float]], total: Optional[float] = None) -> str:
+    """
+    Formats stage timings as a Server-Timing header value; repeated stages
+    (e.g. one per question of a batch) are summed.
+    """
+    durations: Dict[str, float] = {}
+    counts: Dict[str, int] = {}
+    for name, elapsed in timings:
+        durations[name] = durations.get(name, 0.0) + elapsed
+        counts[name] = counts.get(name, 0) + 1
+    entries = []
+    for name, elapsed in durations.items():
+        entry = f"{name};dur={elapsed * 1000:.1f}"
+        if counts[name] > 1:
+            entry += f';desc="x{counts[name]}"'
+        entries.append(entry)
+    if total is not None:
+        entries.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(entries)
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware recording request latency and in-flight requests, and
+    adding a Server-Timing header with the stages completed before the
+    response started (for streams, the stages before the first byte).
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        timings: List[Tuple[str, float]] = []
+        token = _request_timings.set(timings)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                header = server_timing(list(timings), time.perf_counter() - started)
+                message = {**message, "headers": [*message.get("headers", []),
+                                                  (b"server-timing", header.encode("latin-1"))]}
+            await send(message)
+
+        try:
+            with REQUESTS_IN_FLIGHT.track():
+                await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
+            # Matched routes only, so the label stays low-cardinality; templated
+            # paths are reported by template
+            template = getattr(scope.get("route"), "path", None)
+            if template is None:
+                route = "unmatched"
+            else:
+                route = template if "{" in template else scope["path"]
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started, method=scope["method"], route=route, status=str(status)
+            )
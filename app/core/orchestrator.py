@@ -4,12 +4,46 @@ Orchestrator module to route incoming natural language questions to the appropri
 handler — either an SQL translator+executor or a RAG (document-based) system.
 
 This acts as the core logic of NLQS (Natural Language Query System).
+
+Concurrent requests for the same normalized question are coalesced: they
+await one shared in-flight computation (see app/core/singleflight.py), so a
+burst of identical questions costs one LLM call and one query.
+
+Questions the classifier is unsure about are routed speculatively: SQL and
+RAG run concurrently, the first valid answer wins and the other is cancelled,
+within a per-minute budget of extra LLM calls. Questions that translate to a
+write never race: they run as writes only if the classifier leaned SQL, and
+are answered from the documents otherwise.
 """
 
-from app.core.intent import classify_intent
-from app.core.translator import translate_to_sql
-from app.core.executor import execute_sql
-from app.rag.qa import answer_from_docs
+import asyncio
+from typing import AsyncIterator, Dict, List, Optional
+
+from app.config import (
+    BATCH_PARALLELISM,
+    DEFAULT_PAGE_SIZE,
+    QUERY_COALESCING_ENABLED,
+    SPECULATIVE_BUDGET_PER_MINUTE,
+    SPECULATIVE_CONFIDENCE_THRESHOLD,
+    SPECULATIVE_RAG_MAX_DISTANCE,
+    SPECULATIVE_ROUTING_ENABLED,
+)
+from app.core.intent import IntentPrediction, predict_intent, predict_intent_async
+from app.core.translator import forget_translation, translate_to_sql
+from app.core.metrics import SPECULATIONS, stage
+from app.core.executor import READ_KEYWORDS, execute_page_async, execute_sql_async, stream_sql
+from app.core.pagination import decode_page_token, encode_page_token
+from app.core.singleflight import SingleFlight
+from app.core.speculation import SpeculationBudget, race
+from app.db.schema import get_schema_fingerprint
+from app.rag.qa import answer_from_docs, embed_questions, get_rag_runtime, stream_answer
+from app.utils.text import normalize_question
+
+
+# In-flight single questions, shared by identical concurrent requests
+_in_flight = SingleFlight("query")
+# Caps the extra LLM calls spent on speculative routing
+_speculation_budget = SpeculationBudget(SPECULATIVE_BUDGET_PER_MINUTE)
 
 
 def clean_sql(sql: str) -> str:
@@ -28,56 +62,227 @@ def clean_sql(sql: str) -> str:
     # Remove common markdown SQL code block formatting
     if sql.startswith("```") and sql.endswith("```"):
         sql = sql.strip("`").strip()
-    
+
     return sql.strip()
 
 
-async def handle_query(question: str) -> dict:
+def _is_read_query(sql: str) -> bool:
+    return sql.split()[0].lower() in READ_KEYWORDS
+
+
+async def _execute(sql: str, page_size: Optional[int], offset: int = 0) -> dict:
+    """
+    Executes SQL in full, or one page of it when a page size is requested,
+    attaching a next_page_token when more rows remain.
+    """
+    if not page_size or not _is_read_query(sql):
+        return await execute_sql_async(sql)
+
+    result = await execute_page_async(sql, offset, page_size)
+    if result.get("has_more"):
+        result["next_page_token"] = encode_page_token(sql, offset + len(result["rows"]))
+    else:
+        result["next_page_token"] = None
+    return result
+
+
+async def handle_query(
+    question: str,
+    page_size: Optional[int] = None,
+    page_token: Optional[str] = None,
+) -> dict:
     """
     Handles a natural language query by classifying its intent and routing
     it to the appropriate execution pipeline.
 
     Parameters:
         question (str): The user's natural language query.
+        page_size (int, optional): Return SQL results one page at a time.
+        page_token (str, optional): Token from a previous page; fetches the next
+            page of that query without translating the question again.
 
     Returns:
         dict: A structured response containing the query type and result.
     """
+    if page_token:
+        try:
+            sql, offset = decode_page_token(page_token)
+        except ValueError as e:
+            return {
+                "query_type": "error",
+                "message": str(e)
+            }
+        result = await _execute(sql, page_size or DEFAULT_PAGE_SIZE, offset)
+        return {
+            "query_type": "sql",
+            "sql_query": sql,
+            "result": result
+        }
+
     if not question or not question.strip():
         return {
             "query_type": "error",
             "message": "Empty or invalid question provided."
         }
 
+    if not QUERY_COALESCING_ENABLED:
+        return await _answer(question, page_size)
+    # Identical questions arriving together (e.g. a dashboard loading) share one answer.
+    # The key reads the schema fingerprint, which re-introspects after DDL: off the loop
+    key = await asyncio.to_thread(_flight_key, question, page_size)
+    return await _in_flight.do(key, lambda: _answer(question, page_size))
+
+
+def _flight_key(question: str, page_size: Optional[int]) -> tuple:
+    """
+    Coalescing key: the normalized question plus everything its answer depends
+    on besides the data (schema fingerprint, RAG index version).
+    """
+    try:
+        fingerprint = get_schema_fingerprint()
+    except RuntimeError:
+        fingerprint = None
+    return normalize_question(question), page_size, fingerprint, get_rag_runtime().version
+
+
+async def _answer(question: str, page_size: Optional[int]) -> dict:
+    """
+    Classifies a question and runs its pipeline; never raises.
+    """
     try:
         # Step 1: Classify the type of question (SQL vs RAG)
-        intent = classify_intent(question)
+        with stage("classify"):
+            prediction = await predict_intent_async(question)
+    except Exception as e:
+        return {
+            "query_type": "error",
+            "message": f"Internal server error: {str(e)}"
+        }
+
+    if SPECULATIVE_ROUTING_ENABLED and prediction.confidence < SPECULATIVE_CONFIDENCE_THRESHOLD:
+        if _speculation_budget.try_acquire():
+            return await _speculate(question, prediction, page_size)
+        SPECULATIONS.inc(outcome="over_budget")
+
+    # An embedding computed by the classifier is reused by the RAG path
+    return await _route(question, prediction.intent, page_size, prediction.embedding)
+
+
+def _is_valid_answer(response: dict) -> bool:
+    """
+    Whether a pipeline's response can be served: SQL that executed without
+    error, or a non-empty RAG answer (which speculation only generates from
+    chunks close enough to the question).
+    """
+    if response.get("query_type") == "sql":
+        return bool(response.get("sql_query")) and response["result"].get("query_type") != "ERROR"
+    if response.get("query_type") == "rag":
+        return bool(response["result"].get("result"))
+    return False
 
-        # Step 2: Process SQL queries
-        if intent == "sql":
-            sql = await translate_to_sql(question)
-            sql = clean_sql(sql)
-
-            if not sql:
-                return {
-                    "query_type": "sql",
-                    "sql_query": None,
-                    "result": {
-                        "query_type": "ERROR",
-                        "summary": "Failed to generate SQL query."
-                    }
-                }
 
-            result = execute_sql(sql)
+async def _speculate(question: str, prediction: IntentPrediction, page_size: Optional[int]) -> dict:
+    """
+    Runs the SQL and RAG pipelines concurrently for a question the classifier
+    is unsure about; the first valid answer wins and the other pipeline is
+    cancelled. If neither is valid, the classifier's route answers.
+
+    Retrieval starts while the question is translated. A translation that is
+    not a read query never races: if the classifier leaned SQL it runs as a
+    write and RAG is cancelled; if it leaned RAG the write is dropped and the
+    documents answer, so speculation never runs a write the classifier did
+    not route to SQL.
+    """
+    rag = asyncio.ensure_future(
+        _route(question, "rag", embedding=prediction.embedding, max_distance=SPECULATIVE_RAG_MAX_DISTANCE)
+    )
+    try:
+        try:
+            sql = clean_sql(await translate_to_sql(question))
+        except Exception:
+            # The SQL candidate reports the failure; RAG may still answer
+            sql = ""
+
+        if sql and not _is_read_query(sql):
+            if prediction.intent == "sql":
+                rag.cancel()
+                SPECULATIONS.inc(outcome="write")
+                return await _route_sql(question, sql, page_size)
+            # Speculation never takes a side effect the classifier did not pick:
+            # the write is dropped and the documents answer, as on the RAG route
+            SPECULATIONS.inc(outcome="write_dropped")
+            response = await rag
+            if _is_valid_answer(response):
+                return response
+            return await _route(question, "rag", embedding=prediction.embedding)
+
+        winner, response = await race(
+            {"sql": _route_sql(question, sql, page_size), "rag": rag},
+            _is_valid_answer,
+            preferred=prediction.intent,
+        )
+    finally:
+        rag.cancel()
+    SPECULATIONS.inc(outcome=winner or "neither")
+    if winner is None and response.get("query_type") == "rag" and not response["result"].get("result"):
+        # RAG was preferred but found nothing close enough: answer from the documents anyway
+        return await _route(question, "rag", embedding=prediction.embedding)
+    return response
+
+
+async def _route_sql(question: str, sql: str, page_size: Optional[int] = None) -> dict:
+    """
+    Executes SQL translated from a question; never raises.
+    """
+    try:
+        if not sql:
             return {
                 "query_type": "sql",
-                "sql_query": sql,
-                "result": result
+                "sql_query": None,
+                "result": {
+                    "query_type": "ERROR",
+                    "summary": "Failed to generate SQL query."
+                }
             }
 
+        result = await _execute(sql, page_size)
+
+        # Never keep serving a cached translation that does not execute
+        if result.get("query_type") == "ERROR":
+            await asyncio.to_thread(forget_translation, question)
+
+        return {
+            "query_type": "sql",
+            "sql_query": sql,
+            "result": result
+        }
+    except Exception as e:
+        return {
+            "query_type": "error",
+            "message": f"Internal server error: {str(e)}"
+        }
+
+
+async def _route(
+    question: str,
+    intent: str,
+    page_size: Optional[int] = None,
+    embedding: Optional[List[float]] = None,
+    max_distance: Optional[float] = None,
+) -> dict:
+    """
+    Runs the pipeline for an already-classified question. Shared by the single
+    and batch paths; never raises. max_distance is passed to answer_from_docs.
+    """
+    try:
+        # Step 2: Process SQL queries
+        if intent == "sql":
+            sql = clean_sql(await translate_to_sql(question))
+            return await _route_sql(question, sql, page_size)
+
         # Step 3: Process RAG queries
         elif intent == "rag":
-            result = answer_from_docs(question)
+            result = await answer_from_docs(question, embedding, max_distance)
             return {
                 "query_type": "rag",
                 "result": result
@@ -96,3 +301,125 @@ async def handle_query(question: str) -> dict:
             "query_type": "error",
             "message": f"Internal server error: {str(e)}"
         }
+
+
+async def handle_batch(questions: List[str], parallelism: int = BATCH_PARALLELISM) -> List[dict]:
+    """
+    Handles many natural language queries at once, returning results in order.
+
+    Identical questions (after normalization) are answered once. All questions
+    are classified in one pass, RAG questions are embedded in a single batched
+    call, and the per-question pipelines run concurrently, at most
+    `parallelism` at a time.
+
+    Parameters:
+        questions (list[str]): The users' natural language queries.
+        parallelism (int): Maximum concurrent SQL/RAG pipelines.
+
+    Returns:
+        list[dict]: One structured response per input question, in input order.
+    """
+    keys = [normalize_question(question) for question in questions]
+
+    # First occurrence of each distinct question
+    unique: Dict[str, str] = {}
+    for key, question in zip(keys, questions):
+        if key and key not in unique:
+            unique[key] = question
+
+    def classify_all() -> Dict[str, IntentPrediction]:
+        predictions = {}
+        for key, question in unique.items():
+            try:
+                predictions[key] = predict_intent(question)
+            except Exception:
+                predictions[key] = None
+        return predictions
+
+    # Ambiguous questions may need the embedding tier: classify off the event loop
+    with stage("classify"):
+        predictions = await asyncio.to_thread(classify_all)
+    intents = {key: p.intent if p else "error" for key, p in predictions.items()}
+    embeddings: Dict[str, List[float]] = {
+        key: p.embedding for key, p in predictions.items() if p and p.embedding is not None
+    }
+
+    # One batched forward pass for every RAG question not embedded yet
+    rag_keys = [key for key, intent in intents.items() if intent == "rag" and key not in embeddings]
+    if rag_keys:
+        try:
+            vectors = await embed_questions([unique[key] for key in rag_keys])
+            embeddings.update(zip(rag_keys, vectors))
+        except Exception:
+            # Each question falls back to embedding (and reporting errors) on its own
+            pass
+
+    semaphore = asyncio.Semaphore(max(1, parallelism))
+
+    async def run(key: str) -> dict:
+        async with semaphore:
+            return await _route(unique[key], intents[key], embedding=embeddings.get(key))
+
+    results = dict(zip(unique, await asyncio.gather(*(run(key) for key in unique))))
+
+    empty = {
+        "query_type": "error",
+        "message": "Empty or invalid question provided."
+    }
+    return [results[key] if key else empty for key in keys]
+
+
+async def stream_query(question: str) -> AsyncIterator[dict]:
+    """
+    Streaming variant of handle_query.
+
+    SELECT results are yielded incrementally: a "meta" event with the query type
+    and SQL, a "columns" event, "rows" events in fetchmany() batches and a final
+    "end" event. RAG answers are yielded as a "meta" event, a "sources" event
+    with the retrieved chunks' metadata, "token" events as the LLM generates
+    and an "end" event with the whole answer. Writes are yielded as a single
+    "result" event, and failures as an "error" event (also after a partial
+    RAG answer).
+
+    Parameters:
+        question (str): The user's natural language query.
+
+    Yields:
+        dict: Stream events.
+    """
+    if not question or not question.strip():
+        yield {"type": "error", "query_type": "error", "message": "Empty or invalid question provided."}
+        return
+
+    try:
+        with stage("classify"):
+            prediction = await predict_intent_async(question)
+        intent = prediction.intent
+        if intent == "sql":
+            sql = clean_sql(await translate_to_sql(question))
+        elif intent == "rag":
+            yield {"type": "meta", "query_type": "rag"}
+            async for event in stream_answer(question, prediction.embedding):
+                yield event
+            return
+        else:
+            yield {"type": "error", "query_type": "error", "message": "Could not determine the query intent."}
+            return
+    except Exception as e:
+        yield {"type": "error", "query_type": "error", "message": f"Internal server error: {str(e)}"}
+        return
+
+    if not sql:
+        yield {"type": "error", "query_type": "sql", "message": "Failed to generate SQL query."}
+        return
+
+    if not _is_read_query(sql):
+        result = await execute_sql_async(sql)
+        yield {"type": "result", "query_type": "sql", "sql_query": sql, "result": result}
+        return
+
+    yield {"type": "meta", "query_type": "sql", "sql_query": sql}
+    async for event in stream_sql(sql):
+        if event["type"] == "error":
+            await asyncio.to_thread(forget_translation, question)
+        yield event
@@ -0,0 +1,57 @@
+# app/core/pagination.py
+"""
+Opaque, signed page tokens for paginated SELECT results.
+
+A token carries the already-translated SQL and the offset of the next page,
+so fetching page two never calls the LLM again. Tokens are HMAC-signed so
+clients cannot smuggle arbitrary SQL through them.
+"""
+
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+from typing import Tuple
+
+from app.config import PAGE_TOKEN_SECRET
+
+# Without a configured secret, tokens are only valid within this process
+_SECRET = (PAGE_TOKEN_SECRET or secrets.token_hex(32)).encode("utf-8")
+
+
+def _sign(payload: bytes) -> str:
+    digest = hmac.new(_SECRET, payload, hashlib.sha256).digest()[:16]
+    return base64.urlsafe_b64encode(digest).decode("ascii").rstrip("=")
+
+
+def encode_page_token(sql: str, offset: int) -> str:
+    """
+    Builds a signed page token for the given SQL and row offset.
+    """
+    payload = json.dumps({"sql": sql, "offset": offset}, separators=(",", ":")).encode("utf-8")
+    body = base64.urlsafe_b64encode(payload).decode("ascii").rstrip("=")
+    return f"{body}.{_sign(payload)}"
+
+
+def decode_page_token(token: str) -> Tuple[str, int]:
+    """
+    Verifies and decodes a page token.
+
+    Returns:
+        tuple: (sql, offset)
+
+    Raises:
+        ValueError: If the token is malformed or its signature does not match.
+    """
+    try:
+        body, signature = token.split(".", 1)
+        payload = base64.urlsafe_b64decode(body + "=" * (-len(body) % 4))
+    except (ValueError, TypeError) as e:
+        raise ValueError("Malformed page token.") from e
+
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise ValueError("Invalid or expired page token.")
+
+    data = json.loads(payload)
+    return data["sql"], int(data["offset"])
@@ -0,0 +1,173 @@
+# app/core/result_cache.py
+"""
+In-process cache of SELECT results, keyed by normalized SQL text.
+
+Entries are tagged with the database's change stamp (SQLite's
+`PRAGMA data_version`, read by the engine): the first lookup after any
+committed write, from this process or another, drops every entry, so a
+cached result is never served after the data it was computed from changed.
+
+The LRU is bounded by an estimate of the bytes held by each result rather
+than by an entry count: one wide 10,000-row result can outweigh thousands of
+single-row aggregates.
+"""
+
+import re
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from app.config import SQL_RESULT_CACHE_MAX_BYTES, SQL_RESULT_CACHE_MAX_ENTRY_BYTES
+
+# Quoted literals/identifiers (group 1), comments (2), or runs of whitespace (3)
+SQL_TOKENS = re.compile(
+    r"""('(?:[^']|'')*'|"(?:[^"]|"")*"|`[^`]*`|\[[^\]]*\])|(--[^\n]*|/\*.*?\*/)|(\s+)""",
+    re.DOTALL,
+)
+
+# Functions whose value changes between identical executions
+_VOLATILE = re.compile(
+    r"\b(?:random|randomblob|changes|total_changes|last_insert_rowid)\s*\("
+    r"|\bcurrent_(?:date|time|timestamp)\b|'now'",
+    re.IGNORECASE,
+)
+
+
+def normalize_sql(sql: str) -> str:
+    """
+    Canonical form of a statement for cache keys: comments removed,
+    whitespace collapsed, keywords and identifiers lowercased, trailing
+    semicolons dropped. Quoted literals are kept verbatim.
+
+    Parameters:
+        sql (str): The SQL statement.
+
+    Returns:
+        str: The normalized statement.
+    """
+    parts = []
+    position = 0
+    for match in SQL_TOKENS.finditer(sql):
+        if match.start() > position:
+            parts.append(sql[position:match.start()].lower())
+        quoted = match.group(1)
+        if quoted is not None:
+            parts.append(quoted)
+        elif parts and parts[-1] != " ":
+            # Comments and whitespace runs collapse to a single space
+            parts.append(" ")
+        position = match.end()
+    parts.append(sql[position:].lower())
+    return "".join(parts).strip().rstrip("; ")
+
+
+def is_cacheable(sql: str) -> bool:
+    """
+    False for statements whose result depends on more than the data
+    (random(), the current time, the connection's last write).
+    """
+    return _VOLATILE.search(sql) is None
+
+
+def result_size(result: Dict[str, Any]) -> int:
+    """
+    Estimates the bytes held by a SELECT result (dict, row tuples and values).
+    """
+    size = sys.getsizeof(result) + sum(sys.getsizeof(c) for c in result.get("columns", ()))
+    size += sys.getsizeof(result.get("summary", ""))
+    rows = result.get("rows", ())
+    size += sys.getsizeof(rows)
+    for row in rows:
+        size += sys.getsizeof(row)
+        for value in row:
+            # Small ints and None are shared singletons, but count them anyway
+            size += sys.getsizeof(value)
+    return size
+
+
+class ResultCache:
+    """
+    Thread-safe, byte-bounded LRU of SELECT results tagged with a data version.
+    """
+
+    def __init__(self, max_bytes: int = SQL_RESULT_CACHE_MAX_BYTES,
+                 max_entry_bytes: int = SQL_RESULT_CACHE_MAX_ENTRY_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self.version: Optional[Hashable] = None
+        self.bytes = 0
+        self._entries: "OrderedDict[Hashable, Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0, "too_large": 0}
+
+    def set_version(self, version: Hashable):
+        """
+        Tags the cache with the database's data version, clearing it if the version changed.
+        """
+        with self._lock:
+            if version == self.version:
+                return
+            if self.version is not None and self._entries:
+                self._stats["invalidations"] += 1
+            self._entries.clear()
+            self.bytes = 0
+            self.version = version
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """
+        Returns a copy of the cached result (callers may add keys to it), or None.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+        result = entry[0]
+        return {**result, "rows": list(result["rows"])}
+
+    def put(self, key: Hashable, version: Hashable, result: Dict[str, Any]):
+        """
+        Stores a result computed at data `version`; results from a superseded
+        version, and results over the per-entry byte limit, are discarded.
+        """
+        size = result_size(result)
+        if size > self.max_entry_bytes:
+            with self._lock:
+                self._stats["too_large"] += 1
+            return
+        # Rows are stored as a tuple so later callers cannot mutate the cached copy
+        result = {**result, "rows": tuple(result["rows"])}
+        with self._lock:
+            if version != self.version:
+                return
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.bytes -= previous[1]
+            self._entries[key] = (result, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self.bytes -= evicted
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters, hit rate, entry count, bytes held and the data version.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self.bytes
+            stats["max_bytes"] = self.max_bytes
+            stats["data_version"] = self.version
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+        return stats
@@ -0,0 +1,69 @@
+# app/core/singleflight.py
+"""
+Single-flight coalescing of identical concurrent computations.
+
+The first caller for a key starts the computation as a task; callers arriving
+with the same key while it runs await that task instead of starting their
+own, and all of them receive its result (or its exception). The key is
+forgotten as soon as the task finishes, so later calls compute afresh (and
+hit the caches instead).
+
+The shared task is shielded from its callers: a client disconnecting cancels
+only its own wait, never the computation the other callers are waiting for.
+The computation's stages are timed in the first caller's request; the others
+time their wait as a "coalesced" stage, so their Server-Timing is not empty.
+"""
+
+import asyncio
+import copy
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+from app.core.metrics import COALESCED_REQUESTS, stage
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Per-event-loop registry of in-flight computations by key.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def do(self, key: Hashable, compute: Callable[[], Awaitable[T]]) -> T:
+        """
+        Returns the result of compute(), shared with every concurrent call
+        using the same key.
+
+        Parameters:
+            key (hashable): Identifies equivalent computations.
+            compute (callable): Coroutine function to run if none is in flight.
+
+        Returns:
+            The computation's result. Callers that joined an in-flight
+            computation get a shallow copy of a dict result, so one caller
+            adding keys does not leak into another's response.
+        """
+        task = self._tasks.get(key)
+        if task is not None:
+            COALESCED_REQUESTS.inc(flight=self.name)
+            with stage("coalesced"):
+                result = await asyncio.shield(task)
+            return copy.copy(result) if isinstance(result, dict) else result
+
+        task = asyncio.ensure_future(compute())
+        self._tasks[key] = task
+        task.add_done_callback(lambda _: self._forget(key, task))
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # Retrieve the exception so an unawaited failure is not logged as lost
+        if not task.cancelled():
+            task.exception()
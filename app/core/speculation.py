@@ -0,0 +1,76 @@
+# app/core/speculation.py
+"""
+Speculative execution helpers for the orchestrator.
+
+When the intent classifier is unsure, the SQL and RAG pipelines can run at
+the same time and the first valid answer wins (see race()). Every
+speculation costs an extra LLM call, so a SpeculationBudget caps how many
+may start per minute; past the budget, questions take the classifier's route
+as usual.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Awaitable, Callable, Dict, Optional, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class SpeculationBudget:
+    """
+    Token bucket allowing `per_minute` speculations per minute, with bursts
+    of up to `burst`.
+    """
+
+    def __init__(self, per_minute: float, burst: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst if burst is not None else max(per_minute, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """
+        Takes one speculation from the budget; False if it is exhausted.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+async def race(candidates: Dict[str, Awaitable[T]], is_valid: Callable[[T], bool],
+               preferred: str) -> Tuple[Optional[str], T]:
+    """
+    Runs the candidates concurrently and returns the first valid result,
+    cancelling the others.
+
+    Parameters:
+        candidates (dict): Name -> awaitable producing a result.
+        is_valid (callable): Whether a result may win.
+        preferred (str): Candidate whose result is returned if none is valid
+            (and which wins ties between results ready at the same time).
+
+    Returns:
+        tuple: The winner's name (None if no result was valid) and its result.
+    """
+    tasks = {name: asyncio.ensure_future(awaitable) for name, awaitable in candidates.items()}
+    names = {task: name for name, task in tasks.items()}
+    pending = set(tasks.values())
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            # The preferred candidate first among results that landed together
+            for task in sorted(done, key=lambda t: names[t] != preferred):
+                if task.exception() is None and is_valid(task.result()):
+                    return names[task], task.result()
+        fallback = tasks[preferred]
+        return None, fallback.result()
+    finally:
+        for task in pending:
+            task.cancel()
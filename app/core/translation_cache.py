@@ -0,0 +1,314 @@
+# app/core/translation_cache.py
+"""
+Two-tier cache in front of the NL->SQL translator.
+
+Tier one is an exact match on the normalized question. Tier two is a
+nearest-neighbour match on the MiniLM question embedding above a cosine
+similarity threshold, so rewordings such as "top 5 customers by spend" and
+"show top five customers by total spend" share one LLM translation. A
+semantic match must also have the same signature: literal values plus
+direction words, since "orders before 2020" and "orders after 2020" embed
+almost identically.
+
+Entries are scoped by a fingerprint of the schema structure, so a schema
+change never serves stale SQL. They are persisted in a local SQLite file and
+evicted by TTL and least-recent use.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from app.config import (
+    TRANSLATION_CACHE_MAX_ENTRIES,
+    TRANSLATION_CACHE_PATH,
+    TRANSLATION_CACHE_SIMILARITY,
+    TRANSLATION_CACHE_TTL_SECONDS,
+)
+from app.utils.text import fold_number_words, normalize_question
+
+logger = logging.getLogger(__name__)
+
+# Literals that change the meaning of a question without moving its embedding
+# much: numbers, quoted values and capitalized (non-initial) words like "USA".
+_LITERAL = re.compile(r"'[^']*'|\"[^\"]*\"|\b\d+(?:[.-]\d+)*\b|(?<=\s)[A-Z][\w-]*")
+
+# Comparison, ordering and negation words, folded to one token per direction,
+# so "top"/"highest" still match each other but never "lowest"
+_DIRECTIONS = {
+    "before": "<t", "earlier": "<t", "prior": "<t", "until": "<t",
+    "after": ">t", "later": ">t", "since": ">t",
+    "more": ">", "greater": ">", "above": ">", "over": ">", "exceeding": ">", "exceeds": ">", ">": ">",
+    "less": "<", "fewer": "<", "below": "<", "under": "<", "<": "<",
+    "most": "max", "top": "max", "highest": "max", "largest": "max", "biggest": "max",
+    "maximum": "max", "max": "max", "best": "max",
+    "least": "min", "bottom": "min", "lowest": "min", "smallest": "min", "cheapest": "min",
+    "minimum": "min", "min": "min", "worst": "min",
+    "first": "first", "earliest": "first", "oldest": "first",
+    "last": "last", "latest": "last", "newest": "last", "recent": "last",
+    "asc": "asc", "ascending": "asc", "desc": "desc", "descending": "desc",
+    "not": "not", "no": "not", "never": "not", "without": "not", "excluding": "not", "except": "not",
+}
+_WORD = re.compile(r"[<>]|\w+n't|\w+")
+# Bumped when the signature format changes: older rows then only match exactly
+_SIGNATURE_VERSION = "3"
+
+
+def _literals(question: str) -> str:
+    """
+    Returns the signature a semantic match must share: the sorted literal
+    values of a question (lowercased unless quoted) and its direction tokens.
+    """
+    matches = _LITERAL.findall(fold_number_words(question))
+    # Quoted values keep their case, as SQLite compares them
+    values = sorted(
+        match[1:-1] if match[0] in "'\"" else match.lower()
+        for match in matches
+    )
+    directions = sorted({
+        "not" if word.endswith("n't") else _DIRECTIONS[word]
+        for word in _WORD.findall(question.lower())
+        if word.endswith("n't") or word in _DIRECTIONS
+    })
+    return f"{_SIGNATURE_VERSION}|{' '.join(values)}|{' '.join(directions)}"
+
+
+class CacheLookup(NamedTuple):
+    sql: Optional[str]
+    tier: str  # "exact", "semantic" or "miss"
+    embedding: Optional[np.ndarray]
+
+
+class TranslationCache:
+    """
+    Thread-safe SQLite-backed translation cache with an in-memory
+    embedding matrix per schema fingerprint for nearest-neighbour lookups.
+    """
+
+    def __init__(
+        self,
+        path: str = TRANSLATION_CACHE_PATH,
+        max_entries: int = TRANSLATION_CACHE_MAX_ENTRIES,
+        ttl_seconds: float = TRANSLATION_CACHE_TTL_SECONDS,
+        similarity: float = TRANSLATION_CACHE_SIMILARITY,
+        embedder=None,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity = similarity
+        self._embedder = embedder
+        self._lock = threading.Lock()
+        self._stats = {"exact_hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0}
+
+        # schema_fp -> (questions, literal signatures, unit-norm embedding matrix)
+        self._vectors: Dict[str, Tuple[list, list, np.ndarray]] = {}
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                schema_fp TEXT NOT NULL,
+                question TEXT NOT NULL,
+                literals TEXT NOT NULL,
+                sql TEXT NOT NULL,
+                embedding BLOB,
+                created_at REAL NOT NULL,
+                last_used_at REAL NOT NULL,
+                PRIMARY KEY (schema_fp, question)
+            )
+        """)
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_translations_last_used ON translations (last_used_at)"
+        )
+        self._conn.commit()
+
+    def _embed(self, question: str) -> Optional[np.ndarray]:
+        """
+        Embeds a question with the shared MiniLM model; None if unavailable.
+        """
+        try:
+            if self._embedder is None:
+                from app.rag.embedder import get_embedder
+                self._embedder = get_embedder()
+            vector = np.asarray(self._embedder.embed_query(question), dtype=np.float32)
+            return vector / (np.linalg.norm(vector) or 1.0)
+        except Exception as e:
+            logger.warning("Semantic translation cache disabled for this lookup: %s", e)
+            return None
+
+    def _load_vectors(self, schema_fp: str) -> Tuple[list, list, np.ndarray]:
+        # Caller holds the lock
+        if schema_fp not in self._vectors:
+            rows = self._conn.execute(
+                "SELECT question, literals, embedding FROM translations "
+                "WHERE schema_fp = ? AND embedding IS NOT NULL",
+                (schema_fp,),
+            ).fetchall()
+            questions = [row[0] for row in rows]
+            literals = [row[1] for row in rows]
+            matrix = (
+                np.vstack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+                if rows else np.empty((0, 0), dtype=np.float32)
+            )
+            self._vectors[schema_fp] = (questions, literals, matrix)
+        return self._vectors[schema_fp]
+
+    def get(self, question: str, schema_fp: str) -> CacheLookup:
+        """
+        Looks up a cached translation, trying the exact tier then the semantic tier.
+
+        Parameters:
+            question (str): The raw user question.
+            schema_fp (str): Fingerprint of the current schema description.
+
+        Returns:
+            CacheLookup: The cached SQL (or None), the tier that answered, and the
+            question embedding when one was computed (reusable by put()).
+        """
+        normalized = normalize_question(question)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT sql, created_at FROM translations WHERE schema_fp = ? AND question = ?",
+                (schema_fp, normalized),
+            ).fetchone()
+            if row and now - row[1] <= self.ttl_seconds:
+                self._touch(schema_fp, normalized, now)
+                self._stats["exact_hits"] += 1
+                return CacheLookup(row[0], "exact", None)
+
+        # Embedding runs outside the lock; it is the slowest step
+        embedding = self._embed(normalized)
+        if embedding is None:
+            with self._lock:
+                self._stats["misses"] += 1
+            return CacheLookup(None, "miss", None)
+
+        with self._lock:
+            questions, literals, matrix = self._load_vectors(schema_fp)
+            if len(questions):
+                scores = matrix @ embedding
+                signature = _literals(question)
+                # Best-scoring neighbour whose signature (values, directions) matches exactly
+                for idx in np.argsort(-scores):
+                    if scores[idx] < self.similarity:
+                        break
+                    if literals[idx] != signature:
+                        continue
+                    row = self._conn.execute(
+                        "SELECT sql, created_at FROM translations WHERE schema_fp = ? AND question = ?",
+                        (schema_fp, questions[idx]),
+                    ).fetchone()
+                    if row and now - row[1] <= self.ttl_seconds:
+                        self._touch(schema_fp, questions[idx], now)
+                        self._stats["semantic_hits"] += 1
+                        return CacheLookup(row[0], "semantic", embedding)
+
+            self._stats["misses"] += 1
+            return CacheLookup(None, "miss", embedding)
+
+    def put(self, question: str, schema_fp: str, sql: str, embedding: Optional[np.ndarray] = None):
+        """
+        Stores a translation and evicts expired or least-recently-used entries.
+
+        Parameters:
+            question (str): The raw user question.
+            schema_fp (str): Fingerprint of the schema the SQL was generated for.
+            sql (str): The generated SQL.
+            embedding (np.ndarray, optional): Precomputed unit-norm question embedding.
+        """
+        normalized = normalize_question(question)
+        if embedding is None:
+            embedding = self._embed(normalized)
+        blob = embedding.astype(np.float32).tobytes() if embedding is not None else None
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations "
+                "(schema_fp, question, literals, sql, embedding, created_at, last_used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (schema_fp, normalized, _literals(question), sql, blob, now, now),
+            )
+            self._evict(now)
+            self._conn.commit()
+            # Rebuilt lazily on the next semantic lookup
+            self._vectors.pop(schema_fp, None)
+
+    def discard(self, question: str, schema_fp: str):
+        """
+        Removes a cached translation (e.g. when its SQL failed to execute).
+        """
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM translations WHERE schema_fp = ? AND question = ?",
+                (schema_fp, normalize_question(question)),
+            )
+            self._conn.commit()
+            self._vectors.pop(schema_fp, None)
+
+    def _touch(self, schema_fp: str, question: str, now: float):
+        # Caller holds the lock
+        self._conn.execute(
+            "UPDATE translations SET last_used_at = ? WHERE schema_fp = ? AND question = ?",
+            (now, schema_fp, question),
+        )
+        self._conn.commit()
+
+    def _evict(self, now: float):
+        # Caller holds the lock; drops expired rows, then the least recently used overflow
+        expired = self._conn.execute(
+            "DELETE FROM translations WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        overflow = self._conn.execute(
+            "DELETE FROM translations WHERE rowid IN ("
+            "  SELECT rowid FROM translations ORDER BY last_used_at DESC LIMIT -1 OFFSET ?"
+            ")",
+            (self.max_entries,),
+        ).rowcount
+        if expired or overflow:
+            self._stats["evictions"] += expired + overflow
+            self._vectors.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters, the hit rate and the number of stored entries.
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+            stats = dict(self._stats)
+        lookups = stats["exact_hits"] + stats["semantic_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 4) if lookups else 0.0
+        stats["entries"] = entries
+        return stats
+
+
+_cache: Optional[TranslationCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_translation_cache() -> TranslationCache:
+    """
+    Returns the process-wide translation cache, opening it on first use.
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TranslationCache()
+        return _cache
+
+
+def peek_translation_cache() -> Optional[TranslationCache]:
+    """
+    Returns the process-wide translation cache if it is open, without opening it.
+    """
+    return _cache
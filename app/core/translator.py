@@ -3,23 +3,22 @@
 This module translates natural language questions into SQL queries using an
 LLM (Groq's hosted version of LLaMA3). It constructs a prompt based on the
 current DB schema and calls the LLM API to generate a valid SQL query.
+
+Calls go through the shared async LLM client, so a slow completion no longer
+blocks the event loop for other requests. Translations are served from the
+two-tier translation cache when the same (or a reworded) question has already
+been translated against the current schema. For large databases the prompt
+only includes the tables relevant to the question.
 """
 
-import os
-from openai import OpenAI, OpenAIError
+import asyncio
+from app.config import SCHEMA_PRUNE_MIN_TABLES, TRANSLATION_CACHE_ENABLED
+from app.core.llm import LLMError, get_llm_client
+from app.core.metrics import stage
 from app.core.prompt import get_sql_prompt
-from app.db.schema import get_schema_description
-
-# Ensure the GROQ API key is set
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-if not GROQ_API_KEY:
-    raise EnvironmentError("GROQ_API_KEY not found in environment variables.")
-
-# Initialize the OpenAI client for Groq
-client = OpenAI(
-    api_key=GROQ_API_KEY,
-    base_url="https://api.groq.com/openai/v1"
-)
+from app.core.translation_cache import get_translation_cache
+from app.db.schema import get_schema_description, get_schema_fingerprint, get_schema_provider
+from app.db.schema_index import get_schema_index
 
 async def translate_to_sql(question: str) -> str:
     """
@@ -37,21 +36,59 @@ async def translate_to_sql(question: str) -> str:
     if not question or not question.strip():
         raise ValueError("Question is empty or invalid.")
 
-    # Retrieve database schema and generate prompt
-    schema = get_schema_description()
+    # Serve repeated or reworded questions from the cache (lookup may embed; run off-loop)
+    lookup = None
+    if TRANSLATION_CACHE_ENABLED:
+        # Re-introspects the schema after DDL: blocking, so off the event loop
+        fingerprint = await asyncio.to_thread(get_schema_fingerprint)
+        with stage("translation_cache"):
+            lookup = await asyncio.to_thread(get_translation_cache().get, question, fingerprint)
+        if lookup.sql:
+            return lookup.sql
+
+    # Retrieve database schema (only the relevant tables of a large one) and generate prompt
+    with stage("schema"):
+        embedding = lookup.embedding if lookup is not None else None
+        schema = await asyncio.to_thread(_describe_schema, question, embedding)
+
     prompt = get_sql_prompt(schema, question)
 
     try:
-        # Send the prompt to Groq LLM via OpenAI-compatible API
-        response = client.chat.completions.create(
-            model="llama3-70b-8192",  # Groq-hosted LLaMA3 model
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0,
+        # Send the prompt to the Groq-hosted LLaMA3 model via the shared client
+        with stage("llm_translate"):
+            sql = await get_llm_client().complete(prompt, temperature=0)
+
+    except LLMError as e:
+        # Catch any issues with the LLM client or API response
+        raise RuntimeError(f"Failed to translate to SQL: {str(e)}") from e
+
+    if lookup is not None and sql:
+        await asyncio.to_thread(
+            get_translation_cache().put, question, fingerprint, sql, lookup.embedding
         )
+    return sql
 
-        # Extract and return the SQL from the response
-        return response.choices[0].message.content.strip()
 
-    except OpenAIError as e:
-        # Catch any issues with the OpenAI client or API response
-        raise RuntimeError(f"Failed to translate to SQL: {str(e)}") from e
+def _describe_schema(question: str, embedding=None) -> str:
+    """
+    Returns the schema for the prompt: only the tables relevant to the
+    question on a large database, the whole description otherwise. Blocking
+    (introspection, embedding): callers run it in a thread.
+    """
+    if len(get_schema_provider().get_tables()) > SCHEMA_PRUNE_MIN_TABLES:
+        return get_schema_index().describe(question, embedding)
+    return get_schema_description()
+
+
+def forget_translation(question: str):
+    """
+    Drops a cached translation for the question, e.g. after its SQL failed to run,
+    so the next request asks the LLM again. Blocking: async callers run it in
+    a thread.
+
+    Parameters:
+        question (str): The user's natural language question.
+    """
+    if TRANSLATION_CACHE_ENABLED:
+        fingerprint = get_schema_fingerprint()
+        get_translation_cache().discard(question, fingerprint)
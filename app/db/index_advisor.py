@@ -0,0 +1,285 @@
+# app/db/index_advisor.py
+"""
+Workload-driven index advisor.
+
+For every query family in the workload log (see app/db/workload.py):
+1. Candidate indexes are derived from the statement: equality columns
+   (filters and join keys) first, then one range or ordering column, and a
+   covering variant that appends the table's other referenced columns.
+2. The candidates are created in an in-memory copy of the schema carrying the
+   real row counts in sqlite_stat1, and SQLite's own planner decides which of
+   them it would use (EXPLAIN QUERY PLAN), as the sqlite3 shell's `.expert`
+   command does.
+3. The plan before and after is costed with the cost guard's nested-loop
+   estimate, giving a projected speedup per family.
+
+Indexes used by at least one family are recommended, ranked by the estimated
+rows saved across the workload (calls x cost reduction), and can be created
+with create_indexes().
+"""
+
+import re
+import sqlite3
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from app.config import DB_PATH
+from app.core.cost_guard import estimate_cost, table_aliases
+from app.core.result_cache import normalize_sql
+from app.db.schema import SchemaProvider, _quote
+from app.db.workload import WorkloadFamily
+
+# Covering variants are only proposed up to this many columns
+MAX_INDEX_COLUMNS = 6
+
+_COLUMN = r"(?:(\w+)\.)?(\w+)"
+# "col = ...", "col in (...)", "col is ..."
+_EQUALITY = re.compile(rf"{_COLUMN}\s*(?:==?|\bin\b|\bis\b(?! not))")
+# "... = col": the other side of a join condition
+_EQUALITY_RHS = re.compile(rf"(?<![<>!])=\s*{_COLUMN}\b(?!\s*\()")
+_RANGE = re.compile(rf"{_COLUMN}\s*(?:<=|>=|<(?!>)|>|\bbetween\b|\blike\b)")
+_ORDERING = re.compile(r"\b(?:order|group) by ((?:[\w.]+(?: asc| desc)?(?:, ?)?)+)")
+_USED_INDEX = re.compile(r"USING (?:COVERING )?INDEX (\S+)")
+
+
+class IndexCandidate(NamedTuple):
+    table: str
+    columns: Tuple[str, ...]
+
+    @property
+    def name(self) -> str:
+        return f"idx_{self.table}_{'_'.join(self.columns)}"
+
+    @property
+    def ddl(self) -> str:
+        columns = ", ".join(_quote(column) for column in self.columns)
+        return f"CREATE INDEX IF NOT EXISTS {_quote(self.name)} ON {_quote(self.table)} ({columns})"
+
+
+class FamilyAdvice(NamedTuple):
+    family: WorkloadFamily
+    cost_before: int
+    cost_after: int
+    plan_before: List[str]
+    plan_after: List[str]
+    indexes: List[str]
+
+    @property
+    def projected_speedup(self) -> float:
+        return self.cost_before / max(self.cost_after, 1)
+
+
+class Recommendation(NamedTuple):
+    index: IndexCandidate
+    families: List[str]
+    # Estimated rows saved across the logged workload (calls x cost reduction)
+    benefit: int
+
+
+def _referenced_columns(normalized: str, aliases: Dict[str, str],
+                        columns: Dict[str, List[str]], pattern: re.Pattern) -> List[Tuple[str, str]]:
+    """
+    Resolves the (table, column) pairs matched by `pattern` in a statement.
+    """
+    found = []
+    for qualifier, column in pattern.findall(normalized):
+        if qualifier:
+            tables = [aliases[qualifier]] if qualifier in aliases else []
+        else:
+            tables = [t for t in set(aliases.values()) if column in columns.get(t, ())]
+        for table in tables:
+            if column in columns.get(table, ()) and (table, column) not in found:
+                found.append((table, column))
+    return found
+
+
+def candidate_indexes(sql: str, columns: Dict[str, List[str]],
+                      rowid_columns: Optional[Dict[str, str]] = None) -> List[IndexCandidate]:
+    """
+    Derives candidate indexes for a statement from its filters, joins and ordering.
+
+    Parameters:
+        sql (str): The SELECT statement.
+        columns (dict): Lowercase table name -> lowercase column names.
+        rowid_columns (dict, optional): Table -> its INTEGER PRIMARY KEY column,
+            which every index already carries.
+
+    Returns:
+        list[IndexCandidate]: Key-only and covering candidates per table.
+    """
+    normalized = normalize_sql(sql)
+    aliases = table_aliases(normalized, columns)
+    equality = _referenced_columns(normalized, aliases, columns, _EQUALITY)
+    equality += [
+        pair for pair in _referenced_columns(normalized, aliases, columns, _EQUALITY_RHS)
+        if pair not in equality
+    ]
+    ranges = _referenced_columns(normalized, aliases, columns, _RANGE)
+    ordering = []
+    for clause in _ORDERING.findall(normalized):
+        terms = re.sub(r" (?:asc|desc)\b", "", clause)
+        ordering += _referenced_columns(terms, aliases, columns, re.compile(_COLUMN))
+    select_all = re.search(r"\bselect (?:distinct )?(?:\w+\.)?\*", normalized) is not None
+
+    candidates = []
+    for table in dict.fromkeys(aliases.values()):
+        key = [c for t, c in equality if t == table]
+        trailing = [c for t, c in ranges if t == table and c not in key][:1]
+        if not trailing:
+            trailing = [c for t, c in ordering if t == table and c not in key]
+        key += trailing
+        if not key:
+            continue
+        candidates.append(IndexCandidate(table, tuple(key)))
+
+        # Every column of this table the statement touches, for an index-only plan
+        rowid = (rowid_columns or {}).get(table)
+        referenced = [
+            column for column in columns[table]
+            if re.search(rf"\b{re.escape(column)}\b", normalized) and column not in key and column != rowid
+        ]
+        if referenced and not select_all and len(key) + len(referenced) <= MAX_INDEX_COLUMNS:
+            candidates.append(IndexCandidate(table, tuple(key + referenced)))
+    return candidates
+
+
+def _scratch_copy(conn: sqlite3.Connection, row_counts: Dict[str, int]) -> sqlite3.Connection:
+    """
+    Returns an in-memory database with the same schema, no rows, and
+    sqlite_stat1 row counts matching the real tables, so the planner
+    reasons about the real table sizes.
+    """
+    scratch = sqlite3.connect(":memory:")
+    for (ddl,) in conn.execute(
+        "SELECT sql FROM sqlite_master WHERE sql IS NOT NULL AND name NOT LIKE 'sqlite_%' "
+        "ORDER BY type = 'table' DESC"
+    ):
+        scratch.execute(ddl)
+    scratch.execute("ANALYZE")
+    scratch.execute("DELETE FROM sqlite_stat1")
+    try:
+        real_stats = conn.execute("SELECT tbl, idx, stat FROM sqlite_stat1").fetchall()
+    except sqlite3.OperationalError:
+        real_stats = []
+    scratch.executemany("INSERT INTO sqlite_stat1 VALUES (?, ?, ?)", real_stats)
+    analyzed = {tbl.lower() for tbl, _, _ in real_stats}
+    scratch.executemany(
+        "INSERT INTO sqlite_stat1 VALUES (?, NULL, ?)",
+        [(table, str(max(rows, 1))) for table, rows in row_counts.items() if table not in analyzed],
+    )
+    scratch.commit()
+    # Reloads the statistics into the planner
+    scratch.execute("ANALYZE sqlite_master")
+    return scratch
+
+
+def _existing_indexes(tables: List[Dict]) -> Dict[str, List[Tuple[str, ...]]]:
+    return {
+        table["name"].lower(): [tuple(c.lower() for c in index["columns"]) for index in table["indexes"]]
+        for table in tables
+    }
+
+
+def _is_covered(candidate: IndexCandidate, existing: Dict[str, List[Tuple[str, ...]]]) -> bool:
+    return any(index[:len(candidate.columns)] == candidate.columns for index in existing.get(candidate.table, ()))
+
+
+def advise(families: Sequence[WorkloadFamily], db_path: str = DB_PATH
+           ) -> Tuple[List[FamilyAdvice], List[Recommendation]]:
+    """
+    Recommends indexes for a logged workload.
+
+    Parameters:
+        families (list[WorkloadFamily]): Query families from the workload log.
+        db_path (str): The database the workload ran against.
+
+    Returns:
+        tuple: Per-family advice (plans, estimated costs, projected speedup)
+        and the recommended indexes, most beneficial first.
+    """
+    tables = SchemaProvider(db_path).get_tables()
+    columns = {t["name"].lower(): [c["name"].lower() for c in t["columns"]] for t in tables}
+    row_counts = {t["name"].lower(): t["row_count"] for t in tables}
+    existing = _existing_indexes(tables)
+    rowid_columns = {}
+    for table in tables:
+        keys = [c for c in table["columns"] if c["pk"]]
+        if len(keys) == 1 and keys[0]["type"].upper() == "INTEGER":
+            rowid_columns[table["name"].lower()] = keys[0]["name"].lower()
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    scratch = None
+    try:
+        scratch = _scratch_copy(conn, row_counts)
+        before: Dict[str, object] = {}
+        candidates: Dict[str, IndexCandidate] = {}
+        for family in families:
+            try:
+                before[family.family] = estimate_cost(conn, family.example, row_counts)
+            except sqlite3.Error:
+                # No longer valid against the current schema
+                continue
+            for candidate in candidate_indexes(family.example, columns, rowid_columns):
+                if not _is_covered(candidate, existing):
+                    candidates.setdefault(candidate.name, candidate)
+
+        for candidate in candidates.values():
+            scratch.execute(candidate.ddl)
+        advice = []
+        for family in families:
+            if family.family not in before:
+                continue
+            estimate = before[family.family]
+            after = estimate_cost(scratch, family.example, row_counts)
+            used = [
+                name for line in after.plan for name in _USED_INDEX.findall(line)
+                if name in candidates
+            ]
+            if not used or after.cost >= estimate.cost:
+                after, used = estimate, []
+            advice.append(FamilyAdvice(
+                family, estimate.cost, after.cost, estimate.plan, after.plan, used,
+            ))
+    finally:
+        if scratch is not None:
+            scratch.close()
+        conn.close()
+
+    recommendations: Dict[str, Recommendation] = {}
+    for item in advice:
+        saved = item.family.calls * (item.cost_before - item.cost_after)
+        for name in item.indexes:
+            previous = recommendations.get(name)
+            recommendations[name] = Recommendation(
+                candidates[name],
+                (previous.families if previous else []) + [item.family.family],
+                (previous.benefit if previous else 0) + saved,
+            )
+    ranked = sorted(recommendations.values(), key=lambda r: r.benefit, reverse=True)
+    return advice, ranked
+
+
+def create_indexes(candidates: Sequence[IndexCandidate], db_path: str = DB_PATH,
+                   analysis_limit: Optional[int] = 1000) -> List[str]:
+    """
+    Creates indexes, then refreshes the planner statistics with ANALYZE.
+
+    Parameters:
+        candidates (list[IndexCandidate]): Indexes to create.
+        db_path (str): The database to create them in.
+        analysis_limit (int, optional): Rows sampled per index by ANALYZE
+            (None analyzes every row).
+
+    Returns:
+        list[str]: The names of the indexes created.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        for candidate in candidates:
+            conn.execute(candidate.ddl)
+        if analysis_limit is not None:
+            conn.execute(f"PRAGMA analysis_limit = {int(analysis_limit)}")
+        conn.execute("ANALYZE")
+        conn.commit()
+    finally:
+        conn.close()
+    return [candidate.name for candidate in candidates]
@@ -1,20 +1,265 @@
 # app/db/schema.py
 """
-    Return a string describing your database schema,
-    e.g., tables, columns, types, relationships...
-    This is used by your SQL translation prompt."""
+Describes the live database schema for the SQL translation prompt.
 
-def get_schema_description() -> str:
-    return """
-Table: customers
-- id (integer)
-- name (text)
-- country (text)
-- signup_date (date)
-
-Table: orders
-- id (integer)
-- customer_id (integer)
-- total_amount (float)
-- order_date (date)
+The schema is introspected from sqlite_master and PRAGMA table_info /
+foreign_key_list / index_list, rendered as a compact description with
+row-count estimates and sample values, and cached until PRAGMA schema_version
+changes. On the hot path a lookup costs two PRAGMAs, and the prompt always
+matches the real database.
+
+Row counts also feed the cost guard, so they follow the data: when PRAGMA
+data_version moves (another connection committed), they are re-estimated
+from sqlite_stat1 and MAX(rowid) without re-introspecting the schema. The
+rendered description keeps the counts from its last introspection.
 """
+
+import hashlib
+import json
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+from app.config import DB_PATH
+
+# Sample values are taken from the first rows only, so introspection stays cheap
+SAMPLE_SCAN_ROWS = 1000
+SAMPLE_VALUES = 3
+SAMPLE_MAX_CHARS = 40
+
+# Declared types whose sample values help the LLM (names, codes, dates)
+_SAMPLED_TYPES = ("CHAR", "TEXT", "CLOB", "DATE", "TIME")
+
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+class SchemaProvider:
+    """
+    Introspects a SQLite database and caches the result per schema_version.
+    """
+
+    def __init__(self, db_path: str = DB_PATH):
+        self.db_path = db_path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._data_version: Optional[int] = None
+        self._tables: List[Dict] = []
+        self._description = ""
+        self._fingerprint = ""
+
+    def _connection(self) -> sqlite3.Connection:
+        # Caller holds the lock
+        if self._conn is None:
+            self._conn = sqlite3.connect(
+                f"file:{self.db_path}?mode=ro", uri=True, check_same_thread=False
+            )
+            self._conn.execute("PRAGMA query_only = ON")
+        return self._conn
+
+    def _refresh(self):
+        """
+        Re-introspects the schema if PRAGMA schema_version moved, or only the
+        row counts if PRAGMA data_version did (caller holds the lock).
+        """
+        conn = self._connection()
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._version:
+            if data_version != self._data_version:
+                counts = self._row_counts(conn, [table["name"] for table in self._tables])
+                self._tables = [table | {"row_count": counts[table["name"]]} for table in self._tables]
+                self._data_version = data_version
+            return
+
+        self._tables = self._introspect(conn)
+        self._description = render_schema(self._tables)
+        # Fingerprint covers what the SQL depends on: not indexes, row counts or samples
+        structure = [
+            {key: table[key] for key in ("name", "foreign_keys")}
+            | {"columns": [(c["name"], c["type"], c["pk"]) for c in table["columns"]]}
+            for table in self._tables
+        ]
+        self._fingerprint = hashlib.sha256(
+            json.dumps(structure, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+        self._version = version
+        self._data_version = data_version
+
+    def _introspect(self, conn: sqlite3.Connection) -> List[Dict]:
+        names = [
+            row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' "
+                "AND name NOT LIKE 'sqlite_%' ORDER BY name"
+            )
+        ]
+        counts = self._row_counts(conn, names)
+
+        tables = []
+        for name in names:
+            quoted = _quote(name)
+            columns = [
+                {"name": row[1], "type": row[2] or "", "notnull": bool(row[3]), "pk": bool(row[5])}
+                for row in conn.execute(f"PRAGMA table_info({quoted})")
+            ]
+            foreign_keys = [
+                {"column": row[3], "ref_table": row[2], "ref_column": row[4]}
+                for row in conn.execute(f"PRAGMA foreign_key_list({quoted})")
+            ]
+            indexes = []
+            for row in conn.execute(f"PRAGMA index_list({quoted})"):
+                index_columns = [
+                    info[2] for info in conn.execute(f"PRAGMA index_info({_quote(row[1])})")
+                ]
+                indexes.append({"name": row[1], "unique": bool(row[2]), "columns": index_columns})
+
+            tables.append({
+                "name": name,
+                "columns": columns,
+                "foreign_keys": foreign_keys,
+                "indexes": indexes,
+                "row_count": counts[name],
+            })
+
+            for column in columns:
+                column["samples"] = self._samples(conn, quoted, column)
+
+        return tables
+
+    @classmethod
+    def _row_counts(cls, conn: sqlite3.Connection, names: List[str]) -> Dict[str, int]:
+        """
+        Row-count estimates per table: the larger of the ANALYZE statistics
+        (stale after inserts) and MAX(rowid) (high after deletes), so the cost
+        guard never sees a grown table as small.
+        """
+        stats = cls._stat1_row_counts(conn)
+        counts = {}
+        for name in names:
+            quoted = _quote(name)
+            try:
+                estimate = conn.execute(f"SELECT MAX(rowid) FROM {quoted}").fetchone()[0] or 0
+            except sqlite3.OperationalError:
+                # WITHOUT ROWID table: COUNT(*) scans it, so only without statistics
+                estimate = stats[name] if name in stats else conn.execute(
+                    f"SELECT COUNT(*) FROM {quoted}"
+                ).fetchone()[0]
+            counts[name] = max(estimate, stats.get(name, 0))
+        return counts
+
+    @staticmethod
+    def _stat1_row_counts(conn: sqlite3.Connection) -> Dict[str, int]:
+        """
+        Row counts gathered by ANALYZE, when sqlite_stat1 exists.
+        """
+        try:
+            rows = conn.execute("SELECT tbl, stat FROM sqlite_stat1").fetchall()
+        except sqlite3.OperationalError:
+            return {}
+        return {tbl: int(stat.split()[0]) for tbl, stat in rows if stat}
+
+    @staticmethod
+    def _samples(conn: sqlite3.Connection, quoted_table: str, column: Dict) -> List[str]:
+        if column["pk"] or not any(t in column["type"].upper() for t in _SAMPLED_TYPES):
+            return []
+        col = _quote(column["name"])
+        rows = conn.execute(
+            f"SELECT DISTINCT {col} FROM (SELECT {col} FROM {quoted_table} LIMIT {SAMPLE_SCAN_ROWS}) "
+            f"WHERE {col} IS NOT NULL LIMIT {SAMPLE_VALUES}"
+        ).fetchall()
+        return [str(row[0])[:SAMPLE_MAX_CHARS] for row in rows]
+
+    def get_tables(self) -> List[Dict]:
+        """
+        Returns the introspected tables (name, columns, foreign_keys, indexes, row_count).
+        """
+        with self._lock:
+            self._refresh()
+            return self._tables
+
+    def get_description(self) -> str:
+        """
+        Returns the rendered schema description for the current schema_version.
+        """
+        with self._lock:
+            self._refresh()
+            return self._description
+
+    def get_fingerprint(self) -> str:
+        """
+        Returns a short hash of the schema structure (tables, columns, keys).
+        """
+        with self._lock:
+            self._refresh()
+            return self._fingerprint
+
+
+def render_schema(tables: List[Dict]) -> str:
+    """
+    Renders introspected tables as a compact, LLM-friendly description.
+
+    Parameters:
+        tables (list): Table dicts as returned by SchemaProvider.get_tables().
+
+    Returns:
+        str: The schema description.
+    """
+    lines = []
+    for table in tables:
+        fk_by_column = {fk["column"]: fk for fk in table["foreign_keys"]}
+        lines.append(f"Table: {table['name']} (~{table['row_count']} rows)")
+        for column in table["columns"]:
+            line = f"- {column['name']} ({column['type'].lower() or 'any'}"
+            if column["pk"]:
+                line += ", primary key"
+            line += ")"
+            fk = fk_by_column.get(column["name"])
+            if fk:
+                line += f" -> {fk['ref_table']}.{fk['ref_column'] or 'rowid'}"
+            if column.get("samples"):
+                line += " e.g. " + ", ".join(repr(value) for value in column["samples"])
+            lines.append(line)
+        for index in table["indexes"]:
+            if not index["name"].startswith("sqlite_autoindex"):
+                kind = "unique index" if index["unique"] else "index"
+                lines.append(f"- {kind} {index['name']} ({', '.join(index['columns'])})")
+        lines.append("")
+    return "\n".join(lines)
+
+
+_provider: Optional[SchemaProvider] = None
+_provider_lock = threading.Lock()
+
+
+def get_schema_provider() -> SchemaProvider:
+    """
+    Returns the process-wide schema provider for DB_PATH.
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = SchemaProvider()
+        return _provider
+
+
+def get_schema_description() -> str:
+    """
+    Return a string describing the database schema (tables, columns, types,
+    relationships, row estimates and sample values) for the SQL translation prompt.
+    """
+    try:
+        return get_schema_provider().get_description()
+    except sqlite3.Error as e:
+        raise RuntimeError(f"Failed to introspect database schema: {e}") from e
+
+
+def get_schema_fingerprint() -> str:
+    """
+    Return a short hash identifying the current schema structure.
+    """
+    try:
+        return get_schema_provider().get_fingerprint()
+    except sqlite3.Error as e:
+        raise RuntimeError(f"Failed to introspect database schema: {e}") from e
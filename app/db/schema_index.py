@@ -0,0 +1,157 @@
+# app/db/schema_index.py
+"""
+Relevance-pruned schema retrieval for large databases.
+
+Every table and every column is embedded once (per schema structure) with the
+shared MiniLM model. For each question only the top-k most relevant tables,
+plus their foreign-key neighbours, are rendered into the SQL prompt, so prompt
+size and translation latency stop growing with the number of tables.
+"""
+
+import re
+import threading
+from typing import Dict, List, Optional, Set
+
+import numpy as np
+
+from app.config import SCHEMA_TOP_K
+from app.db.schema import SchemaProvider, get_schema_provider, render_schema
+
+
+def _table_document(table: Dict) -> str:
+    columns = ", ".join(column["name"] for column in table["columns"])
+    return f"table {table['name']}: {columns}"
+
+
+def _column_document(table: Dict, column: Dict) -> str:
+    text = f"{table['name']}.{column['name']} {column['type'].lower()}"
+    if column.get("samples"):
+        text += " e.g. " + ", ".join(column["samples"])
+    return text
+
+
+def _words(text: str) -> Set[str]:
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+class SchemaIndex:
+    """
+    Embedding index over table and column descriptions of one database.
+    """
+
+    def __init__(self, provider: Optional[SchemaProvider] = None, embedder=None,
+                 top_k: int = SCHEMA_TOP_K):
+        self.provider = provider or get_schema_provider()
+        self.top_k = top_k
+        self._embedder = embedder
+        self._lock = threading.Lock()
+        self._fingerprint: Optional[str] = None
+        self._table_names: List[str] = []
+        self._owners = np.empty(0, dtype=np.int64)  # document row -> table position
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+
+    def _get_embedder(self):
+        if self._embedder is None:
+            from app.rag.embedder import get_embedder
+            self._embedder = get_embedder()
+        return self._embedder
+
+    def _refresh(self, tables: List[Dict]):
+        """
+        Re-embeds the schema documents when the schema structure changed.
+        """
+        fingerprint = self.provider.get_fingerprint()
+        with self._lock:
+            if fingerprint == self._fingerprint:
+                return
+
+            documents, owners = [], []
+            for position, table in enumerate(tables):
+                documents.append(_table_document(table))
+                owners.append(position)
+                for column in table["columns"]:
+                    documents.append(_column_document(table, column))
+                    owners.append(position)
+
+            # One batched forward pass for the whole schema
+            vectors = np.asarray(self._get_embedder().embed_documents(documents), dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+
+            self._table_names = [table["name"] for table in tables]
+            self._owners = np.asarray(owners, dtype=np.int64)
+            self._matrix = vectors / norms
+            self._fingerprint = fingerprint
+
+    def select_tables(self, question: str, k: Optional[int] = None,
+                      embedding: Optional[np.ndarray] = None) -> List[str]:
+        """
+        Returns the names of the tables relevant to a question: the top-k by
+        embedding similarity, any table named in the question, and their
+        foreign-key neighbours.
+
+        Parameters:
+            question (str): The user's natural language question.
+            k (int, optional): Number of tables to retrieve before FK expansion.
+            embedding (np.ndarray, optional): Precomputed question embedding.
+
+        Returns:
+            list[str]: Table names in schema order.
+        """
+        tables = self.provider.get_tables()
+        self._refresh(tables)
+        k = k or self.top_k
+
+        if embedding is None:
+            embedding = np.asarray(self._get_embedder().embed_query(question), dtype=np.float32)
+        embedding = embedding / (np.linalg.norm(embedding) or 1.0)
+
+        with self._lock:
+            names, owners, matrix = self._table_names, self._owners, self._matrix
+
+        # A table scores as its best-matching table or column document
+        table_scores = np.full(len(names), -np.inf, dtype=np.float32)
+        np.maximum.at(table_scores, owners, matrix @ embedding)
+        ranking = [names[i] for i in np.argsort(-table_scores)]
+        selected = set(ranking[:k])
+
+        # Tables mentioned verbatim are always relevant
+        question_words = _words(question)
+        selected |= {name for name in names if _words(name) <= question_words}
+
+        # Add foreign-key neighbours so joins stay expressible: every table a
+        # selected table references, and referencing tables that rank in the
+        # top 2k (a hub table such as customers can have hundreds of children)
+        runners_up = set(ranking[:2 * k])
+        neighbours = set()
+        for table in tables:
+            refs = {fk["ref_table"] for fk in table["foreign_keys"]}
+            if table["name"] in selected:
+                neighbours |= refs
+            elif refs & selected and table["name"] in runners_up:
+                neighbours.add(table["name"])
+        selected |= neighbours & set(names)
+
+        return [name for name in names if name in selected]
+
+    def describe(self, question: str, embedding: Optional[np.ndarray] = None) -> str:
+        """
+        Renders the schema description restricted to the tables relevant to a question.
+        """
+        selected = set(self.select_tables(question, embedding=embedding))
+        return render_schema([t for t in self.provider.get_tables() if t["name"] in selected])
+
+
+_index: Optional[SchemaIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_schema_index() -> SchemaIndex:
+    """
+    Returns the process-wide schema index over the default schema provider.
+    """
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SchemaIndex()
+        return _index
@@ -0,0 +1,156 @@
+# app/db/workload.py
+"""
+Log of the SELECT workload run by the executor, for the index advisor.
+
+Statements are grouped into families: the normalized SQL with literals
+replaced by placeholders, so "... WHERE country = 'USA'" and "... WHERE
+country = 'India'" are one family. Each family keeps its call count, total
+and worst execution time, and its latest statement as a replayable example.
+
+Timings are aggregated in memory and upserted into a small SQLite file every
+SQL_WORKLOAD_FLUSH_SECONDS, so logging costs a dict update per query.
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Dict, List, NamedTuple, Optional
+
+from app.config import SQL_WORKLOAD_FLUSH_SECONDS, SQL_WORKLOAD_LOG_PATH
+from app.core.result_cache import normalize_sql
+
+logger = logging.getLogger(__name__)
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b")
+_IN_LIST = re.compile(r"\bin \((?:\?(?:, ?)?)+\)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS families (
+    family TEXT PRIMARY KEY,
+    example TEXT NOT NULL,
+    calls INTEGER NOT NULL,
+    total_ms REAL NOT NULL,
+    max_ms REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+"""
+
+
+def query_family(sql: str) -> str:
+    """
+    Returns the statement with comments, case and literals normalized away.
+
+    Parameters:
+        sql (str): The SQL statement.
+
+    Returns:
+        str: The family fingerprint, e.g. "select * from customers where country = ?".
+    """
+    family = _STRING.sub("?", normalize_sql(sql))
+    family = _NUMBER.sub("?", family)
+    return _IN_LIST.sub("in (?)", family)
+
+
+class WorkloadFamily(NamedTuple):
+    family: str
+    example: str
+    calls: int
+    total_ms: float
+    max_ms: float
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+class WorkloadLog:
+    """
+    Thread-safe, periodically flushed log of executed SELECT families.
+    """
+
+    def __init__(self, path: str = SQL_WORKLOAD_LOG_PATH,
+                 flush_seconds: float = SQL_WORKLOAD_FLUSH_SECONDS):
+        self.path = path
+        self.flush_seconds = flush_seconds
+        self._pending: Dict[str, list] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flushed_at = time.monotonic()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        # Caller holds the flush lock
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def record(self, sql: str, elapsed_ms: float):
+        """
+        Adds one execution of a statement; flushes if the interval has passed.
+        """
+        family = query_family(sql)
+        with self._lock:
+            entry = self._pending.get(family)
+            if entry is None:
+                self._pending[family] = [sql, 1, elapsed_ms, elapsed_ms]
+            else:
+                entry[0] = sql
+                entry[1] += 1
+                entry[2] += elapsed_ms
+                entry[3] = max(entry[3], elapsed_ms)
+            due = time.monotonic() - self._flushed_at >= self.flush_seconds
+        if due:
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                # Never fail the query being logged
+                logger.warning("Workload log flush failed: %s", e)
+
+    def flush(self):
+        """
+        Upserts the aggregated timings into the log file.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._flushed_at = time.monotonic()
+        if not pending:
+            return
+        now = time.time()
+        with self._flush_lock:
+            conn = self._connection()
+            conn.executemany(
+                "INSERT INTO families (family, example, calls, total_ms, max_ms, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(family) DO UPDATE SET "
+                "example = excluded.example, calls = calls + excluded.calls, "
+                "total_ms = total_ms + excluded.total_ms, "
+                "max_ms = MAX(max_ms, excluded.max_ms), last_seen = excluded.last_seen",
+                [(family, *entry, now) for family, entry in pending.items()],
+            )
+            conn.commit()
+
+    def families(self, min_calls: int = 1) -> List[WorkloadFamily]:
+        """
+        Returns the logged families, by total time spent, heaviest first.
+        """
+        self.flush()
+        with self._flush_lock:
+            rows = self._connection().execute(
+                "SELECT family, example, calls, total_ms, max_ms FROM families "
+                "WHERE calls >= ? ORDER BY total_ms DESC",
+                (min_calls,),
+            ).fetchall()
+        return [WorkloadFamily(*row) for row in rows]
+
+    def close(self):
+        self.flush()
+        with self._flush_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,24 +1,56 @@
 # app/main.py
 """
 Main FastAPI application entry point for the Natural Language Query System (NLQS).
-Loads environment variables and registers API routes.
+Loads environment variables, registers API routes and warms the shared
+RAG runtime in the background during the application lifespan. Heavy
+dependencies (OpenAI SDK, LangChain, FAISS) load on first use or during that
+warm-up, not at import, so workers start serving quickly. Every response
+carries a Server-Timing header, and Prometheus metrics are served on /metrics.
 """
 
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv, find_dotenv
 import logging
-from app.routes import query
-# Adjusted import to match your router location
 
-# Attempt to load environment variables from a .env file
+# Attempt to load environment variables from a .env file, before app.config
+# reads them at import
 dotenv_path = find_dotenv()
 if dotenv_path:
     load_dotenv(dotenv_path)
 else:
     logging.warning(".env file not found. Environment variables may be missing.")
 
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+from app.routes import metrics, query
+from app.core.executor import close_engine
+from app.core.llm import close_llm_clients
+from app.core.metrics import ServerTimingMiddleware
+from app.rag.qa import get_rag_runtime
+# Adjusted import to match your router location
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Builds the RAG runtime (embedder, FAISS index, LLM client, prompt) once per
+    process. Loading runs in a worker thread so the server accepts requests
+    (and reports "warming" on /health) while the model loads.
+    """
+    async def warm_up():
+        try:
+            await asyncio.to_thread(get_rag_runtime().load)
+        except Exception as e:
+            logging.error(f"RAG warm-up failed; documents will be retried on demand: {e}")
+
+    app.state.rag_warmup = asyncio.create_task(warm_up())
+    yield
+
+    # Release pooled LLM and database connections on shutdown
+    await close_llm_clients()
+    await asyncio.to_thread(close_engine)
 
- 
 
 app = FastAPI(
     title="Natural Language Query System (NLQS)",
@@ -27,15 +59,28 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
+    lifespan=lifespan,
 )
 
+# Per-stage latency breakdown on every response, plus request metrics
+app.add_middleware(ServerTimingMiddleware)
+
 # Register API routes with a prefix for versioning or grouping
 app.include_router(query.router, prefix="/api")
+app.include_router(metrics.router)
 
 # Optional: add a simple health check endpoint
 @app.get("/health", tags=["Health"])
 async def health_check():
     """
     Health check endpoint to verify the service is running.
+
+    Reports "warming" (HTTP 503) until the RAG runtime has loaded, "ready"
+    afterwards, and "degraded" if loading failed (SQL queries still work).
     """
-    return {"status": "ok"}
+    runtime = get_rag_runtime()
+    if runtime.status == "ready":
+        return {"status": "ready"}
+    if runtime.status == "failed":
+        return {"status": "degraded", "rag": runtime.error}
+    return JSONResponse(status_code=503, content={"status": "warming"})
@@ -3,23 +3,29 @@
 This script loads a PDF document, splits it into chunks, embeds them using a
 HuggingFace model, and saves the resulting FAISS vector store locally.
 
-Used for Retrieval-Augmented Generation (RAG) pipelines.
+Used for Retrieval-Augmented Generation (RAG) pipelines. Runs through the
+incremental indexer, so re-running it after the PDF is unchanged is a no-op
+and only changed chunks are re-embedded otherwise.
 """
 
 import os
 import sys
-from langchain_community.vectorstores import FAISS
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.document_loaders import PyPDFLoader
+from app.config import RAG_INDEX_PATH
+from app.rag.indexer import build_vector_index
 
 # Configuration paths
 PDF_PATH = "data/sample.pdf"
-VECTORSTORE_PATH = "vectorstore/db_faiss"
+VECTORSTORE_PATH = RAG_INDEX_PATH
+
+# Chunking used by PyPDFLoader.load_and_split(), which built the original store
+CHUNK_SIZE = 4000
+CHUNK_OVERLAP = 200
 
 def build_vectorstore():
     """
-    Builds and saves a FAISS vector store from a PDF using HuggingFace embeddings.
-    
+    Builds (or incrementally updates) and saves a FAISS vector store from a PDF
+    using HuggingFace embeddings.
+
     Raises:
         FileNotFoundError: If the source PDF file is missing.
         Exception: For other failures in processing or saving.
@@ -28,24 +34,12 @@ def build_vectorstore():
         raise FileNotFoundError(f"PDF file not found at: {PDF_PATH}")
 
     try:
-        # Step 1: Load and split the document
-        loader = PyPDFLoader(PDF_PATH)
-        documents = loader.load_and_split()
-
-        if not documents:
-            raise ValueError("No content loaded from PDF.")
-
-        # Step 2: Load sentence-transformer embeddings
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-
-        # Step 3: Build vector database from embedded documents
-        db = FAISS.from_documents(documents, embeddings)
-
-        # Ensure target folder exists
-        os.makedirs(VECTORSTORE_PATH, exist_ok=True)
-
-        # Step 4: Save vector store locally
-        db.save_local(VECTORSTORE_PATH)
+        build_vector_index(
+            [PDF_PATH],
+            persist_path=VECTORSTORE_PATH,
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
+        )
 
         print("✅ Vectorstore built successfully and saved to:", VECTORSTORE_PATH)
 
@@ -0,0 +1,178 @@
+# app/rag/docstore.py
+"""
+SQLite-backed docstore for the FAISS vector stores.
+
+Chunk text and metadata live in an indexed table keyed by chunk ID, with the
+chunk's position in the FAISS index alongside. Nothing is read at load time:
+a search fetches only the k rows it returns, by primary key, so load time and
+resident memory do not grow with the corpus text. It replaces LangChain's
+pickled InMemoryDocstore, and with it the unsafe unpickling at startup.
+
+Writes (add/delete) are held in one transaction until commit(), so a crashed
+indexing run leaves the previous committed state untouched.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import weakref
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Union
+
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    id TEXT PRIMARY KEY,
+    position INTEGER,
+    content TEXT NOT NULL,
+    metadata TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS chunks_position ON chunks (position);
+"""
+
+# Open read-only docstores. Workers forked from a preloaded process
+# (run.py --workers) must not share its SQLite connections: each reopens its
+# own after fork(). One hook serves every instance, including those created by
+# later index reloads, since fork hooks cannot be unregistered.
+_open_readonly: "weakref.WeakSet[SQLiteDocstore]" = weakref.WeakSet()
+
+
+def _reopen_after_fork():
+    for docstore in list(_open_readonly):
+        docstore._reopen_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reopen_after_fork)
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    """
+    Docstore keeping chunks in a SQLite table, read lazily by ID or position.
+    """
+
+    def __init__(self, path: str, readonly: bool = False):
+        self.path = path
+        self.readonly = readonly
+        if readonly:
+            self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+            _open_readonly.add(self)
+        else:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode = WAL")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+        # Searches run in worker threads; sqlite3 connections are not thread-safe
+        self._lock = threading.Lock()
+
+    def _reopen_after_fork(self):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+
+    def search(self, search: str) -> Union[str, Document]:
+        """
+        Returns the Document stored under an ID, or an error message like InMemoryDocstore.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT content, metadata FROM chunks WHERE id = ?", (search,)
+            ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return Document(id=search, page_content=row[0], metadata=json.loads(row[1]))
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        """
+        Stores documents by ID (uncommitted until commit()); positions are set by set_positions().
+        """
+        rows = [
+            (id_, doc.page_content, json.dumps(doc.metadata, default=str))
+            for id_, doc in texts.items()
+        ]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO chunks (id, content, metadata) VALUES (?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET content = excluded.content, metadata = excluded.metadata",
+                rows,
+            )
+
+    def delete(self, ids: List) -> None:
+        with self._lock:
+            self._conn.executemany("DELETE FROM chunks WHERE id = ?", [(id_,) for id_ in ids])
+
+    def clear(self):
+        """
+        Removes every chunk (uncommitted until commit()).
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM chunks")
+
+    def set_positions(self, index_to_docstore_id: Dict[int, str]):
+        """
+        Records the FAISS position of every chunk; chunks without one are dropped.
+        """
+        with self._lock:
+            self._conn.execute("UPDATE chunks SET position = NULL")
+            self._conn.executemany(
+                "UPDATE chunks SET position = ? WHERE id = ?",
+                [(int(position), id_) for position, id_ in index_to_docstore_id.items()],
+            )
+            self._conn.execute("DELETE FROM chunks WHERE position IS NULL")
+
+    def load_positions(self) -> Dict[int, str]:
+        """
+        Returns the full position -> ID mapping (used by the indexer, which mutates it).
+        """
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT position, id FROM chunks WHERE position IS NOT NULL"
+            ))
+
+    def position_map(self) -> "PositionMap":
+        """
+        Returns a lazy, read-only position -> ID mapping (used at serving time).
+        """
+        return PositionMap(self)
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM chunks WHERE position IS NOT NULL"
+            ).fetchone()[0]
+
+    def commit(self):
+        with self._lock:
+            self._conn.commit()
+
+    def close(self):
+        _open_readonly.discard(self)
+        with self._lock:
+            self._conn.close()
+
+
+class PositionMap(Mapping):
+    """
+    Read-only FAISS position -> chunk ID mapping, queried on demand.
+    """
+
+    def __init__(self, docstore: SQLiteDocstore):
+        self._docstore = docstore
+
+    def __getitem__(self, position: int) -> str:
+        store = self._docstore
+        with store._lock:
+            row = store._conn.execute(
+                "SELECT id FROM chunks WHERE position = ?", (int(position),)
+            ).fetchone()
+        if row is None:
+            raise KeyError(position)
+        return row[0]
+
+    def __len__(self) -> int:
+        return self._docstore.count()
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._docstore.load_positions())
@@ -2,23 +2,82 @@
 """
 Provides a reusable embedding model instance for transforming text into vector embeddings
 using a HuggingFace sentence-transformer model.
+
+The model is loaded once per process and shared by every caller, since loading
+MiniLM costs seconds and a few hundred MB on each construction.
+
+Two backends serve the same model, selected by EMBEDDING_BACKEND:
+- "torch": sentence-transformers on PyTorch (default)
+- "onnx": int8-quantized ONNX Runtime export, faster on CPU-only nodes
+Both produce normalized vectors in the same space; scripts/bench_embeddings.py
+compares their throughput, latency and retrieval recall.
 """
 
-from langchain.embeddings import HuggingFaceEmbeddings
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from app.config import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_ONNX_DIR,
+    EMBEDDING_THREADS,
+)
+
+if TYPE_CHECKING:
+    from langchain_core.embeddings import Embeddings
+
+EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
+
+BACKENDS = ("torch", "onnx")
+
+
+def create_embedder(
+    backend: str = EMBEDDING_BACKEND,
+    batch_size: int = EMBEDDING_BATCH_SIZE,
+    threads: int = EMBEDDING_THREADS,
+) -> "Embeddings":
+    """
+    Builds a new embedding model instance for the given backend.
+
+    Parameters:
+        backend (str): "torch" or "onnx".
+        batch_size (int): Sentences per forward pass.
+        threads (int): Intra-op CPU threads; 0 keeps the library default.
+
+    Returns:
+        Embeddings: The embedding model instance.
+
+    Raises:
+        ValueError: If the backend is unknown.
+    """
+    if backend == "onnx":
+        from app.rag.onnx_embeddings import OnnxEmbeddings
+        return OnnxEmbeddings(EMBEDDING_MODEL, EMBEDDING_ONNX_DIR, batch_size=batch_size, threads=threads)
+
+    if backend == "torch":
+        from langchain_huggingface import HuggingFaceEmbeddings
+        if threads > 0:
+            import torch
+            torch.set_num_threads(threads)
+        return HuggingFaceEmbeddings(
+            model_name=EMBEDDING_MODEL, encode_kwargs={"batch_size": batch_size}
+        )
+
+    raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {BACKENDS}")
+
 
-def get_embedder() -> HuggingFaceEmbeddings:
+@lru_cache(maxsize=1)
+def get_embedder() -> "Embeddings":
     """
-    Initializes and returns a HuggingFaceEmbeddings instance
-    using the 'sentence-transformers/all-MiniLM-L6-v2' model.
+    Initializes (on first call) and returns the shared embedding model for the
+    'sentence-transformers/all-MiniLM-L6-v2' model on the configured backend.
 
     Returns:
-        HuggingFaceEmbeddings: The embedding model instance.
+        Embeddings: The embedding model instance.
 
     Raises:
         RuntimeError: If the embedding model fails to initialize.
     """
     try:
-        embedder = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        return embedder
+        return create_embedder()
     except Exception as e:
         raise RuntimeError(f"Failed to initialize embedder: {e}") from e
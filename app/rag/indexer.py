@@ -1,26 +1,111 @@
-# app/rag/build_vector_index.py
+# app/rag/indexer.py
 """
 Builds and persists a FAISS vector index from documents loaded from given file paths.
 
-This function:
-- Loads documents using custom loader functions
-- Splits documents into chunks suitable for embedding
-- Creates embeddings via a custom embedder
-- Builds and saves a FAISS vector store locally
+Indexing is incremental. A manifest next to the index records a content hash
+for every file and the hash-derived ID of every chunk it produced. On each run:
+- unchanged files are skipped without being parsed
+- new or changed files are re-split, and only chunks not already indexed are embedded
+- chunks of changed or removed files that no longer exist are deleted by ID
+
+Re-index time is therefore proportional to the change set, not the corpus size.
+Changed files are parsed by the streaming loader pipeline and embedded in
+fixed-size batches as their chunks arrive. The flat index is then used to
+rebuild the search index (IVF/HNSW on large corpora, see vector_index.py).
 """
 
+import hashlib
+import json
+import logging
 import os
-from langchain.vectorstores import FAISS
-from app.rag.loader import load_documents, split_documents
+import time
+from typing import Dict, List, Optional
+
+from langchain_community.vectorstores import FAISS
+from app.config import EMBEDDING_BATCH_SIZE
+from app.rag.loader import batched, iter_chunks
 from app.rag.embedder import get_embedder
+from app.rag.vector_index import (
+    create_vector_store,
+    open_vector_store,
+    save_vector_store,
+    write_search_index,
+)
+
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+
+logger = logging.getLogger(__name__)
+
+
+def file_hash(path: str) -> str:
+    """
+    Returns the SHA-256 of a file's contents, read in 1 MB blocks.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_id(chunk) -> str:
+    """
+    Returns a stable ID for a chunk from its source, page and text.
+    """
+    key = "\0".join([
+        str(chunk.metadata.get("source", "")),
+        str(chunk.metadata.get("page", "")),
+        chunk.page_content,
+    ])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def load_manifest(persist_path: str) -> Optional[Dict]:
+    """
+    Loads the index manifest, or None if missing or unreadable.
+    """
+    path = os.path.join(persist_path, MANIFEST_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
 
-def build_vector_index(paths: list[str], persist_path: str = "data/faiss_index") -> FAISS:
+def save_manifest(persist_path: str, manifest: Dict):
     """
-    Build and persist a FAISS vector store from documents loaded from provided paths.
+    Writes the manifest atomically (write to a temp file, then rename).
+    """
+    path = os.path.join(persist_path, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def build_vector_index(
+    paths: list[str],
+    persist_path: str = "data/faiss_index",
+    chunk_size: int = 500,
+    chunk_overlap: int = 50,
+    stats: Optional[Dict] = None,
+) -> FAISS:
+    """
+    Build (or incrementally update) and persist a FAISS vector store from
+    documents loaded from provided paths.
+
+    The paths are the whole corpus: files indexed previously but no longer
+    listed are removed from the index.
 
     Parameters:
         paths (list[str]): List of file paths to load documents from.
         persist_path (str): Directory path where the FAISS index will be saved.
+        chunk_size (int): Maximum size of each chunk.
+        chunk_overlap (int): Number of overlapping characters between chunks.
+        stats (dict, optional): Filled with run counters (files, files_changed,
+            pages, chunks, chunks_embedded, chunks_removed, seconds).
 
     Returns:
         FAISS: The built FAISS vector store instance.
@@ -37,28 +122,95 @@ def build_vector_index(paths: list[str], persist_path: str = "data/faiss_index")
         if not os.path.exists(p):
             raise FileNotFoundError(f"Document file not found: {p}")
 
+    started = time.perf_counter()
     try:
-        # Load documents from given paths
-        documents = load_documents(paths)
-        if not documents:
-            raise ValueError("No documents loaded from the provided paths.")
-
-        # Split documents into smaller chunks for embedding
-        chunks = split_documents(documents)
-        if not chunks:
-            raise ValueError("Document splitting returned no chunks.")
-
         # Initialize embedding model
         embedder = get_embedder()
 
-        # Create FAISS vector store from document chunks and embeddings
-        vectorstore = FAISS.from_documents(chunks, embedder)
+        settings = {"chunk_size": chunk_size, "chunk_overlap": chunk_overlap}
+        manifest = load_manifest(persist_path)
+        vectorstore = None
+        if manifest and manifest.get("settings") == settings:
+            try:
+                vectorstore = open_vector_store(persist_path, embedder)
+            except Exception as e:
+                logger.warning("Existing index unreadable, rebuilding from scratch: %s", e)
+
+        if vectorstore is None:
+            # No usable previous index (or chunking changed): index everything
+            manifest = {"version": MANIFEST_VERSION, "settings": settings, "files": {}}
+
+        old_files: Dict[str, Dict] = manifest["files"]
+        new_files: Dict[str, Dict] = {}
+        changed: List[str] = []
+
+        for path in paths:
+            digest = file_hash(path)
+            previous = old_files.get(path)
+            if previous and previous["hash"] == digest:
+                new_files[path] = previous
+            else:
+                new_files[path] = {"hash": digest, "chunks": []}
+                changed.append(path)
+
+        indexed_ids = set(vectorstore.index_to_docstore_id.values()) if vectorstore is not None else set()
+        run = {"files": len(paths), "files_changed": len(changed), "pages": 0,
+               "chunks": 0, "chunks_embedded": 0, "chunks_removed": 0}
+        seen = set()
+
+        def new_chunks():
+            # Streams chunks of changed files from the parser pool, records their
+            # IDs in the manifest and yields only chunks not already indexed
+            for path, pages, chunks in iter_chunks(changed, chunk_size, chunk_overlap):
+                run["pages"] += pages
+                for chunk in chunks:
+                    cid = chunk_id(chunk)
+                    if cid in seen:
+                        continue
+                    seen.add(cid)
+                    new_files[path]["chunks"].append(cid)
+                    run["chunks"] += 1
+                    if cid not in indexed_ids:
+                        yield cid, chunk
+
+        # Embed new chunks in fixed-size batches while the pool keeps parsing
+        for batch in batched(new_chunks(), EMBEDDING_BATCH_SIZE):
+            ids = [cid for cid, _ in batch]
+            texts = [chunk.page_content for _, chunk in batch]
+            vectors = embedder.embed_documents(texts)
+            if vectorstore is None:
+                vectorstore = create_vector_store(persist_path, embedder, len(vectors[0]))
+            vectorstore.add_embeddings(
+                list(zip(texts, vectors)), metadatas=[chunk.metadata for _, chunk in batch], ids=ids
+            )
+            run["chunks_embedded"] += len(batch)
+
+        if vectorstore is None:
+            raise ValueError("No documents loaded from the provided paths.")
+
+        # Remove vectors of chunks that changed, vanished, or whose file left the corpus
+        live_ids = {cid for entry in new_files.values() for cid in entry["chunks"]}
+        stale_ids = list(indexed_ids - live_ids)
+        if stale_ids:
+            vectorstore.delete(ids=stale_ids)
+        run["chunks_removed"] = len(stale_ids)
+        run["seconds"] = time.perf_counter() - started
+
+        logger.info(
+            "Index update: %d/%d files changed, %d pages, %d chunks embedded, %d chunks removed.",
+            run["files_changed"], run["files"], run["pages"], run["chunks_embedded"], run["chunks_removed"],
+        )
+        if stats is not None:
+            stats.update(run)
 
         # Ensure persistence directory exists
         os.makedirs(persist_path, exist_ok=True)
 
-        # Save the vector store locally
-        vectorstore.save_local(persist_path)
+        # Save the vector store locally, then the manifest that describes it
+        save_vector_store(vectorstore, persist_path)
+        write_search_index(vectorstore, persist_path)
+        manifest["files"] = new_files
+        save_manifest(persist_path, manifest)
 
         return vectorstore
 
@@ -4,11 +4,27 @@ Module to load documents from multiple file paths and split them into
 smaller chunks for downstream embedding and indexing.
 
 Supports PDF and text files using LangChain community loaders.
+
+iter_chunks() is the streaming variant used by the indexer: parsing and
+splitting run in a process pool across files and PDF page ranges, and chunks
+are yielded as each task finishes, so parse, split and embed overlap and
+memory is bounded by the number of tasks in flight rather than the corpus.
+Its chunks carry {"source": path} for text files (as TextLoader) and
+{"source": path, "page": 0-based page number} for PDFs: PyPDFLoader's page
+text, without its other metadata keys (page_label, total_pages, the PDF's
+document info).
 """
 
-from typing import List
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
 from langchain_community.document_loaders import PyPDFLoader, TextLoader
+from langchain_core.documents import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.config import INGEST_PAGES_PER_TASK, INGEST_WORKERS
 
 def load_documents(paths: List[str]) -> List:
     """
@@ -83,3 +99,122 @@ def split_documents(documents: List, chunk_size: int = 500, chunk_overlap: int =
         return chunks
     except Exception as e:
         raise RuntimeError(f"Failed to split documents: {str(e)}") from e
+
+
+# A parse task: (path, first_page, last_page_exclusive); pages are None for text files
+ParseTask = Tuple[str, Optional[int], Optional[int]]
+
+
+def _plan_tasks(paths: List[str], pages_per_task: int) -> List[ParseTask]:
+    """
+    Splits the corpus into parse tasks: one per text file, one per page range of a PDF.
+    """
+    tasks = []
+    for path in paths:
+        if path.lower().endswith(".pdf"):
+            from pypdf import PdfReader
+            n_pages = len(PdfReader(path).pages)
+            for start in range(0, n_pages, pages_per_task):
+                tasks.append((path, start, min(start + pages_per_task, n_pages)))
+        else:
+            tasks.append((path, None, None))
+    return tasks
+
+
+def _parse_task(task: ParseTask, chunk_size: int, chunk_overlap: int) -> Tuple[str, int, List]:
+    """
+    Loads and splits one parse task (runs in a worker process).
+
+    Returns:
+        tuple: (path, pages parsed, chunk Documents)
+    """
+    path, start, end = task
+    try:
+        if start is None:
+            documents = TextLoader(path).load()
+        else:
+            # PyPDFLoader's page text for just this page range; metadata is
+            # only source and page, which the chunk IDs are derived from
+            from pypdf import PdfReader
+            reader = PdfReader(path)
+            documents = [
+                Document(page_content=reader.pages[i].extract_text(),
+                         metadata={"source": path, "page": i})
+                for i in range(start, end)
+            ]
+    except Exception as e:
+        raise RuntimeError(f"Failed to load document {path}: {str(e)}") from e
+
+    splitter = RecursiveCharacterTextSplitter(chunk_size=chunk_size, chunk_overlap=chunk_overlap)
+    return path, len(documents), splitter.split_documents(documents)
+
+
+def _pool_context():
+    """
+    Start method for parser processes. The indexer may already hold the
+    embedding model, whose torch/BLAS threads do not survive fork(): workers
+    start from a clean interpreter instead (forkserver, or spawn where that is
+    unavailable).
+    """
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+def iter_chunks(
+    paths: List[str],
+    chunk_size: int = 500,
+    chunk_overlap: int = 50,
+    workers: int = INGEST_WORKERS,
+    pages_per_task: int = INGEST_PAGES_PER_TASK,
+) -> Iterator[Tuple[str, int, List]]:
+    """
+    Parses and splits documents in a process pool, yielding chunks as they are ready.
+
+    At most 2 * workers tasks are in flight, so workers keep parsing while the
+    consumer embeds the previous chunks, without buffering the whole corpus.
+
+    Args:
+        paths (List[str]): File paths to ingest.
+        chunk_size (int): Maximum size of each chunk.
+        chunk_overlap (int): Number of overlapping characters between chunks.
+        workers (int): Parser processes; 1 parses inline.
+        pages_per_task (int): PDF pages per parse task.
+
+    Yields:
+        tuple: (path, pages parsed, chunk Documents) for each completed task.
+
+    Raises:
+        FileNotFoundError: If any file path does not exist.
+        RuntimeError: If a document fails to load.
+    """
+    for path in paths:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"File not found: {path}")
+
+    tasks = _plan_tasks(paths, pages_per_task)
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            yield _parse_task(task, chunk_size, chunk_overlap)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(tasks)), mp_context=_pool_context()) as pool:
+        pending = iter(tasks)
+        in_flight = deque(
+            pool.submit(_parse_task, task, chunk_size, chunk_overlap)
+            for task in islice(pending, 2 * workers)
+        )
+        while in_flight:
+            # Results are consumed in submission order; later tasks keep running meanwhile
+            result = in_flight.popleft().result()
+            for task in islice(pending, 1):
+                in_flight.append(pool.submit(_parse_task, task, chunk_size, chunk_overlap))
+            yield result
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    """
+    Groups an iterable into lists of at most `size` items.
+    """
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
@@ -0,0 +1,174 @@
+# app/rag/onnx_embeddings.py
+"""
+CPU embedding backend running a sentence-transformer model with ONNX Runtime.
+
+The model is exported once from HuggingFace to ONNX and quantized to int8
+(dynamic quantization of the linear layers), then served with onnxruntime and
+a Rust tokenizer only: no PyTorch at query time. Outputs are mean-pooled and
+L2-normalized exactly like all-MiniLM-L6-v2 under sentence-transformers, so
+indexes built with either backend stay searchable with the other.
+
+Exporting needs torch and transformers; serving needs onnxruntime and tokenizers.
+"""
+
+import os
+import threading
+import weakref
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+MODEL_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+
+# Matches the sentence-transformers max_seq_length of all-MiniLM-L6-v2
+MAX_SEQ_LENGTH = 256
+
+
+def model_dir(base_dir: str, model_name: str) -> str:
+    """
+    Returns the directory holding the exported model for a HuggingFace model name.
+    """
+    return os.path.join(base_dir, model_name.replace("/", "__"))
+
+
+def export_onnx_model(model_name: str, output_dir: str) -> str:
+    """
+    Exports a HuggingFace encoder to ONNX and quantizes it to int8.
+
+    Parameters:
+        model_name (str): HuggingFace model ID.
+        output_dir (str): Directory receiving the model and tokenizer files.
+
+    Returns:
+        str: Path of the quantized model.
+
+    Raises:
+        RuntimeError: If the export or quantization fails.
+    """
+    try:
+        import torch
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        from transformers import AutoModel, AutoTokenizer
+    except ImportError as e:
+        raise RuntimeError(
+            f"Exporting the ONNX embedding model needs torch, transformers and onnxruntime: {e}"
+        ) from e
+
+    try:
+        os.makedirs(output_dir, exist_ok=True)
+        tokenizer = AutoTokenizer.from_pretrained(model_name)
+        model = AutoModel.from_pretrained(model_name).eval()
+
+        inputs = ["input_ids", "attention_mask", "token_type_ids"]
+        sample = tokenizer(["export sample"], return_tensors="pt")
+        fp32_path = os.path.join(output_dir, "model.onnx")
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[name] for name in inputs),
+                fp32_path,
+                input_names=inputs,
+                output_names=["last_hidden_state"],
+                dynamic_axes={name: {0: "batch", 1: "sequence"} for name in inputs + ["last_hidden_state"]},
+                opset_version=14,
+            )
+
+        # Write under a temporary name so a half-written model is never picked up
+        int8_path = os.path.join(output_dir, MODEL_FILE)
+        quantize_dynamic(fp32_path, int8_path + ".tmp", weight_type=QuantType.QInt8)
+        tokenizer.save_pretrained(output_dir)
+        os.replace(int8_path + ".tmp", int8_path)
+        os.remove(fp32_path)
+        return int8_path
+    except Exception as e:
+        raise RuntimeError(f"Failed to export ONNX embedding model {model_name}: {e}") from e
+
+# Live ONNX models. ONNX Runtime starts its thread pool with the session, and
+# threads do not survive fork(): workers forked from a preloaded process
+# (run.py --workers) open their own session. One hook serves every instance.
+_live_models: "weakref.WeakSet[OnnxEmbeddings]" = weakref.WeakSet()
+
+
+def _reopen_after_fork():
+    for model in list(_live_models):
+        model._reopen_after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reopen_after_fork)
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    LangChain Embeddings served by an int8 ONNX export of a sentence-transformer.
+    """
+
+    def __init__(self, model_name: str, base_dir: str, batch_size: int = 32, threads: int = 0):
+        from tokenizers import Tokenizer
+
+        directory = model_dir(base_dir, model_name)
+        model_path = os.path.join(directory, MODEL_FILE)
+        if not os.path.exists(model_path):
+            export_onnx_model(model_name, directory)
+
+        self._model_path = model_path
+        self._threads = threads
+        self._session = self._open_session()
+        self._input_names = {i.name for i in self._session.get_inputs()}
+        _live_models.add(self)
+
+        self._tokenizer = Tokenizer.from_file(os.path.join(directory, TOKENIZER_FILE))
+        self._tokenizer.enable_truncation(max_length=MAX_SEQ_LENGTH)
+        self._tokenizer.enable_padding()
+        # Tokenizer padding state is not safe to share across threads
+        self._lock = threading.Lock()
+        self.batch_size = max(1, batch_size)
+
+    def _open_session(self):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if self._threads > 0:
+            options.intra_op_num_threads = self._threads
+        return ort.InferenceSession(self._model_path, options, providers=["CPUExecutionProvider"])
+
+    def _reopen_after_fork(self):
+        self._lock = threading.Lock()
+        self._session = self._open_session()
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        with self._lock:
+            encodings = self._tokenizer.encode_batch(texts)
+        ids = np.asarray([e.ids for e in encodings], dtype=np.int64)
+        mask = np.asarray([e.attention_mask for e in encodings], dtype=np.int64)
+        feeds = {"input_ids": ids, "attention_mask": mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.zeros_like(ids)
+
+        hidden = self._session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then L2 normalization
+        weights = mask[:, :, None].astype(np.float32)
+        pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds texts in batches; texts are length-sorted so each batch pads little.
+        """
+        order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+        vectors = np.empty((len(texts), 0), dtype=np.float32)
+        for start in range(0, len(order), self.batch_size):
+            positions = order[start:start + self.batch_size]
+            batch = self._encode_batch([texts[i] for i in positions])
+            if vectors.shape[1] == 0:
+                vectors = np.empty((len(texts), batch.shape[1]), dtype=np.float32)
+            vectors[positions] = batch
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._encode_batch([text])[0].tolist()
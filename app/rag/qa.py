@@ -1,22 +1,55 @@
 # app/rag/qa.py
 """
 Module for retrieving answers from a FAISS vectorstore augmented with
-a retrieval-augmented generation (RAG) chain using LangChain.
+a retrieval-augmented generation (RAG) "stuff" chain.
 
-It loads vectorstore embeddings and uses a ChatOpenAI LLM with a
-custom prompt to answer user queries based on relevant documents.
+The embedder, FAISS index, retriever, LLM client and prompt are held by a
+process-wide RAGRuntime. It is built once (normally in the FastAPI lifespan)
+and shared across requests instead of being rebuilt on every question.
+Retrieval runs in a worker thread and generation awaits the shared async LLM
+client, so neither blocks the event loop.
+
+stream_answer() sends the retrieved sources first and then the answer token
+by token, so users wait for the first token instead of the whole completion.
+
+Question embeddings and top-k results are cached per normalized question. The
+runtime polls the index version stamp written by the indexer; a new version
+hot-reloads the vector store and clears both caches.
 """
 
-import os
-from langchain_community.vectorstores import FAISS
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain.chains import RetrievalQA
-from langchain_core.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
+import asyncio
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, AsyncIterator, List, Optional, Tuple
+from app.config import RAG_INDEX_CHECK_SECONDS, RAG_INDEX_PATH
+from app.core.llm import get_llm_client
+from app.core.metrics import STAGE_SECONDS, stage
+from app.rag.embedder import get_embedder
+from app.rag.retrieval_cache import Hits, RetrievalCache
+from app.utils.text import normalize_question
+
+if TYPE_CHECKING:
+    # LangChain and FAISS load with the vector store, not at import time
+    from langchain_community.vectorstores import FAISS
+    from langchain_core.documents import Document
+
+DB_FAISS_PATH = RAG_INDEX_PATH
+
+# Number of chunks retrieved per question
+TOP_K = 3
 
-DB_FAISS_PATH = "vectorstore/db_faiss"
+PROMPT_TEMPLATE = (
+    "You are an expert assistant. Use the following context to answer the question:\n\n"
+    "{context}\n\n"
+    "Question: {question}\n\n"
+    "Answer:"
+)
 
-def load_vectorstore() -> FAISS:
+logger = logging.getLogger(__name__)
+
+
+def load_vectorstore() -> "FAISS":
     """
     Loads the FAISS vectorstore with embeddings from local storage.
 
@@ -27,61 +60,295 @@ def load_vectorstore() -> FAISS:
         RuntimeError: If loading the vectorstore or embeddings fails.
     """
     try:
-        embeddings = HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2")
-        # Load the FAISS index from local directory with embeddings
-        db = FAISS.load_local(DB_FAISS_PATH, embeddings, allow_dangerous_deserialization=True)
+        from app.rag.vector_index import load_vector_store
+
+        embeddings = get_embedder()
+        # Memory-map the search index (flat, IVF or HNSW) from the local directory
+        db = load_vector_store(DB_FAISS_PATH, embeddings)
         # Return retriever with top-k=3 documents for each query
-        return db.as_retriever(search_kwargs={"k": 3})
+        return db.as_retriever(search_kwargs={"k": TOP_K})
     except Exception as e:
         raise RuntimeError(f"Failed to load vectorstore: {e}") from e
 
 
-def answer_from_docs(query: str) -> str:
+class RAGRuntime:
+    """
+    Resident RAG components shared by every request in the process.
+
+    States move from "warming" to "ready" once load() succeeds, or to
+    "failed" if it raises; a failed runtime is retried on the next load().
+    """
+
+    def __init__(self):
+        self.retriever = None
+        self.vectorstore = None
+        self.llm = None
+        self.prompt = None
+        self.error: Optional[str] = None
+        self.cache = RetrievalCache()
+        self.version: Optional[str] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    @property
+    def status(self) -> str:
+        if self.ready:
+            return "ready"
+        return "failed" if self.error else "warming"
+
+    def load(self) -> "RAGRuntime":
+        """
+        Builds the retriever, LLM client and prompt if not already built.
+        Safe to call concurrently; only the first caller does the work.
+
+        Returns:
+            RAGRuntime: This runtime, ready for use.
+
+        Raises:
+            RuntimeError: If any component fails to initialize.
+        """
+        if self._ready.is_set():
+            return self
+
+        with self._lock:
+            if self._ready.is_set():
+                return self
+
+            try:
+                from langchain_core.prompts import PromptTemplate
+                from app.rag.vector_index import read_index_version
+
+                version = read_index_version(DB_FAISS_PATH)
+                retriever = load_vectorstore()
+
+                # Shared pooled client, also used by the SQL translator
+                llm = get_llm_client()
+
+                prompt = PromptTemplate(
+                    template=PROMPT_TEMPLATE,
+                    input_variables=["context", "question"]
+                )
+            except Exception as e:
+                self.error = str(e)
+                logger.error("RAG runtime failed to load: %s", e)
+                raise RuntimeError(f"Failed to load RAG runtime: {e}") from e
+
+            self.retriever, self.llm, self.prompt = retriever, llm, prompt
+            self.vectorstore = retriever.vectorstore
+            self.version = version
+            self.cache.set_version(version)
+            self._checked_at = time.monotonic()
+            self.error = None
+            self._ready.set()
+            logger.info("RAG runtime ready.")
+            return self
+
+    @property
+    def refresh_due(self) -> bool:
+        return time.monotonic() - self._checked_at >= RAG_INDEX_CHECK_SECONDS
+
+    def refresh(self):
+        """
+        Reloads the vector store if the indexer published a new version, and
+        clears the caches. A failed reload keeps serving the current index.
+        """
+        with self._lock:
+            if not self.refresh_due:
+                return
+            self._checked_at = time.monotonic()
+            from app.rag.vector_index import read_index_version
+
+            version = read_index_version(DB_FAISS_PATH)
+            if version == self.version:
+                return
+            try:
+                retriever = load_vectorstore()
+            except Exception as e:
+                logger.error("Index version %s failed to load, keeping %s: %s", version, self.version, e)
+                return
+            self.retriever, self.vectorstore = retriever, retriever.vectorstore
+            self.version = version
+            self.cache.set_version(version)
+            logger.info("RAG index reloaded at version %s.", version)
+
+    def fetch(self, hits: Hits) -> Optional[List["Document"]]:
+        """
+        Reads cached hits back from the docstore; None if any chunk is gone.
+        """
+        from langchain_core.documents import Document
+
+        docs = [self.vectorstore.docstore.search(chunk_id) for chunk_id, _ in hits]
+        return docs if all(isinstance(doc, Document) for doc in docs) else None
+
+    def retrieve(self, key: str, query: str, embedding: Optional[List[float]]) -> List[Tuple["Document", float]]:
+        """
+        Top-k chunks for a question with their L2 distances (smaller is closer),
+        from the retrieval cache or by (cached) embedding plus vector search.
+        Runs in a worker thread.
+        """
+        hits = self.cache.get_results(key)
+        if hits is not None:
+            docs = self.fetch(hits)
+            if docs is not None:
+                return [(doc, score) for doc, (_, score) in zip(docs, hits)]
+
+        if embedding is None:
+            embedding = self.cache.get_embedding(key)
+        if embedding is None:
+            with stage("embed"):
+                embedding = self.vectorstore.embeddings.embed_query(query)
+            self.cache.put_embedding(key, embedding)
+
+        version, vectorstore = self.version, self.vectorstore
+        with stage("vector_search"):
+            results = vectorstore.similarity_search_with_score_by_vector(embedding, k=TOP_K)
+        self.cache.put_results(key, version, [(doc.id, float(score)) for doc, score in results])
+        return [(doc, float(score)) for doc, score in results]
+
+
+# Process-wide runtime shared by all requests
+_runtime = RAGRuntime()
+
+
+def get_rag_runtime() -> RAGRuntime:
+    """
+    Returns the process-wide RAG runtime (which may still be warming).
+    """
+    return _runtime
+
+
+async def _ensure_runtime() -> RAGRuntime:
+    runtime = get_rag_runtime()
+    if not runtime.ready:
+        # Builds the runtime on first use if the lifespan warm-up has not finished
+        await asyncio.to_thread(runtime.load)
+    elif runtime.refresh_due:
+        await asyncio.to_thread(runtime.refresh)
+    return runtime
+
+
+async def embed_questions(queries: List[str]) -> List[List[float]]:
+    """
+    Embeds many questions in a single batched forward pass of the shared embedder,
+    reusing cached embeddings.
+
+    Args:
+        queries (List[str]): Natural language questions.
+
+    Returns:
+        List[List[float]]: One embedding per question, in order.
+    """
+    runtime = await _ensure_runtime()
+    keys = [normalize_question(query) for query in queries]
+    vectors = [runtime.cache.get_embedding(key) for key in keys]
+
+    # One batched forward pass for the questions not cached yet
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        with stage("embed"):
+            computed = await asyncio.to_thread(
+                runtime.vectorstore.embeddings.embed_documents, [queries[i] for i in missing]
+            )
+        for i, vector in zip(missing, computed):
+            vectors[i] = vector
+            runtime.cache.put_embedding(keys[i], vector)
+    return vectors
+
+
+async def answer_from_docs(query: str, embedding: Optional[List[float]] = None,
+                           max_distance: Optional[float] = None) -> dict:
     """
     Answers a user query by retrieving relevant documents and generating
-    a response using a retrieval-augmented generation chain.
+    a response from them with the shared LLM client.
 
     Args:
         query (str): The natural language query from the user.
+        embedding (List[float], optional): Precomputed query embedding (e.g. from
+            embed_questions); skips the embedding forward pass.
+        max_distance (float, optional): Skip generation, returning an empty
+            result, when even the closest chunk is farther than this.
 
     Returns:
-        str: The generated answer based on retrieved documents.
+        dict: {"query": ..., "result": ...} with the generated answer.
 
     Raises:
-        RuntimeError: If the RAG chain execution fails.
+        RuntimeError: If retrieval or generation fails.
     """
     try:
-        retriever = load_vectorstore()
-
-        llm = ChatOpenAI(
-            model="llama3-70b-8192",
-            temperature=0,
-            openai_api_key=os.getenv("GROQ_API_KEY"),
-            openai_api_base="https://api.groq.com/openai/v1"
-        )
-
-        prompt_template = (
-            "You are an expert assistant. Use the following context to answer the question:\n\n"
-            "{context}\n\n"
-            "Question: {question}\n\n"
-            "Answer:"
-        )
-
-        prompt = PromptTemplate(
-            template=prompt_template,
-            input_variables=["context", "question"]
-        )
-
-        chain = RetrievalQA.from_chain_type(
-            llm=llm,
-            retriever=retriever,
-            chain_type="stuff",
-            chain_type_kwargs={"prompt": prompt},
-            return_source_documents=False,
-        )
-
-        response = chain.invoke({"query": query})
-        return response
+        runtime, results, prompt = await _retrieve_prompt(query, embedding)
+        if max_distance is not None and (not results or results[0][1] > max_distance):
+            # The documents do not cover the question: no LLM call
+            return {"query": query, "result": ""}
+
+        with stage("llm_generate"):
+            answer = await runtime.llm.complete(prompt, temperature=0)
+        return {"query": query, "result": answer}
+
+    except Exception as e:
+        raise RuntimeError(f"Failed to answer from documents: {e}") from e
+
+
+async def _retrieve_prompt(query: str, embedding: Optional[List[float]]):
+    """
+    Retrieves the top-k chunks (with their distances) for a question and
+    builds the "stuff" prompt.
+    """
+    runtime = await _ensure_runtime()
+
+    # Embedding and FAISS search are CPU-bound; keep them off the event loop
+    results = await asyncio.to_thread(runtime.retrieve, normalize_question(query), query, embedding)
 
+    # "Stuff" all retrieved chunks into a single prompt
+    context = "\n\n".join(doc.page_content for doc, _ in results)
+    return runtime, results, runtime.prompt.format(context=context, question=query)
+
+
+def source_metadata(doc: "Document") -> dict:
+    """
+    Describes a retrieved chunk for clients: its ID and loader metadata
+    (source file, page), without the chunk text.
+    """
+    return {"id": doc.id, **doc.metadata}
+
+
+async def stream_answer(query: str, embedding: Optional[List[float]] = None) -> AsyncIterator[dict]:
+    """
+    Streaming variant of answer_from_docs: yields the retrieved sources as soon
+    as retrieval finishes, then the answer token by token as the LLM produces it.
+
+    Args:
+        query (str): The natural language query from the user.
+        embedding (List[float], optional): Precomputed query embedding.
+
+    Yields:
+        dict: A {"type": "sources", "sources": [...]} event, {"type": "token",
+        "text": ...} events, and a final {"type": "end", "result": ...} event
+        carrying the whole answer.
+
+    Raises:
+        RuntimeError: If retrieval or generation fails.
+    """
+    try:
+        runtime, results, prompt = await _retrieve_prompt(query, embedding)
+    except Exception as e:
+        raise RuntimeError(f"Failed to answer from documents: {e}") from e
+    yield {"type": "sources", "sources": [source_metadata(doc) for doc, _ in results]}
+
+    tokens = []
+    started = time.perf_counter()
+    try:
+        with stage("llm_generate"):
+            async for token in runtime.llm.stream_complete(prompt, temperature=0):
+                if not tokens:
+                    # Time to first token: the latency the user now waits for
+                    STAGE_SECONDS.observe(time.perf_counter() - started, stage="llm_first_token")
+                tokens.append(token)
+                yield {"type": "token", "text": token}
     except Exception as e:
         raise RuntimeError(f"Failed to answer from documents: {e}") from e
+    yield {"type": "end", "query": query, "result": "".join(tokens).strip()}
@@ -0,0 +1,109 @@
+# app/rag/retrieval_cache.py
+"""
+In-process caches for the RAG path.
+
+- embeddings: normalized question -> query embedding (skips the forward pass)
+- results: normalized question -> top-k chunk IDs and scores (also skips the
+  vector search; chunks are then read from the docstore by ID)
+
+Both are LRUs tagged with the index version stamp written by the indexer.
+When a new version is observed every entry is dropped, so answers never mix
+chunks from two index generations.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from app.config import RAG_EMBEDDING_CACHE_SIZE, RAG_RETRIEVAL_CACHE_SIZE
+
+# (chunk ID, score) pairs in rank order
+Hits = List[Tuple[str, float]]
+
+
+class RetrievalCache:
+    """
+    Thread-safe LRU caches of question embeddings and retrieval results.
+    """
+
+    def __init__(self, embedding_size: int = RAG_EMBEDDING_CACHE_SIZE,
+                 result_size: int = RAG_RETRIEVAL_CACHE_SIZE):
+        self.embedding_size = embedding_size
+        self.result_size = result_size
+        self.version: Optional[str] = None
+        self._embeddings: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._results: "OrderedDict[str, Hits]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "embedding_hits": 0, "embedding_misses": 0,
+            "retrieval_hits": 0, "retrieval_misses": 0,
+            "invalidations": 0,
+        }
+
+    def set_version(self, version: str):
+        """
+        Tags the cache with an index version, clearing it if the version changed.
+        """
+        with self._lock:
+            if version == self.version:
+                return
+            if self.version is not None:
+                self._stats["invalidations"] += 1
+            self._embeddings.clear()
+            self._results.clear()
+            self.version = version
+
+    @staticmethod
+    def _get(entries: OrderedDict, key: str):
+        value = entries.get(key)
+        if value is not None:
+            entries.move_to_end(key)
+        return value
+
+    @staticmethod
+    def _put(entries: OrderedDict, key: str, value, max_size: int):
+        if max_size <= 0:
+            return
+        entries[key] = value
+        entries.move_to_end(key)
+        while len(entries) > max_size:
+            entries.popitem(last=False)
+
+    def get_embedding(self, key: str) -> Optional[List[float]]:
+        with self._lock:
+            value = self._get(self._embeddings, key)
+            self._stats["embedding_hits" if value is not None else "embedding_misses"] += 1
+            return value
+
+    def put_embedding(self, key: str, embedding: List[float]):
+        with self._lock:
+            self._put(self._embeddings, key, list(embedding), self.embedding_size)
+
+    def get_results(self, key: str) -> Optional[Hits]:
+        with self._lock:
+            value = self._get(self._results, key)
+            self._stats["retrieval_hits" if value is not None else "retrieval_misses"] += 1
+            return value
+
+    def put_results(self, key: str, version: Optional[str], hits: Hits):
+        """
+        Stores retrieval results computed against index `version`; results
+        from a superseded version are discarded.
+        """
+        with self._lock:
+            if version == self.version:
+                self._put(self._results, key, hits, self.result_size)
+
+    def stats(self) -> dict:
+        """
+        Returns hit/miss counters, hit rates, sizes and the current index version.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["embedding_entries"] = len(self._embeddings)
+            stats["retrieval_entries"] = len(self._results)
+            stats["index_version"] = self.version
+        for kind in ("embedding", "retrieval"):
+            lookups = stats[f"{kind}_hits"] + stats[f"{kind}_misses"]
+            stats[f"{kind}_hit_rate"] = round(stats[f"{kind}_hits"] / lookups, 4) if lookups else 0.0
+        return stats
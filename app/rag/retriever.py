@@ -7,6 +7,7 @@ Groq's ChatGroq LLM integrated with LangChain's RetrievalQA chain.
 import os
 from langchain.vectorstores import FAISS
 from app.rag.embedder import get_embedder
+from app.rag.vector_index import load_vector_store
 from langchain.chains import RetrievalQA
 from groq import ChatGroq
 
@@ -25,7 +26,7 @@ def load_vector_index(persist_path: str = "data/faiss_index") -> FAISS:
     """
     try:
         embedder = get_embedder()
-        vector_index = FAISS.load_local(persist_path, embedder, allow_dangerous_deserialization=True)
+        vector_index = load_vector_store(persist_path, embedder)
         return vector_index
     except Exception as e:
         raise RuntimeError(f"Failed to load vector index from {persist_path}: {e}") from e
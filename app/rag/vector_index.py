@@ -0,0 +1,369 @@
+# app/rag/vector_index.py
+"""
+Search-optimized FAISS indexes derived from the incremental flat index.
+
+The indexer keeps an exact flat index (index.faiss) as the source of truth,
+since it supports cheap adds and deletes by ID. After every update a search
+index is rebuilt from its vectors, without re-embedding anything:
+- flat: exact search, used as-is for small corpora
+- ivf_flat: inverted lists over k-means cells, trained on a sample
+- ivf_pq: inverted lists with product-quantized codes, for very large corpora;
+  candidates are re-ranked exactly against the memory-mapped flat vectors
+- hnsw: graph index, fast and accurate but memory hungry (opt-in only)
+
+Positions are preserved, so the docstore mapping is shared by both indexes.
+At serving time the search index is memory-mapped read-only: startup does not
+read the file, and its pages live in the shared page cache across workers.
+
+Chunk text and metadata live in a SQLite docstore (docstore.db) read lazily
+by position. Stores saved by FAISS.save_local (index.pkl) are migrated by the
+indexer on its next run or by scripts/migrate_docstore.py; loading a store for
+serving never unpickles anything.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import pickle
+from typing import Dict, Optional
+
+import faiss
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from app.config import (
+    FAISS_EF_SEARCH,
+    FAISS_FLAT_MAX_VECTORS,
+    FAISS_INDEX_TYPE,
+    FAISS_MMAP,
+    FAISS_NPROBE,
+    FAISS_PQ_MIN_VECTORS,
+    FAISS_REFINE_FACTOR,
+)
+from app.rag.docstore import SQLiteDocstore
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+
+FLAT_INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "docstore.db"
+LEGACY_DOCSTORE_FILE = "index.pkl"
+SEARCH_INDEX_FILE = "index.search.faiss"
+SEARCH_META_FILE = "search_index.json"
+
+# Training points per IVF cell (FAISS warns below 39), capped for huge corpora
+TRAIN_POINTS_PER_LIST = 64
+TRAIN_MAX_POINTS = 200_000
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 200
+
+logger = logging.getLogger(__name__)
+
+
+def choose_index_type(n_vectors: int, configured: str = FAISS_INDEX_TYPE) -> str:
+    """
+    Returns the index type for a corpus size: the configured type, or by size when "auto".
+
+    Raises:
+        ValueError: If the configured type is unknown.
+    """
+    if configured != "auto":
+        if configured not in INDEX_TYPES:
+            raise ValueError(f"Unknown FAISS index type {configured!r}; expected auto or one of {INDEX_TYPES}")
+        return configured
+    if n_vectors <= FAISS_FLAT_MAX_VECTORS:
+        return "flat"
+    return "ivf_pq" if n_vectors >= FAISS_PQ_MIN_VECTORS else "ivf_flat"
+
+
+def _pq_subquantizers(dim: int) -> int:
+    # ~4 dimensions per 1-byte code (384 -> 96 bytes per vector); must divide dim
+    for m in range(max(1, dim // 4), 0, -1):
+        if dim % m == 0:
+            return m
+    return 1
+
+
+def build_faiss_index(vectors: np.ndarray, index_type: str, seed: int = 0) -> faiss.Index:
+    """
+    Builds an L2 index of the given type over vectors, keeping their positions.
+
+    IVF variants are trained on a random sample of TRAIN_POINTS_PER_LIST
+    points per list (nlist ~ 4 * sqrt(n)), at most TRAIN_MAX_POINTS.
+
+    Parameters:
+        vectors (np.ndarray): float32 matrix, one row per chunk.
+        index_type (str): One of INDEX_TYPES.
+        seed (int): Seed for the training sample.
+
+    Returns:
+        faiss.Index: The populated index.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M)
+        index.hnsw.efConstruction = HNSW_EF_CONSTRUCTION
+    elif index_type in ("ivf_flat", "ivf_pq"):
+        nlist = max(1, min(int(4 * math.sqrt(n)), n // 39))
+        quantizer = faiss.IndexFlatL2(dim)
+        if index_type == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+            min_train = nlist * 39
+        else:
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_subquantizers(dim), 8)
+            min_train = max(nlist, 256) * 39
+
+        sample_size = min(n, max(min_train, min(nlist * TRAIN_POINTS_PER_LIST, TRAIN_MAX_POINTS)))
+        sample = vectors[np.random.default_rng(seed).choice(n, sample_size, replace=False)]
+        index.train(sample)
+    else:
+        raise ValueError(f"Unknown FAISS index type {index_type!r}")
+
+    index.add(vectors)
+    return index
+
+
+def tune_search(index: faiss.Index, nprobe: int = FAISS_NPROBE, ef_search: int = FAISS_EF_SEARCH):
+    """
+    Applies query-time parameters: nprobe for IVF indexes, efSearch for HNSW.
+    """
+    try:
+        faiss.extract_index_ivf(index).nprobe = nprobe
+    except RuntimeError:
+        pass
+    if isinstance(index, faiss.IndexIVFPQ) and index.use_precomputed_table:
+        # The precomputed residual tables (nlist * M * 256 floats, ~400 MB at 1M
+        # chunks) outweigh the codes themselves for little latency gain
+        index.use_precomputed_table = -1
+        index.precomputed_table.resize(0)
+    if isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = ef_search
+
+
+def read_faiss_index(path: str, mmap: bool = FAISS_MMAP) -> faiss.Index:
+    """
+    Reads a FAISS index, memory-mapped read-only when requested.
+    """
+    if not mmap:
+        return faiss.read_index(path)
+
+    # IO_FLAG_MMAP maps IVF inverted lists; IO_FLAG_MMAP_IFC (FAISS >= 1.10) maps
+    # flat and HNSW vector storage but cannot be combined with mapped IVF lists
+    ifc = getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+    attempts = [faiss.IO_FLAG_MMAP | ifc, faiss.IO_FLAG_MMAP] if ifc else [faiss.IO_FLAG_MMAP]
+    for flags in attempts:
+        try:
+            return faiss.read_index(path, flags | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError as e:
+            error = e
+    logger.warning("Could not memory-map %s, reading it into memory: %s", path, error)
+    return faiss.read_index(path)
+
+
+def with_refinement(index: faiss.Index, flat_path: str, mmap: bool = FAISS_MMAP,
+                    k_factor: int = FAISS_REFINE_FACTOR) -> faiss.Index:
+    """
+    Wraps an IVF-PQ index so its top k_factor * k candidates are re-ranked by
+    exact distance against the flat index. Only those candidates' vectors are
+    read, so with mmap the flat file costs page cache, not process memory.
+    """
+    if k_factor <= 1 or not isinstance(index, faiss.IndexIVFPQ):
+        return index
+    refined = faiss.IndexRefine(index, read_faiss_index(flat_path, mmap=mmap))
+    refined.k_factor = k_factor
+    return refined
+
+
+def _read_meta(persist_path: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(persist_path, SEARCH_META_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def read_index_version(persist_path: str) -> Optional[str]:
+    """
+    Returns the version stamp of a saved vector store, or None if it has none.
+    """
+    return (_read_meta(persist_path) or {}).get("version")
+
+
+def write_search_index(vectorstore: FAISS, persist_path: str, index_type: str = FAISS_INDEX_TYPE) -> str:
+    """
+    Rebuilds the search index of a saved vector store from its flat index and
+    publishes a new index version stamp.
+
+    Parameters:
+        vectorstore (FAISS): The up-to-date vector store (flat index).
+        persist_path (str): Directory the vector store was saved to.
+        index_type (str): Index type, or "auto" to choose by size.
+
+    Returns:
+        str: The index type written.
+    """
+    n = vectorstore.index.ntotal
+    chosen = choose_index_type(n, index_type)
+    search_path = os.path.join(persist_path, SEARCH_INDEX_FILE)
+
+    if chosen == "flat":
+        meta = {"type": "flat", "file": FLAT_INDEX_FILE, "ntotal": n}
+        if os.path.exists(search_path):
+            os.remove(search_path)
+    else:
+        vectors = vectorstore.index.reconstruct_n(0, n)
+        index = build_faiss_index(vectors, chosen)
+        faiss.write_index(index, search_path + ".tmp")
+        os.replace(search_path + ".tmp", search_path)
+        meta = {"type": chosen, "file": SEARCH_INDEX_FILE, "ntotal": n}
+
+    # Version stamp: identical for identical contents, new after any change.
+    # Written last, so readers that see it find the files it describes.
+    digest = hashlib.sha256()
+    for position in range(n):
+        digest.update(vectorstore.index_to_docstore_id[position].encode("utf-8") + b"\0")
+    meta["version"] = digest.hexdigest()[:16]
+
+    meta_path = os.path.join(persist_path, SEARCH_META_FILE)
+    with open(meta_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    os.replace(meta_path + ".tmp", meta_path)
+    logger.info("Search index: %s over %d vectors.", chosen, n)
+    return chosen
+
+
+def migrate_pickle_docstore(persist_path: str) -> bool:
+    """
+    Converts a pickled LangChain docstore (index.pkl) into docstore.db.
+
+    This is the only place a pickle is still read: once, from a local file
+    this application wrote. The pickle is then renamed to index.pkl.migrated.
+    docstore.db is built under a temporary name and renamed into place, so
+    processes loading the same store concurrently never see it half-written.
+
+    Parameters:
+        persist_path (str): Directory of the saved vector store.
+
+    Returns:
+        bool: True if a pickle was migrated, False if there was none.
+    """
+    legacy_path = os.path.join(persist_path, LEGACY_DOCSTORE_FILE)
+    if not os.path.exists(legacy_path):
+        return False
+
+    with open(legacy_path, "rb") as f:
+        legacy_docstore, index_to_docstore_id = pickle.load(f)
+
+    path = os.path.join(persist_path, DOCSTORE_FILE)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    docstore = SQLiteDocstore(tmp_path)
+    try:
+        docstore.clear()
+        docstore.add({id_: legacy_docstore.search(id_) for id_ in index_to_docstore_id.values()})
+        docstore.set_positions(index_to_docstore_id)
+        docstore.commit()
+    finally:
+        docstore.close()
+    os.replace(tmp_path, path)
+
+    try:
+        os.replace(legacy_path, legacy_path + ".migrated")
+    except FileNotFoundError:
+        # Another process migrated the same store meanwhile
+        pass
+    logger.info("Migrated %d chunks from %s to %s.", len(index_to_docstore_id), legacy_path, DOCSTORE_FILE)
+    return True
+
+
+def _open_docstore(persist_path: str, readonly: bool) -> SQLiteDocstore:
+    path = os.path.join(persist_path, DOCSTORE_FILE)
+    if readonly and not os.path.exists(path):
+        if os.path.exists(os.path.join(persist_path, LEGACY_DOCSTORE_FILE)):
+            raise FileNotFoundError(
+                f"Docstore not found: {path}. {persist_path} still has a pickled docstore "
+                f"({LEGACY_DOCSTORE_FILE}); convert it with "
+                f"`python -m scripts.migrate_docstore {persist_path}` or re-run the indexer."
+            )
+        raise FileNotFoundError(f"Docstore not found: {path}")
+    return SQLiteDocstore(path, readonly=readonly)
+
+
+def open_vector_store(persist_path: str, embeddings) -> Optional[FAISS]:
+    """
+    Opens a saved vector store for updating: the flat index in memory and the
+    docstore positions, migrating a pickled docstore first if needed.
+
+    Returns:
+        FAISS: The writable store, or None if there is none or it is inconsistent.
+    """
+    flat_path = os.path.join(persist_path, FLAT_INDEX_FILE)
+    if not os.path.exists(flat_path):
+        return None
+    migrate_pickle_docstore(persist_path)
+
+    index = faiss.read_index(flat_path)
+    docstore = _open_docstore(persist_path, readonly=False)
+    positions = docstore.load_positions()
+    if len(positions) != index.ntotal or set(positions) != set(range(index.ntotal)):
+        docstore.close()
+        logger.warning("Index and docstore in %s disagree; rebuilding.", persist_path)
+        return None
+    return FAISS(embeddings, index, docstore, positions)
+
+
+def create_vector_store(persist_path: str, embeddings, dim: int) -> FAISS:
+    """
+    Creates an empty flat vector store whose docstore replaces any existing one on save.
+    """
+    os.makedirs(persist_path, exist_ok=True)
+    docstore = _open_docstore(persist_path, readonly=False)
+    docstore.clear()
+    return FAISS(embeddings, faiss.IndexFlatL2(dim), docstore, {})
+
+
+def save_vector_store(vectorstore: FAISS, persist_path: str):
+    """
+    Saves the flat index and commits the docstore positions that describe it.
+    """
+    flat_path = os.path.join(persist_path, FLAT_INDEX_FILE)
+    faiss.write_index(vectorstore.index, flat_path + ".tmp")
+    vectorstore.docstore.set_positions(vectorstore.index_to_docstore_id)
+    vectorstore.docstore.commit()
+    os.replace(flat_path + ".tmp", flat_path)
+
+
+def load_vector_store(persist_path: str, embeddings, mmap: bool = FAISS_MMAP) -> FAISS:
+    """
+    Loads a vector store for serving: the search index (memory-mapped, tuned
+    with nprobe/efSearch) plus the SQLite docstore. No chunk is read until a
+    search returns it.
+
+    Falls back to the flat index when no search index matches the docstore.
+
+    Parameters:
+        persist_path (str): Directory of the saved vector store.
+        embeddings: Embedding model used for queries.
+        mmap (bool): Memory-map the index instead of reading it into memory.
+
+    Returns:
+        FAISS: A read-only vector store.
+    """
+    docstore = _open_docstore(persist_path, readonly=True)
+    index_to_docstore_id = docstore.position_map()
+
+    meta = _read_meta(persist_path) or {}
+    filename = FLAT_INDEX_FILE
+    if meta.get("ntotal") == len(index_to_docstore_id) and os.path.exists(
+        os.path.join(persist_path, meta.get("file", ""))
+    ):
+        filename = meta["file"]
+
+    index = read_faiss_index(os.path.join(persist_path, filename), mmap=mmap)
+    tune_search(index)
+    index = with_refinement(index, os.path.join(persist_path, FLAT_INDEX_FILE), mmap=mmap)
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
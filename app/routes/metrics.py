@@ -0,0 +1,71 @@
+# app/routes/metrics.py
+"""
+Prometheus scrape endpoint (GET /metrics).
+
+Exports the request, stage, LLM and SQL metrics recorded in app/core/metrics.py,
+plus the caches' own hit/miss counters, read from their stats() at scrape time.
+A scrape only reports caches that already exist (it never opens the engine
+or the translation cache file), and renders in a worker thread since
+stats() may query SQLite.
+"""
+
+import asyncio
+
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core.executor import peek_engine
+from app.core.metrics import REGISTRY
+from app.core.translation_cache import peek_translation_cache
+from app.rag.qa import get_rag_runtime
+
+router = APIRouter()
+
+# Version of the text exposition format Prometheus expects
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _cache_metrics():
+    """
+    Converts the cache statistics into lookup counters and size gauges.
+    """
+    lookups, entries = [], []
+
+    translation_cache = peek_translation_cache()
+    if translation_cache is not None:
+        stats = translation_cache.stats()
+        for result, key in (("exact", "exact_hits"), ("semantic", "semantic_hits"), ("miss", "misses")):
+            lookups.append(({"cache": "translation", "result": result}, stats[key]))
+        entries.append(({"cache": "translation"}, stats["entries"]))
+
+    stats = get_rag_runtime().cache.stats()
+    for cache in ("embedding", "retrieval"):
+        lookups.append(({"cache": cache, "result": "hit"}, stats[f"{cache}_hits"]))
+        lookups.append(({"cache": cache, "result": "miss"}, stats[f"{cache}_misses"]))
+        entries.append(({"cache": cache}, stats[f"{cache}_entries"]))
+
+    sizes = []
+    engine = peek_engine()
+    if engine is not None and engine.cache is not None:
+        stats = engine.cache.stats()
+        lookups.append(({"cache": "sql_result", "result": "hit"}, stats["hits"]))
+        lookups.append(({"cache": "sql_result", "result": "miss"}, stats["misses"]))
+        entries.append(({"cache": "sql_result"}, stats["entries"]))
+        sizes.append(({"cache": "sql_result"}, stats["bytes"]))
+
+    return [
+        ("nlqs_cache_lookups_total", "counter", "Cache lookups by cache and result.", lookups),
+        ("nlqs_cache_entries", "gauge", "Entries held per cache.", entries),
+        ("nlqs_cache_bytes", "gauge", "Estimated bytes held per cache.", sizes),
+    ]
+
+
+REGISTRY.register_collector(_cache_metrics)
+
+
+@router.get("/metrics", summary="Prometheus metrics", include_in_schema=False)
+async def metrics():
+    """
+    Returns every metric in the Prometheus text format.
+    """
+    return PlainTextResponse(await asyncio.to_thread(REGISTRY.render), media_type=CONTENT_TYPE)
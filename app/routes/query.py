@@ -4,11 +4,23 @@ API router for handling natural language queries via POST /query endpoint.
 
 Receives a JSON payload with a question string, processes it via the NLQS
 handle_query function, and returns structured results or error responses.
+SQL results can also be paginated (page_size/page_token) or streamed as
+NDJSON (stream=true). Streams are sent as Server-Sent Events instead when the
+client accepts text/event-stream, or from GET /query/stream for EventSource
+clients; RAG answers then arrive token by token after their sources.
 """
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field, constr
-from app.core.orchestrator import handle_query
+import asyncio
+import json
+from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, conint, constr
+from app.core.executor import peek_engine
+from app.core.orchestrator import handle_batch, handle_query, stream_query
+from app.core.translation_cache import peek_translation_cache
+from app.rag.qa import get_rag_runtime
+from app.config import BATCH_MAX_QUESTIONS, BATCH_PARALLELISM
 
 router = APIRouter()
 
@@ -16,12 +28,34 @@ class QueryRequest(BaseModel):
     question: constr(min_length=1, strip_whitespace=True) = Field(
         ..., description="Natural language question to be processed"
     )
+    page_size: Optional[conint(ge=1)] = Field(
+        None, description="Return SQL results one page at a time (capped by the server)"
+    )
+    page_token: Optional[str] = Field(
+        None, description="next_page_token from a previous response"
+    )
+    stream: bool = Field(
+        False, description="Stream the result as NDJSON events instead of one JSON body "
+                           "(not combinable with page_size or page_token)"
+    )
 
 class QueryResponse(BaseModel):
     result: dict | str
 
+class BatchQueryRequest(BaseModel):
+    questions: List[str] = Field(
+        ..., min_length=1, max_length=BATCH_MAX_QUESTIONS,
+        description="Natural language questions to be processed"
+    )
+    parallelism: conint(ge=1, le=64) = Field(
+        BATCH_PARALLELISM, description="Maximum questions processed concurrently"
+    )
+
+class BatchQueryResponse(BaseModel):
+    results: List[dict]
+
 @router.post("/query", response_model=QueryResponse, summary="Process natural language query")
-async def query_nlqs(req: QueryRequest):
+async def query_nlqs(req: QueryRequest, request: Request):
     """
     Endpoint to accept a natural language question and return the query results.
 
@@ -32,11 +66,106 @@ async def query_nlqs(req: QueryRequest):
         QueryResponse: Response containing result data or error details.
 
     Raises:
+        HTTPException 400 if stream=true is combined with page_size or page_token.
         HTTPException 500 if internal processing fails.
     """
+    if req.stream:
+        if req.page_token or req.page_size:
+            # A stream always starts at the first row and sends every row
+            raise HTTPException(status_code=400,
+                                detail="page_size and page_token cannot be combined with stream=true.")
+        if "text/event-stream" in request.headers.get("accept", ""):
+            return _event_stream(req.question)
+        return StreamingResponse(_ndjson(req.question), media_type="application/x-ndjson")
+
     try:
-        response = await handle_query(req.question)
+        response = await handle_query(req.question, req.page_size, req.page_token)
         return QueryResponse(result=response)
     except Exception as e:
         # Log error details here if you have logging configured
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
+
+
+@router.post("/query/batch", response_model=BatchQueryResponse, summary="Process a batch of questions")
+async def query_nlqs_batch(req: BatchQueryRequest):
+    """
+    Endpoint to accept a list of natural language questions and return their
+    results in the same order. Duplicate questions are answered once.
+
+    Args:
+        req (BatchQueryRequest): Request body containing the questions.
+
+    Returns:
+        BatchQueryResponse: One result per question, in order.
+
+    Raises:
+        HTTPException 500 if internal processing fails.
+    """
+    try:
+        results = await handle_batch(req.questions, req.parallelism)
+        return BatchQueryResponse(results=results)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal Server Error: {e}")
+
+
+@router.get("/query/stream", summary="Stream a natural language query as Server-Sent Events")
+async def query_nlqs_stream(
+    question: constr(min_length=1, strip_whitespace=True) = Query(
+        ..., description="Natural language question to be processed"
+    ),
+):
+    """
+    Streams the answer to a question as Server-Sent Events, for EventSource
+    clients. Each event is named after its type (meta, sources, token, columns,
+    rows, end, result, error) and carries the event as JSON.
+
+    Args:
+        question (str): Natural language question.
+
+    Returns:
+        StreamingResponse: A text/event-stream response.
+    """
+    return _event_stream(question)
+
+
+async def _ndjson(question: str):
+    # One JSON document per line; rows are flushed batch by batch
+    async for event in stream_query(question):
+        yield json.dumps(event, default=str) + "\n"
+
+
+async def _sse(question: str):
+    # One SSE message per event; tokens are flushed as the LLM produces them
+    async for event in stream_query(question):
+        yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+def _event_stream(question: str) -> StreamingResponse:
+    return StreamingResponse(
+        _sse(question),
+        media_type="text/event-stream",
+        # Keep proxies from buffering (or caching) the token stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _cache_stats() -> dict:
+    # Reports only caches already open: reading stats never opens one
+    stats = {}
+    translation_cache = peek_translation_cache()
+    if translation_cache is not None:
+        stats["translation_cache"] = translation_cache.stats()
+    stats["retrieval_cache"] = get_rag_runtime().cache.stats()
+    engine = peek_engine()
+    if engine is not None and engine.cache is not None:
+        stats["sql_result_cache"] = engine.cache.stats()
+    return stats
+
+
+@router.get("/stats", summary="Cache statistics")
+async def cache_stats():
+    """
+    Returns hit/miss counters for the service caches that are open. The
+    translation cache counts its rows in SQLite, so this runs in a thread.
+    """
+    return await asyncio.to_thread(_cache_stats)
@@ -0,0 +1,85 @@
+# app/utils/memory.py
+"""
+Per-process memory accounting, for checking how much memory workers share.
+
+Reads /proc/<pid>/smaps_rollup (Linux 4.14+):
+- rss: resident pages, shared ones counted in full by every process
+- pss: resident pages, shared ones split between the processes mapping them
+- uss: pages only this process maps (private clean + private dirty), i.e.
+  what killing the process would free; the number that grows per worker
+"""
+
+import os
+from typing import Dict, List, Optional
+
+_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Private_Clean": "private_clean",
+    "Private_Dirty": "private_dirty",
+    "Shared_Clean": "shared_clean",
+    "Shared_Dirty": "shared_dirty",
+}
+
+
+def process_memory(pid: int) -> Optional[Dict[str, int]]:
+    """
+    Returns the memory of a process in bytes (rss, pss, uss, shared), or None
+    if it is gone or /proc is unavailable.
+
+    Parameters:
+        pid (int): Process ID.
+    """
+    values = {}
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", encoding="ascii") as f:
+            for line in f:
+                name, _, rest = line.partition(":")
+                if name in _FIELDS:
+                    values[_FIELDS[name]] = int(rest.split()[0]) * 1024
+    except (OSError, ValueError):
+        return None
+    return {
+        "rss": values.get("rss", 0),
+        "pss": values.get("pss", 0),
+        "uss": values.get("private_clean", 0) + values.get("private_dirty", 0),
+        "shared": values.get("shared_clean", 0) + values.get("shared_dirty", 0),
+    }
+
+
+def child_pids(pid: int) -> List[int]:
+    """
+    Returns the direct children of a process (Linux), e.g. a launcher's workers.
+    """
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children", encoding="ascii") as f:
+                children.extend(int(child) for child in f.read().split())
+    except (OSError, ValueError):
+        pass
+    return sorted(set(children))
+
+
+def format_memory_report(pids: List[int], labels: Optional[Dict[int, str]] = None) -> str:
+    """
+    Renders a table of RSS/PSS/USS in MiB per process, with totals.
+    """
+    labels = labels or {}
+    lines = [f"{'process':>12} | {'pid':>7} | {'rss_mb':>8} | {'pss_mb':>8} | {'uss_mb':>8}"]
+    totals = {"rss": 0, "pss": 0, "uss": 0}
+    for pid in pids:
+        memory = process_memory(pid)
+        if memory is None:
+            continue
+        for key in totals:
+            totals[key] += memory[key]
+        lines.append(
+            f"{labels.get(pid, 'worker'):>12} | {pid:>7} | {memory['rss'] / 2 ** 20:>8.1f} | "
+            f"{memory['pss'] / 2 ** 20:>8.1f} | {memory['uss'] / 2 ** 20:>8.1f}"
+        )
+    lines.append(
+        f"{'total':>12} | {'':>7} | {totals['rss'] / 2 ** 20:>8.1f} | "
+        f"{totals['pss'] / 2 ** 20:>8.1f} | {totals['uss'] / 2 ** 20:>8.1f}"
+    )
+    return "\n".join(lines)
@@ -0,0 +1,62 @@
+# app/utils/text.py
+"""
+Text helpers shared by the caches and the orchestrator.
+"""
+
+import re
+import unicodedata
+
+# Number words folded to digits so "top five" and "top 5" normalize alike
+_NUMBER_WORDS = {
+    "zero": "0", "one": "1", "two": "2", "three": "3", "four": "4",
+    "five": "5", "six": "6", "seven": "7", "eight": "8", "nine": "9",
+    "ten": "10", "eleven": "11", "twelve": "12", "fifteen": "15",
+    "twenty": "20", "fifty": "50", "hundred": "100",
+}
+
+# Quoted values, kept verbatim: SQLite compares TEXT case-sensitively. A quote
+# preceded by a letter is an apostrophe ("customers' orders"), not a literal.
+_QUOTED = re.compile(r"(?<!\w)'[^']*'(?!\w)|\"[^\"]*\"")
+_PUNCTUATION = re.compile(r"[^\w\s'<>=.-]|(?<!\d)[.-]|[.-](?!\d)")
+_WHITESPACE = re.compile(r"\s+")
+_NUMBER_WORD = re.compile(r"\b(" + "|".join(_NUMBER_WORDS) + r")\b", re.IGNORECASE)
+
+
+def fold_number_words(text: str) -> str:
+    """
+    Replaces number words ("five") with digits ("5"), leaving other text untouched.
+    """
+    return _NUMBER_WORD.sub(lambda match: _NUMBER_WORDS[match.group(1).lower()], text)
+
+
+def _normalize_words(text: str) -> str:
+    text = fold_number_words(text.lower())
+    text = _PUNCTUATION.sub(" ", text)
+    return " ".join(token for token in _WHITESPACE.split(text) if token)
+
+
+def normalize_question(question: str) -> str:
+    """
+    Canonical form of a question for cache keys: Unicode-normalized, lowercased,
+    punctuation stripped (comparison operators, decimals and dates are kept),
+    number words folded to digits and whitespace collapsed. Quoted literals
+    are kept verbatim, so 'France' and 'france' stay distinct questions.
+
+    Parameters:
+        question (str): The raw user question.
+
+    Returns:
+        str: The normalized question.
+    """
+    if not question:
+        return ""
+
+    text = unicodedata.normalize("NFKC", question)
+    parts = []
+    position = 0
+    for match in _QUOTED.finditer(text):
+        parts.append(_normalize_words(text[position:match.start()]))
+        parts.append(match.group(0))
+        position = match.end()
+    parts.append(_normalize_words(text[position:]))
+    return " ".join(part for part in parts if part)
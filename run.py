@@ -2,12 +2,32 @@
 """
 Entrypoint script to run the FastAPI application using Uvicorn.
 
-Loads environment variables from a .env file and starts the server.
+Loads environment variables from a .env file and starts the server:
+- `python run.py`: one auto-reloading process, for development
+- `python run.py --workers 4`: production prefork launcher. The master
+  imports the app and preloads the RAG runtime (embedding model weights and
+  the memory-mapped FAISS index) once, freezes the garbage collector, binds
+  the listening socket, then forks the workers. Workers share the preloaded
+  pages copy-on-write and the index through the page cache, so each one adds
+  only its private memory. Crashed workers are restarted, backing off while
+  they keep crashing; a worker that fails to start (e.g. its lifespan
+  raises) stops the service. SIGTERM/SIGINT stop all workers gracefully.
+
+The master prints each worker's RSS/PSS/USS (unique memory) once the workers
+have started, and again on SIGUSR1.
 """
 
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
 import uvicorn
 from dotenv import load_dotenv, find_dotenv
-import logging
 
 # Load .env file if available
 dotenv_path = find_dotenv()
@@ -16,12 +36,196 @@ if dotenv_path:
 else:
     logging.warning(".env file not found. Proceeding without loading environment variables.")
 
+logger = logging.getLogger("nlqs.launcher")
+
+# Worker exit status when the app fails to start (uvicorn's own STARTUP_FAILURE)
+WORKER_STARTUP_FAILED = 3
+# A worker dying sooner than this after its start counts as a fast failure;
+# consecutive fast failures back off exponentially, up to MAX_RESTART_DELAY
+MIN_WORKER_UPTIME = 10.0
+MAX_RESTART_DELAY = 30.0
+
+
+def preload_app():
+    """
+    Imports the application and loads the RAG runtime in the master process.
+
+    Nothing here may start threads or open network connections: those would
+    not survive fork(). Models are loaded but not run, and SQLite connections
+    are reopened by each worker after fork.
+    """
+    from app.main import app
+    from app.rag.qa import get_rag_runtime
+
+    try:
+        get_rag_runtime().load()
+        logger.info("Preloaded the RAG runtime; workers share it copy-on-write.")
+    except Exception as e:
+        logger.warning("RAG preload failed; each worker will load it on its own: %s", e)
+    return app
+
+
+def _bind(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _serve_worker(app, sock: socket.socket, log_level: str):
+    # Runs in a forked child: default signal handling, then uvicorn's own
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1, signal.SIGALRM):
+        signal.signal(signum, signal.SIG_DFL)
+    server = uvicorn.Server(uvicorn.Config(app, log_level=log_level, lifespan="on"))
+    code = 0
+    try:
+        server.run(sockets=[sock])
+    except SystemExit as e:
+        # uvicorn exits this way when startup (e.g. the lifespan) fails
+        code = e.code if isinstance(e.code, int) else 1
+    except BaseException:
+        logger.exception("Worker %d crashed", os.getpid())
+        code = 1
+    finally:
+        if not server.started:
+            code = WORKER_STARTUP_FAILED
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+
+
+def serve_prefork(host: str, port: int, workers: int, preload: bool = True,
+                  report_after: float = 10, log_level: str = "info") -> int:
+    """
+    Runs the prefork master: preloads, binds, forks and supervises workers.
+
+    Workers that crash are restarted, after an exponentially growing delay
+    while they keep dying within MIN_WORKER_UPTIME. A worker that fails to
+    start stops the whole service: restarting it would fail the same way.
+
+    Parameters:
+        host (str): Interface to listen on.
+        port (int): TCP port, shared by every worker.
+        workers (int): Worker processes.
+        preload (bool): Import the app and load the RAG runtime before forking.
+        report_after (float): Seconds after start to print the memory report (0 = never).
+        log_level (str): Uvicorn log level.
+
+    Returns:
+        int: Exit status for the launcher (WORKER_STARTUP_FAILED if a worker failed to start).
+    """
+    from app.utils.memory import format_memory_report
+
+    if preload:
+        app = preload_app()
+    else:
+        # Import only; every worker builds its own RAG runtime
+        from app.main import app
+
+    sock = _bind(host, port)
+    # Objects allocated so far are never collected: the collector would
+    # otherwise write to their headers in every worker, un-sharing the pages
+    gc.freeze()
+
+    # pid -> (slot, start time); consecutive fast failures per slot
+    slots = {}
+    fast_failures = [0] * workers
+    stopping = False
+    status = 0
+
+    def spawn(slot: int):
+        pid = os.fork()
+        if pid == 0:
+            _serve_worker(app, sock, log_level)
+        slots[pid] = (slot, time.monotonic())
+
+    def stop(signum=None, frame=None):
+        nonlocal stopping
+        stopping = True
+        for pid in list(slots):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def report(signum, frame):
+        labels = {os.getpid(): "master"}
+        print(format_memory_report([os.getpid(), *sorted(slots)], labels), flush=True)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGUSR1, report)
+    signal.signal(signal.SIGALRM, report)
+
+    for slot in range(workers):
+        spawn(slot)
+    logger.info("Serving on %s:%d with %d workers (preload=%s)", host, port, workers, preload)
+    if report_after > 0:
+        signal.alarm(max(1, int(report_after)))
+
+    while slots:
+        try:
+            pid, wait_status = os.wait()
+        except ChildProcessError:
+            break
+        entry = slots.pop(pid, None)
+        if entry is None or stopping:
+            continue
+        slot, started = entry
+
+        if os.WIFEXITED(wait_status) and os.WEXITSTATUS(wait_status) == WORKER_STARTUP_FAILED:
+            logger.error("Worker %d failed to start; stopping the service", pid)
+            status = WORKER_STARTUP_FAILED
+            stop()
+            continue
+
+        if time.monotonic() - started < MIN_WORKER_UPTIME:
+            fast_failures[slot] += 1
+        else:
+            fast_failures[slot] = 0
+        delay = min(MAX_RESTART_DELAY, 2.0 ** (fast_failures[slot] - 1)) if fast_failures[slot] else 0
+        logger.warning("Worker %d exited (status %d); restarting in %.0fs", pid, wait_status, delay)
+        # Sleep in short steps so SIGTERM during a long backoff is not delayed
+        resume = time.monotonic() + delay
+        while not stopping and time.monotonic() < resume:
+            time.sleep(0.1)
+        if not stopping:
+            spawn(slot)
+    sock.close()
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", "0")),
+                        help="Prefork worker processes (0 = one auto-reloading development server)")
+    parser.add_argument("--no-preload", action="store_true",
+                        help="Let every worker load its own RAG runtime (for comparison)")
+    parser.add_argument("--memory-report-after", type=float, default=10,
+                        help="Seconds after start to print per-worker memory (0 = never)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if args.workers <= 0:
+        # Run the app with auto-reload enabled for development convenience
+        uvicorn.run(
+            "app.main:app",
+            host=args.host,
+            port=args.port,
+            reload=True,  # Disable in production for performance and stability
+            log_level=args.log_level,
+        )
+        return
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    sys.exit(serve_prefork(args.host, args.port, args.workers, not args.no_preload,
+                           args.memory_report_after, args.log_level))
+
+
 if __name__ == "__main__":
-    # Run the app with auto-reload enabled for development convenience
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,  # Disable in production for performance and stability
-        log_level="info",
-    )
+    main()
@@ -0,0 +1,129 @@
+# scripts/bench_embeddings.py
+"""
+Benchmark of the embedding backends (PyTorch vs int8 ONNX Runtime).
+
+Embeds a corpus of chunks and a set of queries with each backend and reports:
+- indexing throughput in docs/sec
+- single-query latency (median and p95)
+- recall@k of each backend's top-k chunks against the PyTorch baseline
+
+The corpus is the chunked PDF when present, else synthetic sentences.
+
+Usage:
+    python -m scripts.bench_embeddings --backends torch onnx --threads 4 --k 3
+"""
+
+import argparse
+import os
+import random
+import statistics
+import time
+
+import numpy as np
+
+from app.rag.embedder import BACKENDS, create_embedder
+
+PDF_PATH = "data/sample.pdf"
+
+QUERIES = [
+    "What is the refund policy?",
+    "How do I reset my password?",
+    "Which regions are covered by the warranty?",
+    "Summarize the quarterly revenue results",
+    "Who approves travel expenses?",
+    "What are the data retention rules?",
+    "How long does shipping take?",
+    "List the supported payment methods",
+]
+
+_WORDS = (
+    "customer order invoice refund shipping warranty password account region revenue "
+    "quarter policy expense travel approval payment method retention data support team "
+    "product service contract renewal discount delivery return report budget manager"
+).split()
+
+
+def load_corpus(n_docs: int, chunk_size: int) -> list:
+    """
+    Returns chunk texts from the sample PDF, or synthetic sentences without it.
+    """
+    if os.path.exists(PDF_PATH):
+        from app.rag.loader import iter_chunks
+        texts = [c.page_content for _, _, chunks in iter_chunks([PDF_PATH], chunk_size, 50) for c in chunks]
+        if texts:
+            return (texts * (n_docs // len(texts) + 1))[:n_docs]
+
+    rng = random.Random(0)
+    return [
+        " ".join(rng.choice(_WORDS) for _ in range(rng.randint(40, chunk_size // 6)))
+        for _ in range(n_docs)
+    ]
+
+
+def top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> list:
+    scores = queries @ corpus.T
+    return [set(np.argsort(-row)[:k]) for row in scores]
+
+
+def bench_backend(backend: str, corpus: list, batch_size: int, threads: int, repeats: int) -> dict:
+    started = time.perf_counter()
+    embedder = create_embedder(backend, batch_size=batch_size, threads=threads)
+    load_s = time.perf_counter() - started
+
+    embedder.embed_documents(corpus[:batch_size])  # warm up
+    started = time.perf_counter()
+    doc_vectors = np.asarray(embedder.embed_documents(corpus), dtype=np.float32)
+    index_s = time.perf_counter() - started
+
+    latencies = []
+    for _ in range(repeats):
+        for query in QUERIES:
+            started = time.perf_counter()
+            embedder.embed_query(query)
+            latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+    query_vectors = embedder.embed_documents(QUERIES)
+
+    return {
+        "backend": backend,
+        "load_s": round(load_s, 2),
+        "docs_per_s": round(len(corpus) / index_s, 1),
+        "query_p50_ms": round(statistics.median(latencies), 2),
+        "query_p95_ms": round(latencies[int(0.95 * (len(latencies) - 1))], 2),
+        "_docs": doc_vectors,
+        "_queries": np.asarray(query_vectors, dtype=np.float32),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--backends", nargs="+", choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--repeats", type=int, default=10)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.docs, args.chunk_size)
+    results = [bench_backend(b, corpus, args.batch_size, args.threads, args.repeats) for b in args.backends]
+
+    # Recall of each backend's top-k against the first backend (PyTorch by default)
+    baseline = results[0]
+    expected = top_k(baseline["_docs"], baseline["_queries"], args.k)
+    for row in results:
+        found = top_k(row["_docs"], row["_queries"], args.k)
+        row[f"recall@{args.k}"] = round(
+            statistics.mean(len(f & e) / args.k for f, e in zip(found, expected)), 3
+        )
+
+    columns = [c for c in results[0] if not c.startswith("_")]
+    print(f"{len(corpus)} docs, batch size {args.batch_size}, threads {args.threads or 'default'}")
+    print(" | ".join(f"{c:>14}" for c in columns))
+    for row in results:
+        print(" | ".join(f"{row[c]!s:>14}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
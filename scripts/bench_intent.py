@@ -0,0 +1,148 @@
+# scripts/bench_intent.py
+"""
+Accuracy and latency report for the intent classifier.
+
+Compares, on a labelled question set (disjoint from the centroid examples):
+- legacy: the previous 15-keyword substring loop
+- rules: the precompiled single-pass matcher alone
+- rules+embedding: with the nearest-centroid tier for ambiguous questions
+
+and reports accuracy, SQL questions misrouted to RAG (each one costs a
+wasted LLM call), the share of questions reaching the embedding tier, and
+per-question latency (p50/p99).
+
+Usage:
+    python -m scripts.bench_intent [--no-embeddings] [--repeats 200]
+"""
+
+import argparse
+import statistics
+import time
+
+from app.core.intent import classify_rules, predict_intent
+
+LABELLED = [
+    # SQL, including inflections the keyword loop missed
+    ("Show me all customers in Germany", "sql"),
+    ("counting the orders by region", "sql"),
+    ("averages of invoice amounts per month", "sql"),
+    ("Which five products have the highest margin?", "sql"),
+    ("How many employees work in sales?", "sql"),
+    ("total sales for 2023", "sql"),
+    ("Listing customers who churned", "sql"),
+    ("Revenue per customer last quarter", "sql"),
+    ("Orders shipped later than 5 days", "sql"),
+    ("What is the median delivery time?", "sql"),
+    ("Rank stores by footfall", "sql"),
+    ("products sorted by price descending", "sql"),
+    ("Customers grouped by signup year", "sql"),
+    ("maximum discount given to a single order", "sql"),
+    ("Give me the number of refunds this year", "sql"),
+    ("Which city has the most customers?", "sql"),
+    ("invoices between January and March", "sql"),
+    ("Sum of payments received yesterday", "sql"),
+    ("customers from Brazil", "sql"),
+    ("top 3 suppliers by rating", "sql"),
+    ("orders with status pending", "sql"),
+    ("What was the lowest price for product 42?", "sql"),
+    ("Display tickets opened today", "sql"),
+    ("Tally of reviews with five stars", "sql"),
+    ("employees hired in 2021 in the London office", "sql"),
+    # RAG
+    ("What is the refund policy for damaged goods?", "rag"),
+    ("Explain the onboarding checklist", "rag"),
+    ("Why do we require two-factor authentication?", "rag"),
+    ("Summarize the annual security report", "rag"),
+    ("How do I request parental leave?", "rag"),
+    ("Describe the incident escalation path", "rag"),
+    ("What does the SLA say about downtime credits?", "rag"),
+    ("Tell me about the data retention guidelines", "rag"),
+    ("What is the purpose of the code of conduct?", "rag"),
+    ("How should I report a phishing email?", "rag"),
+    ("What are the steps to onboard a new vendor?", "rag"),
+    ("Who approves exceptions to the travel policy?", "rag"),
+    ("What are the eligibility rules for the bonus scheme?", "rag"),
+    ("Is remote work allowed from abroad?", "rag"),
+    ("What happens when a contract expires?", "rag"),
+    ("Can contractors access the internal wiki?", "rag"),
+    ("According to the handbook, how many vacation days do we get?", "rag"),
+    ("What is covered by the hardware warranty?", "rag"),
+    ("Where can I find the brand guidelines?", "rag"),
+    ("What is the difference between the basic and premium plans?", "rag"),
+]
+
+_LEGACY_KEYWORDS = [
+    "show", "list", "count", "top", "group by", "from", "where", "order by",
+    "most", "least", "total", "average", "sum", "max", "min"
+]
+
+
+def classify_legacy(question: str) -> str:
+    """
+    The previous classifier, kept here as the baseline.
+    """
+    question_lower = f" {question.lower()} "
+    for keyword in _LEGACY_KEYWORDS:
+        if f" {keyword} " in question_lower:
+            return "sql"
+    return "rag"
+
+
+def evaluate(name: str, classify, repeats: int) -> dict:
+    predictions = [classify(question) for question, _ in LABELLED]  # also warms caches
+    latencies = []
+    for question, _ in LABELLED:
+        started = time.perf_counter()
+        for _ in range(repeats):
+            classify(question)
+        latencies.append((time.perf_counter() - started) / repeats * 1e6)
+    latencies.sort()
+
+    correct = sum(p == label for p, (_, label) in zip(predictions, LABELLED))
+    misrouted = sum(p == "rag" and label == "sql" for p, (_, label) in zip(predictions, LABELLED))
+    return {
+        "classifier": name,
+        "accuracy": round(correct / len(LABELLED), 3),
+        "sql_to_rag": misrouted,
+        "p50_us": round(statistics.median(latencies), 1),
+        "p99_us": round(latencies[int(0.99 * (len(latencies) - 1))], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--no-embeddings", action="store_true", help="Skip the embedding tier")
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    results = [
+        evaluate("legacy", classify_legacy, args.repeats),
+        evaluate("rules", lambda q: predict_intent(q, use_embeddings=False).intent, args.repeats),
+    ]
+    if not args.no_embeddings:
+        try:
+            # Fewer repeats: each ambiguous question is a model forward pass
+            results.append(evaluate(
+                "rules+embedding", lambda q: predict_intent(q, use_embeddings=True).intent,
+                max(1, args.repeats // 20),
+            ))
+        except Exception as e:
+            print(f"Embedding tier unavailable: {e}")
+
+    ambiguous = sum(
+        predict_intent(question, use_embeddings=False).confidence < 0.75 for question, _ in LABELLED
+    )
+    print(f"{len(LABELLED)} labelled questions, {ambiguous} below the rule confidence threshold")
+    columns = list(results[0])
+    print(" | ".join(f"{c:>16}" for c in columns))
+    for row in results:
+        print(" | ".join(f"{row[c]!s:>16}" for c in columns))
+
+    for question, label in LABELLED:
+        prediction = classify_rules(question)
+        if prediction.intent != label:
+            print(f"  rules miss: {question!r} -> {prediction.intent} ({prediction.confidence})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+# scripts/bench_schema_pruning.py
+"""
+Benchmark of full vs relevance-pruned schema prompts as the schema grows.
+
+Generates synthetic SQLite databases with N tables (linked by foreign keys),
+then for a set of questions with a known target table reports:
+- prompt tokens with the full schema vs the pruned schema
+- time to build each prompt (schema lookup + table retrieval)
+- recall of the target table in the pruned schema
+- optionally, end-to-end translation latency against the configured LLM (--llm)
+
+Usage:
+    python -m scripts.bench_schema_pruning --sizes 10 50 200 500
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+from functools import lru_cache
+
+from app.core.prompt import get_sql_prompt
+from app.db.schema import SchemaProvider, render_schema
+from app.db.schema_index import SchemaIndex
+
+ENTITIES = {
+    "customers": ["name", "country", "signup_date", "email"],
+    "orders": ["customer_id", "total_amount", "order_date", "status"],
+    "products": ["title", "category", "unit_price", "stock"],
+    "invoices": ["order_id", "amount_due", "due_date", "paid"],
+    "payments": ["invoice_id", "amount", "paid_at", "method"],
+    "shipments": ["order_id", "carrier", "shipped_at", "tracking_code"],
+    "suppliers": ["company", "country", "rating", "contact_email"],
+    "employees": ["full_name", "department", "hire_date", "salary"],
+    "tickets": ["customer_id", "subject", "opened_at", "priority"],
+    "reviews": ["product_id", "stars", "review_text", "reviewed_at"],
+}
+PREFIXES = ["", "eu_", "us_", "apac_", "archive_", "staging_", "legacy_", "partner_"]
+
+QUESTIONS = [
+    ("Show the top 5 customers by signup date", "customers"),
+    ("What is the total amount of orders last month?", "orders"),
+    ("List products in the electronics category", "products"),
+    ("Which invoices are not paid yet?", "invoices"),
+    ("Average salary per department", "employees"),
+    ("How many shipments did each carrier handle?", "shipments"),
+    ("Count reviews with five stars", "reviews"),
+    ("Which suppliers have a rating below 3?", "suppliers"),
+]
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    try:
+        import tiktoken
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:
+        # Not installed, or the BPE file cannot be downloaded
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Counts prompt tokens with tiktoken when available, else estimates ~4 chars/token.
+    """
+    encoding = _encoding()
+    return len(encoding.encode(text)) if encoding else len(text) // 4
+
+
+def build_database(path: str, n_tables: int):
+    """
+    Creates a schema of n_tables tables cycling through entities and prefixes,
+    with foreign keys from child entities to their parents in the same prefix.
+    """
+    conn = sqlite3.connect(path)
+    names = list(ENTITIES)
+    for i in range(n_tables):
+        entity = names[i % len(names)]
+        round_ = i // len(names)
+        prefix = PREFIXES[round_ % len(PREFIXES)] + (f"v{round_ // len(PREFIXES)}_" if round_ >= len(PREFIXES) else "")
+        columns = ["id INTEGER PRIMARY KEY"]
+        for column in ENTITIES[entity]:
+            parent = column[:-3] + "s" if column.endswith("_id") else None
+            if parent in ENTITIES:
+                columns.append(f"{column} INTEGER REFERENCES {prefix}{parent}(id)")
+            else:
+                columns.append(f"{column} TEXT")
+        conn.execute(f"CREATE TABLE {prefix}{entity} ({', '.join(columns)})")
+    conn.commit()
+    conn.close()
+
+
+def bench_size(n_tables: int, workdir: str, use_llm: bool) -> dict:
+    path = os.path.join(workdir, f"schema_{n_tables}.db")
+    build_database(path, n_tables)
+    provider = SchemaProvider(path)
+    index = SchemaIndex(provider=provider)
+
+    # Warm both paths once (introspection and schema embedding are one-off costs)
+    full_schema = provider.get_description()
+    started = time.perf_counter()
+    index.select_tables("warm up")
+    index_build = time.perf_counter() - started
+
+    full_tokens, pruned_tokens, full_ms, pruned_ms, hits = [], [], [], [], 0
+    llm_full, llm_pruned = [], []
+    for question, target in QUESTIONS:
+        started = time.perf_counter()
+        full_prompt = get_sql_prompt(provider.get_description(), question)
+        full_ms.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        selected = index.select_tables(question)
+        pruned_prompt = get_sql_prompt(
+            render_schema([t for t in provider.get_tables() if t["name"] in selected]), question
+        )
+        pruned_ms.append((time.perf_counter() - started) * 1000)
+
+        full_tokens.append(count_tokens(full_prompt))
+        pruned_tokens.append(count_tokens(pruned_prompt))
+        hits += target in selected
+
+        if use_llm:
+            llm_full.append(asyncio.run(_time_llm(full_prompt)))
+            llm_pruned.append(asyncio.run(_time_llm(pruned_prompt)))
+
+    result = {
+        "tables": n_tables,
+        "full_schema_chars": len(full_schema),
+        "index_build_s": round(index_build, 2),
+        "full_tokens": round(statistics.mean(full_tokens)),
+        "pruned_tokens": round(statistics.mean(pruned_tokens)),
+        "full_prompt_ms": round(statistics.median(full_ms), 2),
+        "pruned_prompt_ms": round(statistics.median(pruned_ms), 2),
+        "target_recall": round(hits / len(QUESTIONS), 2),
+    }
+    if use_llm:
+        result["full_llm_ms"] = round(statistics.median(llm_full))
+        result["pruned_llm_ms"] = round(statistics.median(llm_pruned))
+    return result
+
+
+async def _time_llm(prompt: str) -> float:
+    from app.core.llm import AsyncLLMClient
+    client = AsyncLLMClient()
+    try:
+        started = time.perf_counter()
+        await client.complete(prompt, temperature=0)
+        return (time.perf_counter() - started) * 1000
+    finally:
+        await client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 200, 500])
+    parser.add_argument("--llm", action="store_true",
+                        help="Also time translations against the configured LLM endpoint")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [bench_size(n, workdir, args.llm) for n in args.sizes]
+
+    columns = list(results[0])
+    print(" | ".join(f"{c:>16}" for c in columns))
+    for row in results:
+        print(" | ".join(f"{row[c]!s:>16}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
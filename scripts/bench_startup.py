@@ -0,0 +1,203 @@
+# scripts/bench_startup.py
+"""
+Startup-time benchmark: import cost of the application and worker cold start.
+
+Reports, as medians over --runs fresh interpreters:
+- import: `python -X importtime -c "import app.main"`, the total import time
+  and the heaviest top-level packages by their own (self) import time
+- first response: from launching uvicorn to the first HTTP response on
+  /health (any status), i.e. when a new worker can take traffic
+- ready: until /health stops reporting "warming" (RAG runtime loaded or failed)
+
+Each run is appended with its git commit to a JSONL results file, so the
+numbers can be tracked between commits (--compare).
+
+Usage:
+    python -m scripts.bench_startup [--runs 5] [--no-server] [--compare 10]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+from scripts.loadtest import free_port, git_revision
+
+RESULTS_PATH = "bench_results/startup.jsonl"
+
+_IMPORTTIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def import_profile(env: Dict[str, str]) -> Tuple[float, Dict[str, float]]:
+    """
+    Imports app.main in a fresh interpreter under -X importtime.
+
+    Returns:
+        tuple: Total import seconds of app.main and self seconds per top-level package.
+    """
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        env=env, capture_output=True, text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing app.main failed:\n{completed.stderr[-2000:]}")
+
+    total, packages = 0.0, {}
+    for line in completed.stderr.splitlines():
+        match = _IMPORTTIME.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, _, module = match.groups()
+        package = module.split(".")[0]
+        packages[package] = packages.get(package, 0.0) + int(self_us) / 1e6
+        if module == "app.main":
+            total = int(cumulative_us) / 1e6
+    return total, packages
+
+
+def server_startup(env: Dict[str, str], timeout: float) -> Tuple[float, Optional[float]]:
+    """
+    Launches the service and polls /health.
+
+    Returns:
+        tuple: Seconds to the first HTTP response, and to the end of warm-up
+        (None if it did not finish within the timeout).
+    """
+    port = free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    first_response = ready = None
+    try:
+        deadline = started + timeout
+        while time.perf_counter() < deadline and ready is None:
+            if process.poll() is not None:
+                raise RuntimeError(f"The service exited with code {process.returncode}")
+            try:
+                response = httpx.get(f"http://127.0.0.1:{port}/health", timeout=1)
+            except httpx.HTTPError:
+                time.sleep(0.01)
+                continue
+            elapsed = time.perf_counter() - started
+            if first_response is None:
+                first_response = elapsed
+            if response.status_code != 503:
+                ready = elapsed
+            else:
+                time.sleep(0.05)
+    finally:
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    if first_response is None:
+        raise RuntimeError(f"No response from the service within {timeout:.0f}s")
+    return first_response, ready
+
+
+def _median(values: List[Optional[float]]) -> Optional[float]:
+    values = [v for v in values if v is not None]
+    return round(statistics.median(values), 3) if values else None
+
+
+def compare(path: str, last: int):
+    """
+    Prints the most recent runs in the results file, oldest first.
+    """
+    if not os.path.exists(path):
+        print(f"❌ No results in {path} yet.")
+        return
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()][-last:]
+    columns = ["when", "commit", "label", "import_s", "first_response_s", "ready_s"]
+    print(" | ".join(f"{c:>16}" for c in columns))
+    for record in records:
+        commit = (record.get("commit") or "?") + ("*" if record.get("dirty") else "")
+        row = [record["timestamp"][:16], commit, record.get("label") or "",
+               record["import_s"], record.get("first_response_s"), record.get("ready_s")]
+        print(" | ".join(f"{v!s:>16}" for v in row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=12, help="Packages listed in the import breakdown")
+    parser.add_argument("--no-server", action="store_true", help="Only measure the import")
+    parser.add_argument("--timeout", type=float, default=120, help="Seconds to wait for the service")
+    parser.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra environment for the service (repeatable)")
+    parser.add_argument("--label", default="")
+    parser.add_argument("--results", default=RESULTS_PATH)
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--compare", type=int, metavar="N", help="Print the last N stored runs and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.results, args.compare)
+        return
+
+    env = dict(os.environ)
+    for assignment in args.env:
+        key, _, value = assignment.partition("=")
+        env[key] = value
+
+    totals, packages = [], {}
+    first_responses, readies = [], []
+    try:
+        for _ in range(args.runs):
+            total, run_packages = import_profile(env)
+            totals.append(total)
+            for package, seconds in run_packages.items():
+                packages.setdefault(package, []).append(seconds)
+        if not args.no_server:
+            for _ in range(args.runs):
+                first_response, ready = server_startup(env, args.timeout)
+                first_responses.append(first_response)
+                readies.append(ready)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return
+
+    heaviest = sorted(
+        ((package, statistics.median(values)) for package, values in packages.items()),
+        key=lambda item: item[1], reverse=True,
+    )[:args.top]
+    record = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        **git_revision(),
+        "label": args.label,
+        "runs": args.runs,
+        "import_s": _median(totals),
+        "first_response_s": _median(first_responses),
+        "ready_s": _median(readies),
+        "packages_s": {package: round(seconds, 4) for package, seconds in heaviest},
+    }
+
+    print(f"import app.main: {record['import_s']}s (median of {args.runs})")
+    print(f"{'package':>24} | {'self_ms':>9}")
+    for package, seconds in heaviest:
+        print(f"{package:>24} | {seconds * 1000:>9.1f}")
+    if not args.no_server:
+        print(f"first response: {record['first_response_s']}s, ready: {record['ready_s']}s")
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(args.results) or ".", exist_ok=True)
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"✅ Results appended to {args.results} ({record['commit'] or 'unknown commit'})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# scripts/bench_vector_index.py
+"""
+Benchmark of FAISS index types (flat, IVF-Flat, IVF-PQ, HNSW) as the corpus grows.
+
+Generates clustered, normalized MiniLM-sized vectors, builds each index type,
+writes it to disk, then loads it (memory-mapped by default) in a fresh process
+and reports:
+- build time and index file size (IVF-PQ also reads the flat file to re-rank)
+- recall@k against exact flat search
+- single-query p50/p99 search latency
+- resident memory after load + search, split into private (anon) and
+  file-backed (mmap'd, shareable) pages
+
+Usage:
+    python -m scripts.bench_vector_index --sizes 10000 100000 1000000
+"""
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+
+import faiss
+import numpy as np
+
+from app.rag.vector_index import (
+    INDEX_TYPES,
+    build_faiss_index,
+    read_faiss_index,
+    tune_search,
+    with_refinement,
+)
+
+DIM = 384
+
+
+def make_vectors(n: int, n_queries: int, seed: int = 0):
+    """
+    Returns (corpus, queries): Gaussian clusters on the unit sphere, and
+    queries perturbed from random corpus points.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(16, n // 100), DIM)).astype(np.float32)
+    corpus = centers[rng.integers(0, len(centers), n)] + 0.3 * rng.standard_normal((n, DIM)).astype(np.float32)
+    corpus /= np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = corpus[rng.integers(0, n, n_queries)] + 0.15 * rng.standard_normal((n_queries, DIM)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return corpus, queries
+
+
+def _memory_kb() -> dict:
+    # Linux-only breakdown of resident memory
+    values = {}
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(("RssAnon:", "RssFile:")):
+                    key, value = line.split(":")
+                    values[key] = int(value.split()[0])
+    except OSError:
+        pass
+    return values
+
+
+def _search_in_child(path: str, flat_path: str, queries: np.ndarray, k: int, mmap: bool):
+    """
+    Loads the index as the server does and runs single-query searches
+    (runs in a fresh process).
+    """
+    faiss.omp_set_num_threads(1)
+    before = _memory_kb()
+    index = read_faiss_index(path, mmap=mmap)
+    tune_search(index)
+    index = with_refinement(index, flat_path, mmap=mmap)
+
+    latencies, found = [], []
+    for query in queries:
+        started = time.perf_counter()
+        _, ids = index.search(query[None, :], k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        found.append(ids[0])
+
+    after = _memory_kb()
+    delta = {key: (after.get(key, 0) - before.get(key, 0)) / 1024 for key in ("RssAnon", "RssFile")}
+    return np.asarray(found), sorted(latencies), delta
+
+
+def bench(n: int, index_types, n_queries: int, k: int, mmap: bool, workdir: str) -> list:
+    corpus, queries = make_vectors(n, n_queries)
+    exact = faiss.IndexFlatL2(DIM)
+    exact.add(corpus)
+    _, expected = exact.search(queries, k)
+    # The flat index is kept on disk, as by the indexer, for IVF-PQ re-ranking
+    flat_path = os.path.join(workdir, f"exact_{n}.faiss")
+    faiss.write_index(exact, flat_path)
+    del exact
+
+    ctx = multiprocessing.get_context("spawn")
+    rows = []
+    for index_type in index_types:
+        started = time.perf_counter()
+        index = build_faiss_index(corpus, index_type)
+        build_s = time.perf_counter() - started
+        path = os.path.join(workdir, f"{index_type}_{n}.faiss")
+        faiss.write_index(index, path)
+        del index
+
+        with ctx.Pool(1) as pool:
+            found, latencies, memory = pool.apply(_search_in_child, (path, flat_path, queries, k, mmap))
+
+        recall = np.mean([len(set(f) & set(e)) / k for f, e in zip(found, expected)])
+        rows.append({
+            "vectors": n,
+            "type": index_type,
+            "build_s": round(build_s, 1),
+            "file_mb": round(os.path.getsize(path) / 2 ** 20, 1),
+            f"recall@{k}": round(float(recall), 3),
+            "p50_ms": round(latencies[len(latencies) // 2], 3),
+            "p99_ms": round(latencies[int(0.99 * (len(latencies) - 1))], 3),
+            "anon_mb": round(memory["RssAnon"], 1),
+            "file_rss_mb": round(memory["RssFile"], 1),
+        })
+        os.remove(path)
+    os.remove(flat_path)
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--types", nargs="+", choices=INDEX_TYPES, default=list(INDEX_TYPES))
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=3)
+    parser.add_argument("--no-mmap", action="store_true", help="Read indexes fully into memory")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = [row for n in args.sizes
+                   for row in bench(n, args.types, args.queries, args.k, not args.no_mmap, workdir)]
+
+    columns = list(results[0])
+    print(" | ".join(f"{c:>11}" for c in columns))
+    for row in results:
+        print(" | ".join(f"{row[c]!s:>11}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
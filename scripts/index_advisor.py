@@ -0,0 +1,112 @@
+# scripts/index_advisor.py
+"""
+Recommends (and optionally creates) indexes for the logged SQL workload.
+
+Reads the query families recorded by the executor (SQL_WORKLOAD_LOG_PATH),
+asks the index advisor for covering indexes, and prints per family:
+- calls and mean logged latency
+- estimated rows visited before/after and the projected speedup
+- with --replay, the measured median latency before/after and the measured
+  speedup (replayed on a fresh connection, bypassing the result cache)
+
+Usage:
+    python -m scripts.index_advisor [--replay] [--apply] [--repeats 5]
+"""
+
+import argparse
+import sqlite3
+import statistics
+import time
+from typing import Dict, Sequence
+
+from app.config import DB_PATH, SQL_WORKLOAD_LOG_PATH
+from app.db.index_advisor import advise, create_indexes
+from app.db.workload import WorkloadFamily, WorkloadLog
+
+
+def replay(families: Sequence[WorkloadFamily], db_path: str, repeats: int) -> Dict[str, float]:
+    """
+    Runs each family's example statement `repeats` times (after one warm-up
+    run) and returns the median latency in milliseconds per family.
+    """
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    timings = {}
+    try:
+        for family in families:
+            try:
+                conn.execute(family.example).fetchall()
+            except sqlite3.Error as e:
+                print(f"❌ Skipping {family.family[:60]!r}: {e}")
+                continue
+            samples = []
+            for _ in range(repeats):
+                started = time.perf_counter()
+                conn.execute(family.example).fetchall()
+                samples.append((time.perf_counter() - started) * 1000)
+            timings[family.family] = statistics.median(samples)
+    finally:
+        conn.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db", default=DB_PATH, help="Database the workload ran against")
+    parser.add_argument("--log", default=SQL_WORKLOAD_LOG_PATH, help="Workload log file")
+    parser.add_argument("--min-calls", type=int, default=1, help="Ignore rarer query families")
+    parser.add_argument("--apply", action="store_true", help="Create the recommended indexes")
+    parser.add_argument("--replay", action="store_true", help="Time the workload before/after")
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    log = WorkloadLog(args.log)
+    families = log.families(args.min_calls)
+    log.close()
+    if not families:
+        print(f"❌ No logged queries in {args.log}; run some SELECTs through the API first.")
+        return
+
+    advice, recommendations = advise(families, args.db)
+    if recommendations:
+        print("Recommended indexes (by estimated rows saved across the workload):")
+        for recommendation in recommendations:
+            print(f"  {recommendation.index.ddl};  -- {recommendation.benefit:,} rows saved, "
+                  f"{len(recommendation.families)} families")
+    else:
+        print("✅ No index would improve the logged workload.")
+
+    measured_before = replay(families, args.db, args.repeats) if args.replay else {}
+    measured_after = {}
+    if args.apply and recommendations:
+        created = create_indexes([r.index for r in recommendations], args.db)
+        print(f"✅ Created {len(created)} indexes: {', '.join(created)}")
+        if args.replay:
+            measured_after = replay(families, args.db, args.repeats)
+
+    rows = []
+    for item in advice:
+        row = {
+            "calls": item.family.calls,
+            "mean_ms": round(item.family.mean_ms, 2),
+            "rows_before": item.cost_before,
+            "rows_after": item.cost_after,
+            "projected_x": round(item.projected_speedup, 1),
+        }
+        before = measured_before.get(item.family.family)
+        if before is not None:
+            row["before_ms"] = round(before, 2)
+        after = measured_after.get(item.family.family)
+        if before is not None and after is not None:
+            row["after_ms"] = round(after, 2)
+            row["measured_x"] = round(before / max(after, 1e-3), 1)
+        row["family"] = item.family.family[:60]
+        rows.append(row)
+
+    columns = [c for c in max(rows, key=len) if c != "family"]
+    print(" | ".join(f"{c:>11}" for c in columns) + " | family")
+    for row in rows:
+        print(" | ".join(f"{row.get(c, '')!s:>11}" for c in columns) + f" | {row['family']}")
+
+
+if __name__ == "__main__":
+    main()
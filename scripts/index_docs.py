@@ -12,9 +12,17 @@ from app.rag.indexer import build_vector_index
 def main():
     paths = ["data/sample.pdf"]  # List your document files here
 
+    stats = {}
     try:
-        build_vector_index(paths)
+        build_vector_index(paths, stats=stats)
         print("✅ Indexed successfully!")
+        seconds = max(stats["seconds"], 1e-9)
+        print(
+            f"   {stats['files_changed']}/{stats['files']} files changed, "
+            f"{stats['pages']} pages ({stats['pages'] / seconds:.1f} pages/s), "
+            f"{stats['chunks_embedded']} chunks embedded ({stats['chunks_embedded'] / seconds:.1f} chunks/s), "
+            f"{stats['chunks_removed']} removed in {stats['seconds']:.1f}s"
+        )
     except Exception as e:
         logging.error(f"Failed to build vector index: {e}", exc_info=True)
         print("❌ Indexing failed. See logs for details.")
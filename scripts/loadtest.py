@@ -0,0 +1,459 @@
+# scripts/loadtest.py
+"""
+End-to-end load test for POST /api/query with a mixed SQL/RAG workload.
+
+Drives the service at a fixed concurrency (closed loop: each worker sends its
+next question when the previous answer arrives) or at a fixed arrival rate
+(open loop: Poisson arrivals at --rps, regardless of how fast answers come
+back), and reports per workload kind:
+- p50/p95/p99 and mean latency
+- throughput and error rate (HTTP errors, timeouts, and error results)
+- the mean time per pipeline stage, from the Server-Timing header
+
+Each run is appended to a JSONL results file with the git commit it ran on,
+so runs can be compared between commits with --compare.
+
+With --spawn the whole stack runs locally and offline: the benchmark
+database is generated if missing (scripts/make_bench_db.py), and the stub
+LLM (scripts/stub_llm.py) and the service are started on free ports with
+their caches and logs in a temporary directory. RAG questions need a FAISS
+index and the embedding model; build a synthetic one with
+`scripts.make_bench_db --docs N` and pass it as --index.
+
+Usage:
+    python -m scripts.loadtest --spawn --concurrency 32 --duration 30
+    python -m scripts.loadtest --spawn --rps 50 --rag-fraction 0 --llm-latency fixed:0.2 --cold
+    python -m scripts.loadtest --url http://127.0.0.1:8000 --concurrency 8 --label staging
+    python -m scripts.loadtest --compare 10
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import httpx
+
+from scripts.make_bench_db import COUNTRIES, POLICY_TOPICS, STATUSES, YEARS, create_bench_db
+
+RESULTS_PATH = "bench_results/loadtest.jsonl"
+
+# Question generators; the stub LLM answers each SQL one with matching canned SQL
+SQL_QUESTIONS: List[Callable[[random.Random], str]] = [
+    lambda rng: f"How many customers are in {rng.choice(COUNTRIES)}?",
+    lambda rng: f"Top {rng.choice([5, 10, 20])} customers by total order amount",
+    lambda rng: f"List {rng.choice(STATUSES)} orders placed after "
+                f"{rng.randint(*YEARS)}-{rng.randint(1, 12):02d}-01",
+    lambda rng: "Average age of customers per country",
+    lambda rng: f"Total revenue per month in {rng.randint(*YEARS)}",
+]
+RAG_QUESTIONS: List[Callable[[random.Random], str]] = [
+    lambda rng: f"Explain the {rng.choice(POLICY_TOPICS)}",
+    lambda rng: f"Summarize the {rng.choice(POLICY_TOPICS)}",
+    lambda rng: f"What is the review period in the {rng.choice(POLICY_TOPICS)}?",
+]
+
+
+class Sample(NamedTuple):
+    kind: str
+    started: float
+    seconds: float
+    ok: bool
+    error: Optional[str]
+    stages: Dict[str, float]
+
+
+def question_pool(size: int, rag_fraction: float, seed: int) -> List[tuple]:
+    """
+    Returns `size` (kind, question) pairs; the pool size bounds how many
+    distinct questions the run sends, and so the cache hit rates.
+    """
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(size):
+        if rng.random() < rag_fraction:
+            pool.append(("rag", rng.choice(RAG_QUESTIONS)(rng)))
+        else:
+            pool.append(("sql", rng.choice(SQL_QUESTIONS)(rng)))
+    return pool
+
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """
+    Parses "stage;dur=12.3, ..." into {stage: milliseconds}.
+    """
+    stages = {}
+    for entry in header.split(","):
+        name, *params = [part.strip() for part in entry.split(";")]
+        for param in params:
+            if param.startswith("dur="):
+                try:
+                    stages[name] = float(param[4:])
+                except ValueError:
+                    pass
+    return stages
+
+
+def _result_error(body: dict) -> Optional[str]:
+    """
+    Returns why a 200 response still carries an error result, or None.
+    """
+    result = body.get("result")
+    if not isinstance(result, dict):
+        return None
+    if result.get("query_type") == "error":
+        return result.get("message", "error")
+    inner = result.get("result")
+    if isinstance(inner, dict) and inner.get("query_type") == "ERROR":
+        return inner.get("summary") or inner.get("error", "ERROR")
+    return None
+
+
+async def send(client: httpx.AsyncClient, kind: str, question: str) -> Sample:
+    started = time.perf_counter()
+    error, stages = None, {}
+    try:
+        response = await client.post("/api/query", json={"question": question})
+        stages = parse_server_timing(response.headers.get("server-timing", ""))
+        if response.status_code != 200:
+            error = f"HTTP {response.status_code}"
+        else:
+            error = _result_error(response.json())
+    except httpx.HTTPError as e:
+        error = f"{type(e).__name__}: {e}"
+    return Sample(kind, started, time.perf_counter() - started, error is None, error, stages)
+
+
+async def run_closed_loop(client: httpx.AsyncClient, pool: List[tuple], concurrency: int,
+                          seconds: float, seed: int) -> List[Sample]:
+    samples: List[Sample] = []
+    deadline = time.perf_counter() + seconds
+
+    async def worker(rng: random.Random):
+        while time.perf_counter() < deadline:
+            samples.append(await send(client, *rng.choice(pool)))
+
+    await asyncio.gather(*(worker(random.Random(seed + i)) for i in range(concurrency)))
+    return samples
+
+
+async def run_open_loop(client: httpx.AsyncClient, pool: List[tuple], rps: float,
+                        seconds: float, seed: int) -> List[Sample]:
+    rng = random.Random(seed)
+    started = time.perf_counter()
+    arrival = started
+    tasks = []
+    while True:
+        arrival += rng.expovariate(rps)
+        if arrival - started >= seconds:
+            break
+        await asyncio.sleep(max(0.0, arrival - time.perf_counter()))
+        tasks.append(asyncio.create_task(send(client, *rng.choice(pool))))
+    return list(await asyncio.gather(*tasks))
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """
+    Nearest-rank percentile of an ascending list (q in 0..100).
+    """
+    if not sorted_values:
+        return 0.0
+    rank = max(1, min(len(sorted_values), math.ceil(q * len(sorted_values) / 100)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples: List[Sample]) -> Dict[str, dict]:
+    """
+    Latency percentiles (ms), throughput and error rate, overall and per kind.
+    Throughput counts completed requests over the time from the first request
+    to the last answer, so an open-loop run the service cannot keep up with
+    reports what it served, not the offered rate.
+    """
+    seconds = 0.0
+    if samples:
+        seconds = max(s.started + s.seconds for s in samples) - min(s.started for s in samples)
+    seconds = max(seconds, 1e-9)
+    groups = {"all": samples}
+    for sample in samples:
+        groups.setdefault(sample.kind, []).append(sample)
+    summary = {}
+    for kind, group in groups.items():
+        latencies = sorted(s.seconds * 1000 for s in group)
+        errors = sum(not s.ok for s in group)
+        summary[kind] = {
+            "requests": len(group),
+            "errors": errors,
+            "error_rate": round(errors / len(group), 4) if group else 0.0,
+            "throughput_rps": round(len(group) / seconds, 2),
+            "p50_ms": round(percentile(latencies, 50), 1),
+            "p95_ms": round(percentile(latencies, 95), 1),
+            "p99_ms": round(percentile(latencies, 99), 1),
+            "mean_ms": round(sum(latencies) / len(latencies), 1) if latencies else 0.0,
+        }
+    return summary
+
+
+def stage_breakdown(samples: List[Sample]) -> Dict[str, dict]:
+    """
+    Mean and p95 milliseconds per Server-Timing stage, over the requests that ran it.
+    """
+    stages: Dict[str, List[float]] = {}
+    for sample in samples:
+        for name, ms in sample.stages.items():
+            stages.setdefault(name, []).append(ms)
+    return {
+        name: {
+            "requests": len(values),
+            "mean_ms": round(sum(values) / len(values), 1),
+            "p95_ms": round(percentile(sorted(values), 95), 1),
+        }
+        for name, values in stages.items()
+    }
+
+
+def git_revision() -> Dict[str, object]:
+    """
+    Returns the current commit and whether the tree has uncommitted changes.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True
+        ).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_until_up(url: str, timeout: float, ready: Callable[[httpx.Response], bool]):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if ready(httpx.get(url, timeout=2)):
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout:.0f}s")
+
+
+def spawn_stack(args, workdir: str) -> tuple:
+    """
+    Starts the stub LLM and the service (after creating the benchmark
+    database if needed). Returns the service URL and the processes.
+    """
+    if not os.path.exists(args.db):
+        print(f"Generating {args.db} ({args.customers:,} customers, {args.orders:,} orders)...")
+        create_bench_db(args.db, args.customers, args.orders)
+
+    stub_port, app_port = free_port(), free_port()
+    env = dict(os.environ)
+    env.update({
+        "LLM_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+        "GROQ_API_KEY": env.get("GROQ_API_KEY") or "stub",
+        "DB_PATH": args.db,
+        "TRANSLATION_CACHE_PATH": os.path.join(workdir, "translation_cache.db"),
+        "SQL_WORKLOAD_LOG_PATH": os.path.join(workdir, "workload.db"),
+    })
+    if args.index:
+        env["RAG_INDEX_PATH"] = args.index
+    if args.cold:
+        env.update({"TRANSLATION_CACHE_ENABLED": "false", "SQL_RESULT_CACHE_ENABLED": "false"})
+    for assignment in args.env:
+        key, _, value = assignment.partition("=")
+        env[key] = value
+
+    log = open(os.path.join(workdir, "services.log"), "w")
+    processes = [subprocess.Popen(
+        [sys.executable, "-m", "scripts.stub_llm", "--port", str(stub_port), "--latency", args.llm_latency,
+         "--error-rate", str(args.llm_error_rate), "--seed", str(args.seed)],
+        env=env, stdout=log, stderr=subprocess.STDOUT,
+    )]
+    _wait_until_up(f"http://127.0.0.1:{stub_port}/v1/models", 30, lambda r: r.status_code == 200)
+    processes.append(subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(app_port),
+         "--workers", str(args.workers), "--log-level", "warning"],
+        env=env, stdout=log, stderr=subprocess.STDOUT,
+    ))
+    url = f"http://127.0.0.1:{app_port}"
+    # Ready, or degraded (RAG failed to load): either way the service answers
+    _wait_until_up(f"{url}/health", args.startup_timeout, lambda r: r.status_code == 200)
+    return url, processes
+
+
+def stop_stack(processes: List[subprocess.Popen]):
+    for process in reversed(processes):
+        process.terminate()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def run_load(args, url: str) -> tuple:
+    """
+    Runs the warm-up and measured phases; returns the measured samples.
+    """
+    pool = question_pool(args.distinct, args.rag_fraction, args.seed)
+    connections = args.concurrency if args.rps is None else max(64, int(args.rps * args.timeout))
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        for phase, seconds in (("warm-up", args.warmup), ("measured", args.duration)):
+            if seconds <= 0:
+                continue
+            print(f"{phase}: {seconds:.0f}s...")
+            if args.rps is None:
+                samples = await run_closed_loop(client, pool, args.concurrency, seconds, args.seed)
+            else:
+                samples = await run_open_loop(client, pool, args.rps, seconds, args.seed)
+        try:
+            server_stats = (await client.get("/api/stats")).json()
+        except (httpx.HTTPError, ValueError):
+            server_stats = None
+    return samples, server_stats
+
+
+def print_report(record: dict):
+    print(f"\n{record['config']['mode']} | throughput {record['summary']['all']['throughput_rps']} req/s")
+    columns = ["requests", "errors", "error_rate", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "mean_ms"]
+    print(f"{'kind':>8} | " + " | ".join(f"{c:>14}" for c in columns))
+    for kind, row in record["summary"].items():
+        print(f"{kind:>8} | " + " | ".join(f"{row[c]!s:>14}" for c in columns))
+
+    if record["stages"]:
+        print(f"\n{'stage':>20} | {'requests':>9} | {'mean_ms':>9} | {'p95_ms':>9}")
+        for name, row in sorted(record["stages"].items(), key=lambda item: -item[1]["mean_ms"]):
+            print(f"{name:>20} | {row['requests']:>9} | {row['mean_ms']:>9} | {row['p95_ms']:>9}")
+    for error in record["errors"]:
+        print(f"❌ {error}")
+
+
+def compare(path: str, last: int):
+    """
+    Prints the most recent runs in the results file, oldest first.
+    """
+    if not os.path.exists(path):
+        print(f"❌ No results in {path} yet.")
+        return
+    with open(path, encoding="utf-8") as f:
+        records = [json.loads(line) for line in f if line.strip()][-last:]
+    columns = ["when", "commit", "label", "mode", "requests", "rps", "p50_ms", "p95_ms", "p99_ms", "err_%"]
+    print(" | ".join(f"{c:>16}" for c in columns))
+    for record in records:
+        overall = record["summary"]["all"]
+        commit = (record.get("commit") or "?") + ("*" if record.get("dirty") else "")
+        row = [
+            record["timestamp"][:16], commit, record.get("label") or "", record["config"]["mode"],
+            overall["requests"], overall["throughput_rps"], overall["p50_ms"], overall["p95_ms"],
+            overall["p99_ms"], round(overall["error_rate"] * 100, 2),
+        ]
+        print(" | ".join(f"{v!s:>16}" for v in row))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="Service to test (ignored with --spawn)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Closed loop: requests in flight")
+    parser.add_argument("--rps", type=float, default=None, help="Open loop: arrival rate (overrides --concurrency)")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured seconds before the run")
+    parser.add_argument("--rag-fraction", type=float, default=0.3, help="Share of RAG questions")
+    parser.add_argument("--distinct", type=int, default=500, help="Distinct questions in the workload")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", default="", help="Free-form tag stored with the results")
+    parser.add_argument("--results", default=RESULTS_PATH, help="JSONL file the run is appended to")
+    parser.add_argument("--no-save", action="store_true", help="Do not store the results")
+    parser.add_argument("--compare", type=int, metavar="N", help="Print the last N stored runs and exit")
+
+    spawn = parser.add_argument_group("local stack (--spawn)")
+    spawn.add_argument("--spawn", action="store_true", help="Start the stub LLM and the service locally")
+    spawn.add_argument("--db", default="data/bench.db", help="Benchmark database (generated if missing)")
+    spawn.add_argument("--customers", type=int, default=10_000)
+    spawn.add_argument("--orders", type=int, default=100_000)
+    spawn.add_argument("--index", default=None, help="FAISS index for RAG questions (RAG_INDEX_PATH)")
+    spawn.add_argument("--llm-latency", default="lognormal:0.4,0.5", help="Stub LLM latency spec")
+    spawn.add_argument("--llm-error-rate", type=float, default=0.0, help="Stub LLM 503 rate")
+    spawn.add_argument("--workers", type=int, default=1, help="Service worker processes")
+    spawn.add_argument("--cold", action="store_true", help="Disable the translation and SQL result caches")
+    spawn.add_argument("--env", action="append", default=[], metavar="KEY=VALUE",
+                       help="Extra environment for the service (repeatable)")
+    spawn.add_argument("--startup-timeout", type=float, default=180)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(args.results, args.compare)
+        return
+    if args.duration <= 0:
+        parser.error("--duration must be positive")
+
+    workdir = tempfile.mkdtemp(prefix="nlqs-loadtest-")
+    processes = []
+    try:
+        url = args.url
+        if args.spawn:
+            url, processes = spawn_stack(args, workdir)
+            print(f"✅ Service on {url} (stub LLM latency {args.llm_latency})")
+        samples, server_stats = asyncio.run(run_load(args, url))
+    except RuntimeError as e:
+        print(f"❌ {e}; see {os.path.join(workdir, 'services.log')}")
+        stop_stack(processes)
+        return
+    stop_stack(processes)
+    shutil.rmtree(workdir, ignore_errors=True)
+
+    mode = f"rps={args.rps:g}" if args.rps is not None else f"concurrency={args.concurrency}"
+    config = {
+        "mode": mode,
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "rag_fraction": args.rag_fraction,
+        "distinct": args.distinct,
+        "url": None if args.spawn else url,
+    }
+    if args.spawn:
+        config.update({
+            "db": args.db, "index": args.index, "llm_latency": args.llm_latency,
+            "llm_error_rate": args.llm_error_rate, "workers": args.workers, "cold": args.cold,
+            "env": args.env,
+        })
+    record = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        **git_revision(),
+        "label": args.label,
+        "config": config,
+        "summary": summarize(samples),
+        "stages": stage_breakdown(samples),
+        # A few distinct failure reasons, to tell a broken run from a slow one
+        "errors": sorted({s.error for s in samples if s.error})[:5],
+        "server_stats": server_stats,
+    }
+    print_report(record)
+
+    if not args.no_save:
+        os.makedirs(os.path.dirname(args.results) or ".", exist_ok=True)
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+        print(f"✅ Results appended to {args.results} ({record['commit'] or 'unknown commit'})")
+
+
+if __name__ == "__main__":
+    main()
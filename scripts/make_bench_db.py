@@ -0,0 +1,178 @@
+# scripts/make_bench_db.py
+"""
+Generates a benchmark SQLite database (and optionally a document corpus) of
+configurable size for load tests.
+
+Tables, matching the canned SQL served by scripts/stub_llm.py:
+- customers(id, name, country, age, signup_date)
+- orders(id, customer_id, amount, status, order_date)
+
+Data is drawn from a seeded generator, so the same sizes and seed always give
+the same database. With --docs, synthetic policy documents are written as
+text files and indexed into a FAISS store (RAG_INDEX_PATH), which needs the
+embedding model to be available locally.
+
+Usage:
+    python -m scripts.make_bench_db --db data/bench.db --customers 100000 --orders 1000000
+    python -m scripts.make_bench_db --docs 200 --docs-dir data/bench_docs --index vectorstore/bench
+"""
+
+import argparse
+import datetime
+import os
+import random
+import sqlite3
+import time
+from typing import Iterator, List, Tuple
+
+COUNTRIES = [
+    "USA", "India", "Germany", "France", "Brazil", "Japan", "Canada", "Mexico",
+    "Spain", "Italy", "Nigeria", "Australia", "Kenya", "Poland", "Sweden", "Egypt",
+]
+STATUSES = ["pending", "shipped", "delivered", "cancelled", "refunded"]
+FIRST_NAMES = ["Alice", "Bob", "Charlie", "Diana", "Emeka", "Fatima", "Gao", "Hiro", "Ines", "Jonas"]
+LAST_NAMES = ["Smith", "Garcia", "Müller", "Dubois", "Silva", "Tanaka", "Kumar", "Okafor", "Nowak", "Rossi"]
+YEARS = (2019, 2024)
+
+POLICY_TOPICS = [
+    "refund policy", "travel expense policy", "parental leave", "data retention guidelines",
+    "incident escalation path", "onboarding checklist", "security awareness training",
+    "remote work policy", "procurement approvals", "code of conduct",
+]
+
+SCHEMA = """
+DROP TABLE IF EXISTS orders;
+DROP TABLE IF EXISTS customers;
+CREATE TABLE customers (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    country TEXT NOT NULL,
+    age INTEGER NOT NULL,
+    signup_date TEXT NOT NULL
+);
+CREATE TABLE orders (
+    id INTEGER PRIMARY KEY,
+    customer_id INTEGER NOT NULL REFERENCES customers(id),
+    amount REAL NOT NULL,
+    status TEXT NOT NULL,
+    order_date TEXT NOT NULL
+);
+"""
+
+
+def _random_date(rng: random.Random) -> str:
+    start = datetime.date(YEARS[0], 1, 1).toordinal()
+    end = datetime.date(YEARS[1], 12, 31).toordinal()
+    return datetime.date.fromordinal(rng.randint(start, end)).isoformat()
+
+
+def _customers(rng: random.Random, count: int) -> Iterator[Tuple]:
+    for i in range(1, count + 1):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        yield i, name, rng.choice(COUNTRIES), rng.randint(18, 80), _random_date(rng)
+
+
+def _orders(rng: random.Random, count: int, customers: int) -> Iterator[Tuple]:
+    for i in range(1, count + 1):
+        # One percent of the customers place a fifth of the orders
+        if rng.random() < 0.2:
+            customer_id = rng.randint(1, max(1, customers // 100))
+        else:
+            customer_id = rng.randint(1, customers)
+        yield i, customer_id, round(rng.lognormvariate(3.5, 0.8), 2), rng.choice(STATUSES), _random_date(rng)
+
+
+def create_bench_db(path: str, customers: int, orders: int, seed: int = 42, analyze: bool = True):
+    """
+    (Re)creates the benchmark database at `path`.
+
+    Parameters:
+        path (str): Database file; an existing file is replaced.
+        customers (int): Rows in customers.
+        orders (int): Rows in orders.
+        seed (int): Random seed, for reproducible data.
+        analyze (bool): Collect planner statistics (sqlite_stat1) afterwards.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executescript(SCHEMA)
+        conn.executemany("INSERT INTO customers VALUES (?, ?, ?, ?, ?)", _customers(rng, customers))
+        conn.executemany("INSERT INTO orders VALUES (?, ?, ?, ?, ?)", _orders(rng, orders, max(customers, 1)))
+        conn.commit()
+        if analyze:
+            conn.execute("PRAGMA analysis_limit = 1000")
+            conn.execute("ANALYZE")
+            conn.commit()
+    finally:
+        conn.close()
+
+
+def write_documents(directory: str, count: int, seed: int = 42) -> List[str]:
+    """
+    Writes `count` synthetic policy documents as text files.
+
+    Returns:
+        list[str]: The file paths written.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(count):
+        topic = POLICY_TOPICS[i % len(POLICY_TOPICS)]
+        paragraphs = [
+            f"{topic.capitalize()} (revision {i // len(POLICY_TOPICS) + 1}).",
+            *(
+                f"Section {n}: requests under the {topic} are reviewed within "
+                f"{rng.randint(2, 30)} days by the {rng.choice(['finance', 'people', 'security', 'legal'])} team. "
+                f"Employees in {rng.choice(COUNTRIES)} must attach form {rng.randint(100, 999)} "
+                f"and keep records for {rng.randint(1, 10)} years."
+                for n in range(1, rng.randint(4, 12))
+            ),
+        ]
+        path = os.path.join(directory, f"policy_{i:05d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n\n".join(paragraphs) + "\n")
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--db", default="data/bench.db", help="Database file to (re)create")
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--orders", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--docs", type=int, default=0, help="Synthetic policy documents to write and index")
+    parser.add_argument("--docs-dir", default="data/bench_docs")
+    parser.add_argument("--index", default="vectorstore/bench", help="FAISS index directory for --docs")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    create_bench_db(args.db, args.customers, args.orders, args.seed)
+    size_mb = os.path.getsize(args.db) / 1024 ** 2
+    print(f"✅ {args.db}: {args.customers:,} customers, {args.orders:,} orders, "
+          f"{size_mb:.1f} MB in {time.perf_counter() - started:.1f}s")
+
+    if args.docs:
+        paths = write_documents(args.docs_dir, args.docs, args.seed)
+        try:
+            from app.rag.indexer import build_vector_index
+
+            stats = {}
+            build_vector_index(paths, persist_path=args.index, stats=stats)
+            print(f"✅ Indexed {len(paths)} documents ({stats['chunks']} chunks) into {args.index}; "
+                  f"serve it with RAG_INDEX_PATH={args.index}")
+        except Exception as e:
+            print(f"❌ Indexing failed (is the embedding model available?): {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,33 @@
+# scripts/migrate_docstore.py
+"""
+Script to convert pickled FAISS docstores (index.pkl) into SQLite docstores.
+
+The indexer also migrates a store on its next run. Serving never unpickles:
+a store that still has index.pkl fails to load until it is converted here.
+
+Usage:
+    python -m scripts.migrate_docstore [persist_path ...]
+"""
+
+import logging
+import sys
+from app.rag.qa import DB_FAISS_PATH
+from app.rag.vector_index import migrate_pickle_docstore
+
+DEFAULT_PATHS = [DB_FAISS_PATH, "data/faiss_index"]
+
+def main():
+    paths = sys.argv[1:] or DEFAULT_PATHS
+
+    for path in paths:
+        try:
+            if migrate_pickle_docstore(path):
+                print(f"✅ Migrated docstore in {path}")
+            else:
+                print(f"   No pickled docstore in {path}")
+        except Exception as e:
+            logging.error(f"Failed to migrate docstore in {path}: {e}", exc_info=True)
+            print(f"❌ Migration failed for {path}. See logs for details.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+# scripts/stub_llm.py
+"""
+Local OpenAI-compatible LLM stub for offline load tests.
+
+Serves POST /v1/chat/completions (buffered or `stream: true` SSE) and
+GET /v1/models. Every completion waits for a latency drawn from a
+configurable distribution, then returns:
+- for SQL prompts (app/core/prompt.py): canned SQL against the benchmark
+  database built by scripts/make_bench_db.py, chosen by matching the question
+  against CANNED_SQL
+- for any other prompt (RAG): a canned answer of --answer-tokens words
+
+Latency specs:
+    fixed:0.3                       always 300 ms
+    uniform:0.1,0.5                 between 100 and 500 ms
+    normal:0.4,0.1                  mean 400 ms, stdev 100 ms (clamped at 0)
+    lognormal:0.4,0.6               median 400 ms, sigma 0.6 (long right tail)
+
+Point the service at it with LLM_BASE_URL=http://127.0.0.1:8100/v1 and any
+GROQ_API_KEY; scripts/loadtest.py --spawn does this for you.
+
+Usage:
+    python -m scripts.stub_llm [--port 8100] [--latency lognormal:0.4,0.6] [--error-rate 0.01]
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import re
+import time
+import uuid
+from typing import Callable, List, Optional, Tuple
+
+# (question pattern, SQL template filled with the pattern's named groups)
+CANNED_SQL: List[Tuple[re.Pattern, str]] = [
+    (re.compile(r"how many customers are in (?P<country>[\w ]+?)\??$", re.I),
+     "SELECT COUNT(*) AS customers FROM customers WHERE country = '{country}'"),
+    (re.compile(r"top (?P<n>\d+) customers by total order amount", re.I),
+     "SELECT c.name, c.country, SUM(o.amount) AS total FROM customers c "
+     "JOIN orders o ON o.customer_id = c.id GROUP BY c.id ORDER BY total DESC LIMIT {n}"),
+    (re.compile(r"list (?P<status>\w+) orders placed after (?P<date>[\d-]+)", re.I),
+     "SELECT id, customer_id, amount, order_date FROM orders "
+     "WHERE status = '{status}' AND order_date > '{date}' ORDER BY order_date LIMIT 100"),
+    (re.compile(r"average age of customers per country", re.I),
+     "SELECT country, AVG(age) AS avg_age, COUNT(*) AS customers FROM customers "
+     "GROUP BY country ORDER BY country"),
+    (re.compile(r"total revenue per month in (?P<year>\d{4})", re.I),
+     "SELECT substr(order_date, 1, 7) AS month, SUM(amount) AS revenue FROM orders "
+     "WHERE order_date BETWEEN '{year}-01-01' AND '{year}-12-31' GROUP BY month ORDER BY month"),
+]
+FALLBACK_SQL = "SELECT COUNT(*) AS customers FROM customers"
+
+_QUESTION = re.compile(r"^Question: (.*)$", re.M)
+
+ANSWER_WORDS = (
+    "According to the policy documents the request must be submitted through the "
+    "internal portal and approved by a manager before the deadline stated in section four"
+).split()
+
+
+def parse_latency(spec: str) -> Callable[[], float]:
+    """
+    Parses a latency spec ("fixed:0.3", "uniform:0.1,0.5", "normal:0.4,0.1",
+    "lognormal:0.4,0.6") into a sampler returning seconds.
+
+    Raises:
+        ValueError: If the spec is malformed or the distribution unknown.
+    """
+    kind, _, params = spec.partition(":")
+    try:
+        values = [float(v) for v in params.split(",")] if params else []
+    except ValueError:
+        raise ValueError(f"Invalid latency parameters in {spec!r}")
+    samplers = {
+        ("fixed", 1): lambda: values[0],
+        ("uniform", 2): lambda: random.uniform(values[0], values[1]),
+        ("normal", 2): lambda: max(0.0, random.gauss(values[0], values[1])),
+        ("lognormal", 2): lambda: random.lognormvariate(math.log(max(values[0], 1e-6)), values[1]),
+    }
+    sampler = samplers.get((kind, len(values)))
+    if sampler is None:
+        raise ValueError(
+            f"Invalid latency spec {spec!r}; expected fixed:S, uniform:LO,HI, "
+            f"normal:MEAN,STDEV or lognormal:MEDIAN,SIGMA"
+        )
+    return sampler
+
+
+def canned_sql(question: str) -> str:
+    """
+    Returns the canned SQL for a benchmark question (FALLBACK_SQL if none matches).
+    """
+    for pattern, template in CANNED_SQL:
+        match = pattern.search(question.strip())
+        if match:
+            return template.format(**match.groupdict())
+    return FALLBACK_SQL
+
+
+def reply_for(prompt: str, answer_tokens: int) -> str:
+    """
+    Picks the completion for a prompt: SQL for the translator, prose otherwise.
+    """
+    match = _QUESTION.search(prompt)
+    question = match.group(1) if match else ""
+    if "SQL generator" in prompt:
+        return canned_sql(question)
+    words = [ANSWER_WORDS[i % len(ANSWER_WORDS)] for i in range(max(answer_tokens, 1))]
+    return " ".join(words) + "."
+
+
+def _token_count(text: str) -> int:
+    # Rough word-piece estimate, good enough for usage accounting
+    return max(1, len(text) // 4)
+
+
+def create_app(latency: Callable[[], float], error_rate: float = 0.0,
+               answer_tokens: int = 60, tokens_per_second: float = 0.0):
+    """
+    Builds the stub ASGI app.
+
+    Parameters:
+        latency (callable): Returns the seconds to wait before the completion
+            (for streams, before the first token).
+        error_rate (float): Fraction of requests answered with HTTP 503.
+        answer_tokens (int): Words in a canned RAG answer.
+        tokens_per_second (float): Streamed token rate (0 sends them at once).
+    """
+    from fastapi import FastAPI, Request
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    app = FastAPI(title="Stub LLM")
+    app.state.requests = 0
+
+    @app.get("/v1/models")
+    async def models():
+        return {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "stub"}]}
+
+    @app.post("/v1/chat/completions")
+    @app.post("/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.requests += 1
+        if error_rate and random.random() < error_rate:
+            return JSONResponse(
+                status_code=503, content={"error": {"message": "stub overloaded", "type": "server_error"}}
+            )
+
+        prompt = "\n".join(str(m.get("content", "")) for m in body.get("messages", []))
+        content = reply_for(prompt, answer_tokens)
+        model = body.get("model", "stub")
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+        usage = {
+            "prompt_tokens": _token_count(prompt),
+            "completion_tokens": _token_count(content),
+            "total_tokens": _token_count(prompt) + _token_count(content),
+        }
+        await asyncio.sleep(latency())
+
+        if not body.get("stream"):
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": created,
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": content},
+                    "finish_reason": "stop",
+                }],
+                "usage": usage,
+            }
+
+        async def events():
+            def chunk(delta: dict, finish_reason: Optional[str] = None) -> str:
+                payload = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+                }
+                return f"data: {json.dumps(payload)}\n\n"
+
+            yield chunk({"role": "assistant", "content": ""})
+            for i, token in enumerate(re.findall(r"\S+\s*", content)):
+                if tokens_per_second > 0 and i:
+                    await asyncio.sleep(1 / tokens_per_second)
+                yield chunk({"content": token})
+            yield chunk({}, "stop")
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency", default="lognormal:0.4,0.5",
+                        help="Completion latency distribution (see module docstring)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests failing with 503")
+    parser.add_argument("--answer-tokens", type=int, default=60, help="Words in a canned RAG answer")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0,
+                        help="Streaming token rate (0 = send the whole answer at once)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    import uvicorn
+
+    random.seed(args.seed)
+    app = create_app(parse_latency(args.latency), args.error_rate, args.answer_tokens, args.tokens_per_second)
+    print(f"✅ Stub LLM on http://{args.host}:{args.port}/v1 (latency {args.latency})")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import orchestrator
+from app.core.intent import IntentPrediction
+from app.routes import query
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    calls = {"route": [], "embed": [], "running": 0, "peak": 0}
+
+    def predict(question):
+        intent = "rag" if "policy" in question.lower() else "sql"
+        return IntentPrediction(intent, 0.9, "rules")
+
+    async def embed(questions):
+        calls["embed"].append(list(questions))
+        return [[float(len(q))] for q in questions]
+
+    async def route(question, intent, page_size=None, embedding=None, max_distance=None):
+        calls["route"].append((question, intent, embedding))
+        calls["running"] += 1
+        calls["peak"] = max(calls["peak"], calls["running"])
+        await asyncio.sleep(0.01)
+        calls["running"] -= 1
+        return {"query_type": intent, "result": question}
+
+    monkeypatch.setattr(orchestrator, "predict_intent", predict)
+    monkeypatch.setattr(orchestrator, "embed_questions", embed)
+    monkeypatch.setattr(orchestrator, "_route", route)
+    return calls
+
+
+def test_duplicates_are_answered_once_in_order(pipeline):
+    questions = ["How many orders?", "What is the refund policy?", "how many orders", "  "]
+
+    results = asyncio.run(orchestrator.handle_batch(questions))
+
+    assert [r["query_type"] for r in results] == ["sql", "rag", "sql", "error"]
+    assert results[0] == results[2] == {"query_type": "sql", "result": "How many orders?"}
+    assert len(pipeline["route"]) == 2
+
+
+def test_rag_questions_are_embedded_in_one_call(pipeline):
+    questions = ["refund policy?", "orders by month", "shipping policy?"]
+
+    asyncio.run(orchestrator.handle_batch(questions))
+
+    assert pipeline["embed"] == [["refund policy?", "shipping policy?"]]
+    embeddings = {question: embedding for question, _, embedding in pipeline["route"]}
+    assert embeddings == {"refund policy?": [14.0], "orders by month": None, "shipping policy?": [16.0]}
+
+
+def test_parallelism_is_bounded(pipeline):
+    questions = [f"orders in {year}" for year in range(2000, 2012)]
+
+    asyncio.run(orchestrator.handle_batch(questions, parallelism=3))
+
+    assert len(pipeline["route"]) == 12
+    assert pipeline["peak"] == 3
+
+
+def test_failed_classification_reports_an_error(pipeline, monkeypatch):
+    def predict(question):
+        raise RuntimeError("classifier down")
+
+    monkeypatch.setattr(orchestrator, "predict_intent", predict)
+
+    results = asyncio.run(orchestrator.handle_batch(["orders"]))
+
+    assert pipeline["route"] == [("orders", "error", None)]
+    assert results[0]["query_type"] == "error"
+
+
+def test_batch_endpoint_validates_size(pipeline):
+    app = FastAPI()
+    app.include_router(query.router, prefix="/api")
+    client = TestClient(app)
+
+    assert client.post("/api/query/batch", json={"questions": []}).status_code == 422
+    response = client.post("/api/query/batch", json={"questions": ["a", "b"], "parallelism": 2})
+    assert response.status_code == 200
+    assert [r["result"] for r in response.json()["results"]] == ["a", "b"]
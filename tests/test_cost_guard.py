@@ -0,0 +1,64 @@
+import sqlite3
+
+import pytest
+
+from app.core import executor
+from app.core.cost_guard import ensure_limit
+from app.core.executor import SQLiteEngine
+from app.db.schema import SchemaProvider
+
+CROSS_JOIN = "SELECT * FROM t a, t b"
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "guard.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _grow(path, rows):
+    conn = sqlite3.connect(path)
+    conn.executemany("INSERT INTO t (v) VALUES (?)", ((str(i),) for i in range(rows)))
+    conn.commit()
+    conn.close()
+
+
+def test_row_counts_follow_inserts(db_path):
+    provider = SchemaProvider(db_path)
+    assert provider.get_tables()[0]["row_count"] == 0
+
+    _grow(db_path, 20_000)
+
+    assert provider.get_tables()[0]["row_count"] == 20_000
+
+
+def test_cross_join_rejected_once_table_grows(db_path, monkeypatch):
+    monkeypatch.setattr(executor, "SQL_COST_GUARD_ENABLED", True)
+    monkeypatch.setattr(executor, "SQL_MAX_QUERY_COST", 50_000_000)
+    monkeypatch.setattr(executor, "SQL_QUERY_TIMEOUT_SECONDS", 2)
+    engine = SQLiteEngine(db_path, pool_size=1, cache_results=False, log_workload=False)
+    try:
+        assert engine.execute(CROSS_JOIN)["query_type"] == "SELECT"
+
+        _grow(db_path, 20_000)
+
+        result = engine.execute(CROSS_JOIN)
+        assert result["error"] == "too_expensive"
+        # Rejected by the plan estimate, not cancelled by the deadline
+        assert result["estimated_cost"] > 50_000_000
+    finally:
+        engine.close()
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT * FROM t", "SELECT * FROM t LIMIT 101"),
+    ("SELECT * FROM t LIMIT 5", "SELECT * FROM t LIMIT 5"),
+    ("SELECT * FROM t LIMIT 500", "SELECT * FROM t LIMIT 500"),
+    ("SELECT * FROM t; -- all rows", "SELECT * FROM t LIMIT 101"),
+])
+def test_ensure_limit(sql, expected):
+    assert ensure_limit(sql, 101) == expected
@@ -0,0 +1,47 @@
+import gc
+import os
+
+from langchain_core.documents import Document
+
+from app.rag import docstore as docstore_module
+from app.rag.docstore import SQLiteDocstore
+
+
+def _write_store(path):
+    store = SQLiteDocstore(path)
+    store.add({"a": Document(page_content="Refunds need approval.", metadata={"page": 1})})
+    store.set_positions({0: "a"})
+    store.commit()
+    store.close()
+
+
+def test_readonly_docstores_are_tracked_until_closed(tmp_path):
+    path = str(tmp_path / "docstore.db")
+    _write_store(path)
+
+    first = SQLiteDocstore(path, readonly=True)
+    second = SQLiteDocstore(path, readonly=True)
+    assert {first, second} <= set(docstore_module._open_readonly)
+
+    first.close()
+    del second
+    gc.collect()
+    assert not any(store.path == path for store in docstore_module._open_readonly)
+
+
+def test_forked_child_reopens_its_own_connection(tmp_path):
+    path = str(tmp_path / "docstore.db")
+    _write_store(path)
+    store = SQLiteDocstore(path, readonly=True)
+    parent_conn = store._conn
+
+    pid = os.fork()
+    if pid == 0:
+        ok = store._conn is not parent_conn and store.search("a").page_content == "Refunds need approval."
+        os._exit(0 if ok else 1)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+    assert store._conn is parent_conn
+    assert store.position_map()[0] == "a"
+    store.close()
@@ -0,0 +1,102 @@
+import asyncio
+import shutil
+import sqlite3
+import threading
+
+import pytest
+
+from app.core import executor
+from app.core.executor import SQLiteEngine
+
+
+def _journal_mode(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA journal_mode").fetchone()[0]
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def sample_copy(tmp_path):
+    path = str(tmp_path / "sample.db")
+    shutil.copy("data/sample.db", path)
+    return path
+
+
+@pytest.mark.parametrize("configured, expected", [("", "delete"), ("wal", "wal")])
+def test_journal_mode_only_changes_when_configured(sample_copy, monkeypatch, configured, expected):
+    assert _journal_mode(sample_copy) == "delete"
+    monkeypatch.setattr(executor, "SQLITE_JOURNAL_MODE", configured)
+    engine = SQLiteEngine(sample_copy, pool_size=1, cache_results=False, log_workload=False)
+    try:
+        assert engine.execute("SELECT COUNT(*) FROM customers")["query_type"] == "SELECT"
+    finally:
+        engine.close()
+
+    assert _journal_mode(sample_copy) == expected
+
+
+@pytest.fixture
+def rows_db(tmp_path):
+    path = str(tmp_path / "rows.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (id INTEGER PRIMARY KEY, v TEXT)")
+    conn.executemany("INSERT INTO t (v) VALUES (?)", ((str(i),) for i in range(5000)))
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_stream_async_stops_on_disconnect_and_returns_reader(rows_db):
+    engine = SQLiteEngine(rows_db, pool_size=1, cache_results=False, log_workload=False)
+
+    async def read_one_batch():
+        stream = engine.stream_async("SELECT * FROM t", batch_size=100)
+        assert (await stream.__anext__())["type"] == "columns"
+        assert len((await stream.__anext__())["rows"]) == 100
+        await stream.aclose()
+
+    try:
+        asyncio.run(read_one_batch())
+        # The producer thread returns the reader once it sees the stop flag
+        assert engine._readers.get(timeout=5) is not None
+    finally:
+        engine.close()
+
+
+def test_stream_async_never_closes_generator_mid_fetch(monkeypatch):
+    engine = SQLiteEngine(":memory:", pool_size=1, cache_results=False, log_workload=False)
+    fetching, release, closed = threading.Event(), threading.Event(), threading.Event()
+    threads = {}
+
+    def stream(sql, batch_size, max_rows):
+        threads["fetch"] = threading.current_thread()
+        try:
+            yield {"type": "columns", "columns": ["v"]}
+            fetching.set()
+            release.wait(5)
+            yield {"type": "rows", "rows": [(1,)]}
+        finally:
+            threads["close"] = threading.current_thread()
+            closed.set()
+
+    monkeypatch.setattr(engine, "stream", stream)
+
+    async def disconnect_mid_fetch():
+        events = engine.stream_async("SELECT 1")
+        await events.__anext__()
+        pending = asyncio.ensure_future(events.__anext__())
+        await asyncio.to_thread(fetching.wait, 5)
+        # The client goes away while the second batch is being fetched
+        pending.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await pending
+        release.set()
+
+    try:
+        asyncio.run(disconnect_mid_fetch())
+        assert closed.wait(5)
+        assert threads["close"] is threads["fetch"]
+    finally:
+        engine.close()
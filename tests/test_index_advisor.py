@@ -0,0 +1,107 @@
+import sqlite3
+
+import pytest
+
+from app.db import index_advisor
+from app.db.index_advisor import IndexCandidate, advise, candidate_indexes
+from app.db.workload import WorkloadFamily
+
+COLUMNS = {
+    "customers": ["id", "name", "country", "signup_date"],
+    "orders": ["id", "customer_id", "amount", "status", "created_at"],
+}
+ROWIDS = {"customers": "id", "orders": "id"}
+
+BY_COUNTRY = "SELECT name FROM customers WHERE country = 'France'"
+BY_CUSTOMER = "SELECT id, amount FROM orders WHERE customer_id = 3 ORDER BY created_at DESC"
+
+
+@pytest.mark.parametrize("sql, expected", [
+    # Equality column, then the covering variant with the selected column
+    (BY_COUNTRY, [("customers", ("country",)), ("customers", ("country", "name"))]),
+    # Equality before range; SELECT * gets no covering variant
+    ("SELECT * FROM orders WHERE status = 'paid' AND created_at >= '2024-01-01'",
+     [("orders", ("status", "created_at"))]),
+    # Ordering column after equality; the rowid is never appended
+    (BY_CUSTOMER, [("orders", ("customer_id", "created_at")),
+                   ("orders", ("customer_id", "created_at", "amount"))]),
+    ("SELECT * FROM orders WHERE amount BETWEEN 10 AND 20", [("orders", ("amount",))]),
+    ("SELECT * FROM orders o WHERE o.status IN ('paid', 'open')", [("orders", ("status",))]),
+    ("SELECT COUNT(*) FROM orders", []),
+])
+def test_candidate_indexes(sql, expected):
+    assert candidate_indexes(sql, COLUMNS, ROWIDS) == [IndexCandidate(*c) for c in expected]
+
+
+def test_join_keys_are_candidates():
+    sql = ("SELECT c.name, SUM(o.amount) FROM customers c JOIN orders o ON o.customer_id = c.id "
+           "WHERE c.country = 'France' GROUP BY c.name")
+    candidates = candidate_indexes(sql, COLUMNS, ROWIDS)
+    assert IndexCandidate("orders", ("customer_id",)) in candidates
+    assert IndexCandidate("orders", ("customer_id", "amount")) in candidates
+    assert all(c.columns[0] == "country" for c in candidates if c.table == "customers")
+
+
+def test_covering_variant_respects_column_limit(monkeypatch):
+    monkeypatch.setattr(index_advisor, "MAX_INDEX_COLUMNS", 2)
+    sql = "SELECT id, amount, status FROM orders WHERE customer_id = 3"
+    assert candidate_indexes(sql, COLUMNS, ROWIDS) == [IndexCandidate("orders", ("customer_id",))]
+
+
+@pytest.fixture
+def shop(tmp_path):
+    path = str(tmp_path / "shop.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT, country TEXT, signup_date TEXT)")
+    conn.execute("CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER, amount REAL, "
+                 "status TEXT, created_at TEXT)")
+    conn.executemany("INSERT INTO customers (name, country) VALUES (?, ?)",
+                     [(f"c{i}", ("France", "Spain", "Peru")[i % 3]) for i in range(2000)])
+    conn.executemany("INSERT INTO orders (customer_id, amount, created_at) VALUES (?, ?, '2024')",
+                     [(i % 2000, i) for i in range(20000)])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def _family(name, sql, calls):
+    return WorkloadFamily(name, sql, calls, 1.0, 1.0)
+
+
+def test_advise_ranks_by_rows_saved(shop):
+    families = [
+        _family("orders", BY_CUSTOMER, 1),
+        _family("country", BY_COUNTRY, 100),
+        _family("stale", "SELECT * FROM removed_table", 50),
+    ]
+    advice, ranked = advise(families, shop)
+
+    assert [item.family.family for item in advice] == ["orders", "country"]
+    for item in advice:
+        assert item.indexes and item.cost_after < item.cost_before
+        assert item.projected_speedup > 10
+    assert [r.families for r in ranked] == [["country"], ["orders"]]
+    assert ranked[0].benefit == 100 * (advice[1].cost_before - advice[1].cost_after)
+    assert ranked[0].index == IndexCandidate("customers", ("country", "name"))
+
+
+def test_existing_index_is_not_recommended(shop):
+    conn = sqlite3.connect(shop)
+    conn.execute("CREATE INDEX idx_country ON customers (country)")
+    conn.commit()
+    conn.close()
+
+    advice, ranked = advise([_family("country", BY_COUNTRY, 100)], shop)
+
+    assert advice[0].indexes == []
+    assert advice[0].cost_after == advice[0].cost_before
+    assert ranked == []
+
+
+def test_scratch_failure_surfaces(shop, monkeypatch):
+    def broken(conn, row_counts):
+        raise sqlite3.DatabaseError("cannot copy schema")
+
+    monkeypatch.setattr(index_advisor, "_scratch_copy", broken)
+    with pytest.raises(sqlite3.DatabaseError, match="cannot copy schema"):
+        advise([_family("country", BY_COUNTRY, 1)], shop)
@@ -0,0 +1,103 @@
+import functools
+
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.rag import indexer
+from app.rag.indexer import build_vector_index, load_manifest
+from app.rag.loader import iter_chunks
+from app.rag.vector_index import load_vector_store, read_index_version
+
+DOCS = {
+    "refunds.txt": "Refunds above 500 EUR need a manager's approval.",
+    "travel.txt": "Travel is booked through the internal portal.",
+    "laptops.txt": "Laptops are replaced every three years.",
+}
+
+
+@pytest.fixture
+def corpus(tmp_path, monkeypatch):
+    embeddings = DeterministicFakeEmbedding(size=16)
+    monkeypatch.setattr(indexer, "get_embedder", lambda: embeddings)
+    # Parse inline; the process pool is exercised by the loader itself
+    monkeypatch.setattr(indexer, "iter_chunks", functools.partial(iter_chunks, workers=1))
+
+    paths = {}
+    for name, text in DOCS.items():
+        path = tmp_path / "docs" / name
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(text)
+        paths[name] = str(path)
+    return paths, str(tmp_path / "index"), embeddings
+
+
+def _build(paths, persist_path):
+    stats = {}
+    build_vector_index(list(paths), persist_path, stats=stats)
+    return stats
+
+
+def _contents(persist_path, embeddings):
+    store = load_vector_store(persist_path, embeddings, mmap=False)
+    try:
+        assert store.index.ntotal == len(store.index_to_docstore_id)
+        return sorted(doc.page_content for doc in store.similarity_search("policy", k=10))
+    finally:
+        store.docstore.close()
+
+
+def test_unchanged_files_are_skipped(corpus):
+    paths, persist_path, embeddings = corpus
+    first = _build(paths.values(), persist_path)
+    version = read_index_version(persist_path)
+
+    second = _build(paths.values(), persist_path)
+
+    assert first["files_changed"] == 3 and first["chunks_embedded"] == 3
+    assert second["files_changed"] == 0
+    assert second["chunks_embedded"] == second["chunks_removed"] == 0
+    assert read_index_version(persist_path) == version
+    assert _contents(persist_path, embeddings) == sorted(DOCS.values())
+
+
+def test_changed_file_replaces_its_chunks(corpus):
+    paths, persist_path, embeddings = corpus
+    _build(paths.values(), persist_path)
+    version = read_index_version(persist_path)
+    old_ids = load_manifest(persist_path)["files"][paths["travel.txt"]]["chunks"]
+
+    with open(paths["travel.txt"], "w") as f:
+        f.write("Travel must be approved two weeks in advance.")
+    stats = _build(paths.values(), persist_path)
+
+    assert stats["files_changed"] == 1
+    assert stats["chunks_embedded"] == stats["chunks_removed"] == 1
+    assert load_manifest(persist_path)["files"][paths["travel.txt"]]["chunks"] != old_ids
+    assert read_index_version(persist_path) != version
+    assert _contents(persist_path, embeddings) == sorted([
+        DOCS["refunds.txt"], DOCS["laptops.txt"], "Travel must be approved two weeks in advance.",
+    ])
+
+
+def test_removed_file_leaves_the_index(corpus):
+    paths, persist_path, embeddings = corpus
+    _build(paths.values(), persist_path)
+
+    remaining = [paths["refunds.txt"], paths["laptops.txt"]]
+    stats = _build(remaining, persist_path)
+
+    assert stats["files_changed"] == stats["chunks_embedded"] == 0
+    assert stats["chunks_removed"] == 1
+    assert set(load_manifest(persist_path)["files"]) == set(remaining)
+    assert _contents(persist_path, embeddings) == sorted([DOCS["refunds.txt"], DOCS["laptops.txt"]])
+
+
+def test_changed_chunking_rebuilds_everything(corpus):
+    paths, persist_path, embeddings = corpus
+    _build(paths.values(), persist_path)
+
+    stats = {}
+    build_vector_index(list(paths.values()), persist_path, chunk_size=400, stats=stats)
+
+    assert stats["files_changed"] == 3
+    assert _contents(persist_path, embeddings) == sorted(DOCS.values())
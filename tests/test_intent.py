@@ -0,0 +1,112 @@
+import asyncio
+
+import pytest
+
+from app.core import intent
+from app.core.intent import EmbeddingIntentClassifier, classify_rules, predict_intent, predict_intent_async
+from scripts.bench_intent import LABELLED
+
+THRESHOLD = intent.INTENT_CONFIDENCE_THRESHOLD
+
+
+@pytest.mark.parametrize("question, label", LABELLED)
+def test_rules_are_never_confidently_wrong(question, label):
+    # A rule decision above the threshold is final, so it must be right;
+    # anything the rules get wrong has to defer to the embedding tier
+    prediction = classify_rules(question)
+    if prediction.intent != label:
+        assert prediction.confidence < THRESHOLD
+
+
+def test_rules_decide_most_labelled_questions():
+    confident = [q for q, label in LABELLED if classify_rules(q).confidence >= THRESHOLD]
+    assert len(confident) >= 0.7 * len(LABELLED)
+
+
+@pytest.mark.parametrize("question", [
+    "How many orders were placed in 2023?",
+    "how many customers are in France",
+    "What is the average order value?",
+    "average price per category",
+    "averages of invoice amounts per month",
+    "Number of tickets opened each week",
+    "counting the refunds by region",
+    "total revenue per country",
+    "What was the highest sale last month?",
+])
+def test_aggregate_phrasings_route_to_sql(question):
+    prediction = classify_rules(question)
+    assert prediction == ("sql", 1.0, "rules", None)
+
+
+@pytest.mark.parametrize("question", [
+    "Explain the refund policy",
+    "Summarize the security guidelines",
+    "What does the contract say about termination?",
+    "How do I reset my password?",
+])
+def test_document_questions_route_to_rag(question):
+    prediction = classify_rules(question)
+    assert prediction.intent == "rag" and prediction.confidence >= THRESHOLD
+
+
+def test_weak_cues_alone_are_not_confident():
+    prediction = classify_rules("customers from Brazil")
+    assert prediction.intent == "sql"
+    assert prediction.confidence <= 0.6
+
+
+def test_no_cue_or_conflict_is_a_coin_flip():
+    assert classify_rules("What happens when a contract expires?") == ("rag", 0.5, "default", None)
+    # One SQL cue against one document cue
+    assert classify_rules("count the policy").confidence == 0.5
+
+
+class _KeywordEmbedder:
+    """
+    Two-dimensional stand-in for MiniLM: "orders" questions point one way, the rest the other.
+    """
+
+    def __init__(self):
+        self.queries = 0
+
+    def _vector(self, text):
+        return [1.0, 0.0] if "orders" in text.lower() else [0.0, 1.0]
+
+    def embed_documents(self, texts):
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        self.queries += 1
+        return self._vector(text)
+
+
+@pytest.fixture
+def embedding_tier(monkeypatch):
+    embedder = _KeywordEmbedder()
+    examples = {"sql": ["orders last week", "orders by city"], "rag": ["holiday rules", "leave"]}
+    monkeypatch.setattr(intent, "_embedding_classifier", EmbeddingIntentClassifier(examples, embedder))
+    return embedder
+
+
+def test_ambiguous_question_goes_to_embedding_tier(embedding_tier):
+    prediction = predict_intent("orders with status pending", use_embeddings=True)
+    assert (prediction.intent, prediction.tier) == ("sql", "embedding")
+    assert prediction.confidence > 0.99
+    assert prediction.embedding == [1.0, 0.0]
+
+
+def test_confident_rules_skip_the_embedding_tier(embedding_tier):
+    prediction = asyncio.run(predict_intent_async("How many orders were placed?", use_embeddings=True))
+    assert prediction.tier == "rules"
+    assert embedding_tier.queries == 0
+
+
+def test_rules_stand_when_embeddings_fail(monkeypatch):
+    class Broken:
+        def embed_documents(self, texts):
+            raise OSError("model not downloaded")
+
+    monkeypatch.setattr(intent, "_embedding_classifier", EmbeddingIntentClassifier(embedder=Broken()))
+    prediction = predict_intent("customers from Brazil", use_embeddings=True)
+    assert (prediction.intent, prediction.tier) == ("sql", "rules")
@@ -0,0 +1,30 @@
+import contextlib
+import signal
+
+import pytest
+from fastapi import FastAPI
+
+import run
+from scripts.loadtest import free_port
+
+
+@pytest.fixture
+def restore_signals():
+    handled = (signal.SIGTERM, signal.SIGINT, signal.SIGUSR1, signal.SIGALRM)
+    saved = {signum: signal.getsignal(signum) for signum in handled}
+    yield
+    for signum, handler in saved.items():
+        signal.signal(signum, handler)
+
+
+def test_worker_startup_failure_stops_the_master(monkeypatch, restore_signals):
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        raise RuntimeError("database unavailable")
+        yield
+
+    monkeypatch.setattr(run, "preload_app", lambda: FastAPI(lifespan=lifespan))
+
+    status = run.serve_prefork("127.0.0.1", free_port(), workers=2, report_after=0, log_level="critical")
+
+    assert status == run.WORKER_STARTUP_FAILED
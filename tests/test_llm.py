@@ -0,0 +1,140 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core import llm
+from app.core.llm import AsyncLLMClient, LLMError
+
+
+def _completion(content="SELECT 1"):
+    return httpx.Response(200, json={
+        "id": "chatcmpl-1",
+        "object": "chat.completion",
+        "created": 0,
+        "model": "stub",
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 5, "completion_tokens": 2, "total_tokens": 7},
+    })
+
+
+def _error(status):
+    return httpx.Response(status, json={"error": {"message": f"status {status}"}})
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+    monkeypatch.setattr(llm, "LLM_BACKOFF_BASE_SECONDS", 0.001)
+    monkeypatch.setattr(llm, "LLM_BACKOFF_MAX_SECONDS", 0.005)
+
+
+def _client(handler, **kwargs):
+    return AsyncLLMClient(base_url="http://llm.test/v1", api_key="test", model="stub",
+                          transport=httpx.MockTransport(handler), **kwargs)
+
+
+def _run(client, coro):
+    async def main():
+        try:
+            return await coro
+        finally:
+            await client.aclose()
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("status", [429, 500, 503])
+def test_retryable_status_is_retried(status):
+    responses = [_error(status), _error(status), _completion("SELECT 2")]
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return responses.pop(0)
+
+    client = _client(handler, max_retries=3)
+    assert _run(client, client.complete("q")) == "SELECT 2"
+    assert len(requests) == 3
+
+
+def test_gives_up_after_max_retries():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return _error(503)
+
+    client = _client(handler, max_retries=2)
+    with pytest.raises(LLMError, match="failed"):
+        _run(client, client.complete("q"))
+    assert len(requests) == 3
+
+
+@pytest.mark.parametrize("status", [400, 401, 404])
+def test_client_errors_are_not_retried(status):
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return _error(status)
+
+    client = _client(handler, max_retries=3)
+    with pytest.raises(LLMError):
+        _run(client, client.complete("q"))
+    assert len(requests) == 1
+
+
+def test_deadline_covers_retries(monkeypatch):
+    # Each backoff alone fits the deadline; the retries together do not
+    monkeypatch.setattr(llm, "LLM_BACKOFF_BASE_SECONDS", 0.1)
+    monkeypatch.setattr(llm, "LLM_BACKOFF_MAX_SECONDS", 0.1)
+    monkeypatch.setattr(llm.random, "uniform", lambda low, high: high)
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return _error(503)
+
+    client = _client(handler, max_retries=100)
+    with pytest.raises(LLMError, match="deadline"):
+        _run(client, client.complete("q", timeout=0.35))
+    assert 2 <= len(requests) <= 5
+
+
+def test_retry_after_header_is_honoured():
+    responses = [httpx.Response(429, headers={"retry-after": "0.2"}, json={"error": {}}), _completion()]
+
+    def handler(request):
+        return responses.pop(0)
+
+    client = _client(handler)
+
+    async def timed():
+        started = asyncio.get_running_loop().time()
+        await client.complete("q")
+        return asyncio.get_running_loop().time() - started
+
+    assert _run(client, timed()) >= 0.2
+
+
+def test_concurrency_is_capped():
+    active = peak = 0
+
+    async def handler(request):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.02)
+        active -= 1
+        return _completion()
+
+    client = _client(handler, max_concurrency=2)
+
+    async def burst():
+        return await asyncio.gather(*(client.complete(f"q{i}") for i in range(8)))
+
+    assert _run(client, burst()) == ["SELECT 1"] * 8
+    assert peak == 2
@@ -0,0 +1,44 @@
+import os
+
+import pytest
+
+from app.rag import loader
+from app.rag.loader import _parse_task, iter_chunks
+
+SAMPLE_PDF = os.path.join(os.path.dirname(__file__), "..", "data", "sample.pdf")
+
+
+@pytest.fixture
+def texts(tmp_path):
+    paths = []
+    for i in range(4):
+        path = tmp_path / f"doc{i}.txt"
+        path.write_text(" ".join(f"Sentence {j} of document {i}." for j in range(40)))
+        paths.append(str(path))
+    return paths
+
+
+def _flatten(results):
+    return [(path, chunk.page_content, chunk.metadata) for path, _, chunks in results for chunk in chunks]
+
+
+def test_parser_processes_are_not_forked():
+    assert loader._pool_context().get_start_method() in ("forkserver", "spawn")
+
+
+def test_pool_yields_the_same_chunks_as_inline(texts):
+    inline = _flatten(iter_chunks(texts, chunk_size=200, chunk_overlap=20, workers=1))
+    pooled = _flatten(iter_chunks(texts, chunk_size=200, chunk_overlap=20, workers=2))
+
+    assert pooled == inline
+    assert {metadata["source"] for _, _, metadata in pooled} == set(texts)
+    assert all(set(metadata) == {"source"} for _, _, metadata in pooled)
+
+
+def test_pdf_chunks_carry_source_and_page():
+    path, pages, chunks = _parse_task((SAMPLE_PDF, 2, 4), 500, 50)
+
+    assert pages == 2
+    assert chunks
+    assert all(set(chunk.metadata) == {"source", "page"} for chunk in chunks)
+    assert {chunk.metadata["page"] for chunk in chunks} <= {2, 3}
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+from scripts.loadtest import Sample, parse_server_timing, percentile, summarize
+from scripts.stub_llm import parse_latency
+
+
+@pytest.mark.parametrize("q, expected", [(0, 1), (7, 7), (50, 50), (95, 95), (99, 99), (100, 100)])
+def test_percentile_nearest_rank(q, expected):
+    assert percentile([float(v) for v in range(1, 101)], q) == expected
+
+
+def test_percentile_of_nothing():
+    assert percentile([], 99) == 0.0
+
+
+def test_summarize_per_kind():
+    samples = [
+        Sample("sql", 0.0, 0.1, True, None, {}),
+        Sample("sql", 0.5, 0.3, False, "HTTP 500", {}),
+        Sample("rag", 1.0, 1.0, True, None, {}),
+    ]
+    summary = summarize(samples)
+
+    assert summary["all"]["requests"] == 3
+    # Three requests answered over two seconds
+    assert summary["all"]["throughput_rps"] == 1.5
+    assert summary["sql"]["errors"] == 1
+    assert summary["sql"]["error_rate"] == 0.5
+    assert summary["sql"]["p50_ms"] == 100.0
+    assert summary["rag"]["p99_ms"] == 1000.0
+
+
+def test_parse_server_timing():
+    header = "classify;dur=1.5, sql_execute;desc=\"db\";dur=12, total;dur=oops"
+    assert parse_server_timing(header) == {"classify": 1.5, "sql_execute": 12.0}
+
+
+@pytest.mark.parametrize("spec", ["fixed:0.2", "uniform:0.1,0.3", "normal:0.2,0.05", "lognormal:0.2,0.1"])
+def test_parse_latency(spec):
+    random.seed(0)
+    sampler = parse_latency(spec)
+    assert all(value >= 0 for value in (sampler() for _ in range(100)))
+
+
+@pytest.mark.parametrize("spec", ["fixed", "fixed:a", "uniform:0.1", "pareto:1,2"])
+def test_parse_latency_rejects(spec):
+    with pytest.raises(ValueError):
+        parse_latency(spec)
@@ -0,0 +1,76 @@
+import asyncio
+import sqlite3
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import executor, translation_cache
+from app.core.executor import SQLiteEngine
+from app.core.metrics import ServerTimingMiddleware, stage
+from app.core.singleflight import SingleFlight
+from app.routes import metrics
+from scripts.loadtest import parse_server_timing
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(metrics.router)
+    return TestClient(app)
+
+
+def test_scrape_does_not_create_engine_or_translation_cache(client, monkeypatch):
+    monkeypatch.setattr(executor, "_engine", None)
+    monkeypatch.setattr(translation_cache, "_cache", None)
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert 'nlqs_cache_entries{cache="retrieval"}' in response.text
+    assert "sql_result" not in response.text
+    assert executor.peek_engine() is None
+    assert translation_cache.peek_translation_cache() is None
+
+
+def test_scrape_reports_existing_engine(client, monkeypatch, tmp_path):
+    path = str(tmp_path / "m.db")
+    sqlite3.connect(path).close()
+    engine = SQLiteEngine(path, pool_size=1, cache_results=True, log_workload=False)
+    monkeypatch.setattr(executor, "_engine", engine)
+    try:
+        response = client.get("/metrics")
+    finally:
+        engine.close()
+
+    assert 'nlqs_cache_entries{cache="sql_result"} 0' in response.text
+
+
+def test_coalesced_followers_get_server_timing():
+    flight = SingleFlight("test-timing")
+
+    async def compute():
+        with stage("llm_translate"):
+            await asyncio.sleep(0.05)
+        return {"answer": 42}
+
+    app = FastAPI()
+    app.add_middleware(ServerTimingMiddleware)
+
+    @app.get("/answer")
+    async def answer():
+        return await flight.do("question", compute)
+
+    async def burst():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            return await asyncio.gather(*(http.get("/answer") for _ in range(3)))
+
+    headers = [parse_server_timing(r.headers["server-timing"]) for r in asyncio.run(burst())]
+
+    assert sum("llm_translate" in h for h in headers) == 1
+    assert sum("coalesced" in h for h in headers) == 2
+    for timing in headers:
+        if "coalesced" in timing:
+            assert timing["coalesced"] >= 40
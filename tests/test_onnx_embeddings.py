@@ -0,0 +1,122 @@
+import gc
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from tokenizers import Tokenizer
+from tokenizers.models import WordLevel
+from tokenizers.pre_tokenizers import Whitespace
+
+from app.rag import embedder, onnx_embeddings
+from app.rag.onnx_embeddings import MODEL_FILE, TOKENIZER_FILE, OnnxEmbeddings, model_dir
+
+VOCAB = {"[UNK]": 0, "refund": 1, "policy": 2, "travel": 3}
+
+
+class FakeSession:
+    """
+    Stands in for an InferenceSession: one-hot "hidden states" per token.
+    """
+
+    def __init__(self):
+        self.pid = os.getpid()
+
+    def get_inputs(self):
+        return [SimpleNamespace(name="input_ids"), SimpleNamespace(name="attention_mask")]
+
+    def run(self, outputs, feeds):
+        return [np.eye(len(VOCAB), dtype=np.float32)[feeds["input_ids"]]]
+
+
+@pytest.fixture
+def model(tmp_path, monkeypatch):
+    directory = model_dir(str(tmp_path), "test/tiny")
+    os.makedirs(directory)
+    open(os.path.join(directory, MODEL_FILE), "wb").close()
+    tokenizer = Tokenizer(WordLevel(VOCAB, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = Whitespace()
+    tokenizer.save(os.path.join(directory, TOKENIZER_FILE))
+
+    monkeypatch.setattr(OnnxEmbeddings, "_open_session", lambda self: FakeSession())
+    return lambda: OnnxEmbeddings("test/tiny", str(tmp_path))
+
+
+def test_embeddings_are_mean_pooled_and_normalized(model):
+    embeddings = model()
+    vector = np.asarray(embeddings.embed_query("refund policy"))
+    assert np.allclose(vector, [0, 2 ** -0.5, 2 ** -0.5, 0])
+    documents = embeddings.embed_documents(["travel policy", "refund"])
+    assert np.allclose(documents[1], [0, 1, 0, 0])
+
+
+def test_live_models_are_tracked_weakly(model):
+    first, second = model(), model()
+    assert {first, second} <= set(onnx_embeddings._live_models)
+
+    del first, second
+    gc.collect()
+    assert len(onnx_embeddings._live_models) == 0
+
+
+def test_forked_child_opens_its_own_session(model):
+    embeddings = model()
+    parent_session = embeddings._session
+
+    pid = os.fork()
+    if pid == 0:
+        session = embeddings._session
+        ok = session is not parent_session and session.pid == os.getpid()
+        os._exit(0 if ok and len(embeddings.embed_query("travel")) == len(VOCAB) else 1)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+    assert embeddings._session is parent_session
+
+
+def test_batches_keep_input_order(model, monkeypatch):
+    embeddings = model()
+    texts = ["refund policy travel", "travel", "policy refund", "refund"]
+    expected = [embeddings.embed_query(text) for text in texts]
+
+    embeddings.batch_size = 2
+    batches = []
+    encode = embeddings._encode_batch
+    monkeypatch.setattr(embeddings, "_encode_batch", lambda batch: batches.append(batch) or encode(batch))
+
+    assert np.allclose(embeddings.embed_documents(texts), expected)
+    # Length-sorted, so short texts are padded together
+    assert batches == [["travel", "refund"], ["policy refund", "refund policy travel"]]
+
+
+def test_missing_model_is_exported_once(tmp_path, monkeypatch):
+    exported = []
+
+    def export(model_name, output_dir):
+        exported.append(model_name)
+        os.makedirs(output_dir)
+        open(os.path.join(output_dir, MODEL_FILE), "wb").close()
+        Tokenizer(WordLevel(VOCAB, unk_token="[UNK]")).save(os.path.join(output_dir, TOKENIZER_FILE))
+
+    monkeypatch.setattr(onnx_embeddings, "export_onnx_model", export)
+    monkeypatch.setattr(OnnxEmbeddings, "_open_session", lambda self: FakeSession())
+
+    OnnxEmbeddings("test/tiny", str(tmp_path))
+    OnnxEmbeddings("test/tiny", str(tmp_path))
+
+    assert exported == ["test/tiny"]
+
+
+def test_backend_is_selected_by_setting(monkeypatch):
+    created = []
+
+    class Recording:
+        def __init__(self, model_name, base_dir, batch_size, threads):
+            created.append((model_name, batch_size, threads))
+
+    monkeypatch.setattr(onnx_embeddings, "OnnxEmbeddings", Recording)
+
+    assert isinstance(embedder.create_embedder("onnx", batch_size=16, threads=2), Recording)
+    assert created == [(embedder.EMBEDDING_MODEL, 16, 2)]
+    with pytest.raises(ValueError, match="Unknown embedding backend"):
+        embedder.create_embedder("tensorflow")
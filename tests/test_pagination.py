@@ -0,0 +1,23 @@
+import pytest
+
+from app.core.pagination import decode_page_token, encode_page_token
+
+
+def test_round_trip():
+    sql = "SELECT name FROM customers WHERE country = 'Norway' ORDER BY name"
+    assert decode_page_token(encode_page_token(sql, 40)) == (sql, 40)
+
+
+def test_tampered_token_rejected():
+    token = encode_page_token("SELECT * FROM orders", 20)
+    other = encode_page_token("DELETE FROM orders", 0)
+    # A valid body with another token's signature
+    forged = f"{other.split('.')[0]}.{token.split('.')[1]}"
+    with pytest.raises(ValueError, match="Invalid"):
+        decode_page_token(forged)
+
+
+@pytest.mark.parametrize("token", ["", "no-signature", "!!!.abc"])
+def test_malformed_token_rejected(token):
+    with pytest.raises(ValueError):
+        decode_page_token(token)
@@ -0,0 +1,57 @@
+import sqlite3
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import executor, translation_cache
+from app.core.executor import SQLiteEngine
+from app.routes import query
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(query.router, prefix="/api")
+    return TestClient(app)
+
+
+def test_stats_do_not_open_engine_or_translation_cache(client, monkeypatch):
+    monkeypatch.setattr(executor, "_engine", None)
+    monkeypatch.setattr(translation_cache, "_cache", None)
+
+    response = client.get("/api/stats")
+
+    assert response.status_code == 200
+    assert set(response.json()) == {"retrieval_cache"}
+    assert executor.peek_engine() is None
+    assert translation_cache.peek_translation_cache() is None
+
+
+def test_stats_report_open_caches(client, monkeypatch, tmp_path):
+    path = str(tmp_path / "s.db")
+    sqlite3.connect(path).close()
+    engine = SQLiteEngine(path, pool_size=1, cache_results=True, log_workload=False)
+    cache = translation_cache.TranslationCache(str(tmp_path / "t.db"), embedder=object())
+    monkeypatch.setattr(executor, "_engine", engine)
+    monkeypatch.setattr(translation_cache, "_cache", cache)
+    try:
+        stats = client.get("/api/stats").json()
+    finally:
+        engine.close()
+
+    assert stats["sql_result_cache"]["entries"] == 0
+    assert stats["translation_cache"]["entries"] == 0
+
+
+@pytest.mark.parametrize("paging", [{"page_token": "abc.def"}, {"page_size": 10}])
+def test_stream_rejects_paging(client, monkeypatch, paging):
+    def stream_query(question):
+        raise AssertionError("must not stream")
+
+    monkeypatch.setattr(query, "stream_query", stream_query)
+
+    response = client.post("/api/query", json={"question": "all orders", "stream": True, **paging})
+
+    assert response.status_code == 400
+    assert "stream" in response.json()["detail"]
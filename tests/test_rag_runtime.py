@@ -0,0 +1,101 @@
+import threading
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import app.main as main
+import app.rag.vector_index as vector_index
+from app.rag import qa
+
+
+class FakeRetriever:
+    def __init__(self, version):
+        self.vectorstore = f"store-{version}"
+
+
+@pytest.fixture
+def runtime(monkeypatch):
+    state = {"version": "v1", "loads": 0, "fail": False}
+
+    def load_vectorstore():
+        state["loads"] += 1
+        # Widens the window in which concurrent callers would build twice
+        time.sleep(0.05)
+        if state["fail"]:
+            raise RuntimeError("index missing")
+        return FakeRetriever(state["version"])
+
+    monkeypatch.setattr(qa, "load_vectorstore", load_vectorstore)
+    monkeypatch.setattr(qa, "get_llm_client", lambda: "llm")
+    monkeypatch.setattr(vector_index, "read_index_version", lambda path: state["version"])
+    rag = qa.RAGRuntime()
+    rag.state = state
+    return rag
+
+
+def test_concurrent_loads_build_once(runtime):
+    threads = [threading.Thread(target=runtime.load) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert runtime.state["loads"] == 1
+    assert runtime.status == "ready"
+    assert runtime.vectorstore == "store-v1"
+    assert runtime.load() is runtime
+    assert runtime.state["loads"] == 1
+
+
+def test_failed_load_is_retried(runtime):
+    assert runtime.status == "warming"
+    runtime.state["fail"] = True
+
+    with pytest.raises(RuntimeError, match="index missing"):
+        runtime.load()
+    assert runtime.status == "failed"
+
+    runtime.state["fail"] = False
+    runtime.load()
+    assert runtime.status == "ready"
+    assert runtime.error is None
+
+
+def test_refresh_reloads_new_index_version(runtime, monkeypatch):
+    monkeypatch.setattr(qa, "RAG_INDEX_CHECK_SECONDS", 0)
+    runtime.load()
+    runtime.cache.put_results("q", "v1", [("chunk", 0.1)])
+
+    runtime.refresh()
+    assert runtime.state["loads"] == 1
+
+    runtime.state["version"] = "v2"
+    runtime.refresh()
+    assert runtime.state["loads"] == 2
+    assert runtime.vectorstore == "store-v2"
+    assert runtime.cache.get_results("q") is None
+
+
+def test_failed_reload_keeps_serving_current_index(runtime, monkeypatch):
+    monkeypatch.setattr(qa, "RAG_INDEX_CHECK_SECONDS", 0)
+    runtime.load()
+    runtime.state.update(version="v2", fail=True)
+
+    runtime.refresh()
+
+    assert runtime.vectorstore == "store-v1"
+    assert runtime.version == "v1"
+    assert runtime.status == "ready"
+
+
+def test_health_reports_runtime_status(runtime, monkeypatch):
+    monkeypatch.setattr(main, "get_rag_runtime", lambda: runtime)
+    client = TestClient(main.app)
+
+    response = client.get("/health")
+    assert response.status_code == 503
+    assert response.json() == {"status": "warming"}
+
+    runtime.load()
+    assert client.get("/health").json() == {"status": "ready"}
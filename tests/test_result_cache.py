@@ -0,0 +1,123 @@
+import sqlite3
+
+import pytest
+
+from app.core.executor import SQLiteEngine
+from app.core.result_cache import ResultCache, is_cacheable, normalize_sql, result_size
+
+
+def _result(rows):
+    return {"query_type": "SELECT", "columns": ["v"], "rows": rows, "summary": f"{len(rows)} rows"}
+
+
+def test_new_version_clears_entries():
+    cache = ResultCache()
+    cache.set_version(1)
+    cache.put("q", 1, _result([(1,)]))
+    assert cache.get("q")["rows"] == [(1,)]
+
+    cache.set_version(1)
+    assert cache.get("q") is not None
+
+    cache.set_version(2)
+    assert cache.get("q") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_result_from_superseded_version_is_dropped():
+    cache = ResultCache()
+    cache.set_version(1)
+    # Computed before a write moved the version on
+    cache.set_version(2)
+    cache.put("q", 1, _result([(1,)]))
+    assert cache.get("q") is None
+
+
+def test_get_returns_a_copy():
+    cache = ResultCache()
+    cache.set_version(1)
+    cache.put("q", 1, _result([(1,)]))
+
+    first = cache.get("q")
+    first["rows"].append((2,))
+    first["page_token"] = "abc"
+
+    assert cache.get("q") == _result([(1,)])
+
+
+def test_eviction_is_bounded_by_bytes():
+    small = _result([(i,) for i in range(10)])
+    cache = ResultCache(max_bytes=3 * result_size(small), max_entry_bytes=10 ** 9)
+    cache.set_version(1)
+    for key in "abcd":
+        cache.put(key, 1, small)
+    cache.get("b")
+    cache.put("e", 1, small)
+
+    stats = cache.stats()
+    assert stats["bytes"] <= cache.max_bytes
+    assert stats["evictions"] == 2
+    assert cache.get("a") is None and cache.get("c") is None
+    assert cache.get("b") is not None
+
+
+def test_oversized_result_not_stored():
+    cache = ResultCache(max_bytes=10 ** 6, max_entry_bytes=1_000)
+    cache.set_version(1)
+    cache.put("big", 1, _result([(i, "x" * 50) for i in range(100)]))
+    assert cache.get("big") is None
+    assert cache.stats()["too_large"] == 1
+
+
+def test_normalize_sql_keeps_literals():
+    assert normalize_sql("SELECT  *\nFROM Orders -- all\nWHERE name = 'Ann  Lee';") == \
+        "select * from orders where name = 'Ann  Lee'"
+    assert normalize_sql("select * from orders where name = 'ann lee'") != \
+        normalize_sql("SELECT * FROM orders WHERE name = 'Ann Lee'")
+
+
+@pytest.mark.parametrize("sql, cacheable", [
+    ("SELECT * FROM orders", True),
+    ("SELECT * FROM orders ORDER BY random() LIMIT 1", False),
+    ("SELECT * FROM orders WHERE day = date('now')", False),
+    ("SELECT CURRENT_TIMESTAMP", False),
+])
+def test_is_cacheable(sql, cacheable):
+    assert is_cacheable(sql) is cacheable
+
+
+@pytest.fixture
+def engine(tmp_path):
+    path = str(tmp_path / "cache.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE t (v INTEGER)")
+    conn.execute("INSERT INTO t VALUES (1)")
+    conn.commit()
+    conn.close()
+    engine = SQLiteEngine(path, pool_size=1, cache_results=True, log_workload=False)
+    yield engine
+    engine.close()
+
+
+def test_engine_serves_repeated_select_from_cache(engine):
+    assert engine.execute("SELECT v FROM t")["rows"] == [(1,)]
+    assert engine.execute("select v  from t;")["rows"] == [(1,)]
+    assert engine.cache.stats()["hits"] == 1
+
+
+def test_write_by_another_connection_invalidates(engine, tmp_path):
+    assert engine.execute("SELECT v FROM t")["rows"] == [(1,)]
+
+    conn = sqlite3.connect(str(tmp_path / "cache.db"))
+    conn.execute("INSERT INTO t VALUES (2)")
+    conn.commit()
+    conn.close()
+
+    assert engine.execute("SELECT v FROM t")["rows"] == [(1,), (2,)]
+    assert engine.cache.stats()["invalidations"] == 1
+
+
+def test_write_through_engine_invalidates(engine):
+    assert engine.execute("SELECT COUNT(*) FROM t")["rows"] == [(1,)]
+    engine.execute("INSERT INTO t VALUES (3)")
+    assert engine.execute("SELECT COUNT(*) FROM t")["rows"] == [(2,)]
@@ -0,0 +1,39 @@
+from app.rag.retrieval_cache import RetrievalCache
+
+HITS = [("chunk-1", 0.2), ("chunk-7", 0.4)]
+
+
+def test_new_index_version_clears_both_caches():
+    cache = RetrievalCache()
+    cache.set_version("v1")
+    cache.put_embedding("refund policy", [0.1, 0.2])
+    cache.put_results("refund policy", "v1", HITS)
+    assert cache.get_results("refund policy") == HITS
+
+    cache.set_version("v2")
+
+    assert cache.get_embedding("refund policy") is None
+    assert cache.get_results("refund policy") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_results_from_superseded_index_are_dropped():
+    cache = RetrievalCache()
+    cache.set_version("v1")
+    # Retrieval started on v1, the index reloaded to v2 before it finished
+    cache.set_version("v2")
+    cache.put_results("refund policy", "v1", HITS)
+    assert cache.get_results("refund policy") is None
+
+
+def test_lru_bounded_by_size():
+    cache = RetrievalCache(embedding_size=2, result_size=0)
+    cache.set_version("v1")
+    for key in "abc":
+        cache.put_embedding(key, [1.0])
+    cache.put_results("a", "v1", HITS)
+
+    stats = cache.stats()
+    assert stats["embedding_entries"] == 2
+    assert stats["retrieval_entries"] == 0
+    assert cache.get_embedding("a") is None
@@ -0,0 +1,74 @@
+import sqlite3
+
+import pytest
+
+from app.db.schema import SchemaProvider
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / "shop.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT NOT NULL, country TEXT);
+        CREATE TABLE orders (
+            id INTEGER PRIMARY KEY,
+            customer_id INTEGER REFERENCES customers (id),
+            amount REAL
+        );
+        CREATE INDEX idx_orders_customer ON orders (customer_id);
+        INSERT INTO customers (name, country) VALUES ('Ada', 'France'), ('Grace', 'USA');
+        INSERT INTO orders (customer_id, amount) VALUES (1, 10.0), (1, 20.0), (2, 5.0);
+    """)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_describes_columns_keys_indexes_and_samples(db_path):
+    description = SchemaProvider(db_path).get_description()
+
+    assert "Table: customers (~2 rows)" in description
+    assert "- id (integer, primary key)" in description
+    assert "- country (text) e.g. 'France', 'USA'" in description
+    assert "- customer_id (integer) -> customers.id" in description
+    assert "- index idx_orders_customer (customer_id)" in description
+
+
+def test_schema_change_is_picked_up(db_path):
+    provider = SchemaProvider(db_path)
+    fingerprint = provider.get_fingerprint()
+    assert provider.get_fingerprint() == fingerprint
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("ALTER TABLE customers ADD COLUMN email TEXT")
+    conn.commit()
+    conn.close()
+
+    assert "- email (text)" in provider.get_description()
+    assert provider.get_fingerprint() != fingerprint
+
+
+def test_index_changes_keep_the_fingerprint(db_path):
+    provider = SchemaProvider(db_path)
+    fingerprint = provider.get_fingerprint()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE INDEX idx_customers_country ON customers (country)")
+    conn.commit()
+    conn.close()
+
+    assert "- index idx_customers_country (country)" in provider.get_description()
+    assert provider.get_fingerprint() == fingerprint
+
+
+def test_row_counts_follow_the_data(db_path):
+    provider = SchemaProvider(db_path)
+    assert {t["name"]: t["row_count"] for t in provider.get_tables()}["orders"] == 3
+
+    conn = sqlite3.connect(db_path)
+    conn.executemany("INSERT INTO orders (customer_id, amount) VALUES (2, ?)", [(1.0,)] * 7)
+    conn.commit()
+    conn.close()
+
+    assert {t["name"]: t["row_count"] for t in provider.get_tables()}["orders"] == 10
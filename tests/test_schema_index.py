@@ -0,0 +1,89 @@
+import re
+import sqlite3
+
+import pytest
+
+from app.db.schema import SchemaProvider
+from app.db.schema_index import SchemaIndex
+
+
+class BagOfWords:
+    """Embeds texts as word counts, so documents sharing words score closer."""
+
+    def __init__(self):
+        self.vocabulary = {}
+        self.documents = 0
+
+    def _vector(self, text):
+        vector = [0.0] * 64
+        for word in re.findall(r"[a-z]+", text.lower()):
+            vector[self.vocabulary.setdefault(word, len(self.vocabulary) % 64)] += 1.0
+        return vector
+
+    def embed_documents(self, texts):
+        self.documents += len(texts)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._vector(text)
+
+
+@pytest.fixture
+def provider(tmp_path):
+    path = str(tmp_path / "shop.db")
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE customers (id INTEGER PRIMARY KEY, name TEXT, country TEXT);
+        CREATE TABLE orders (id INTEGER PRIMARY KEY, customer_id INTEGER REFERENCES customers (id), amount REAL);
+        CREATE TABLE employees (id INTEGER PRIMARY KEY, salary REAL, hired DATE);
+        CREATE TABLE warehouses (id INTEGER PRIMARY KEY, city TEXT, capacity INTEGER);
+        CREATE TABLE suppliers (id INTEGER PRIMARY KEY, company TEXT, rating INTEGER);
+    """)
+    conn.commit()
+    conn.close()
+    return SchemaProvider(path)
+
+
+def test_selects_relevant_tables_and_their_references(provider):
+    index = SchemaIndex(provider, embedder=BagOfWords(), top_k=1)
+
+    selected = index.select_tables("total amount per customer_id")
+
+    # orders ranks first; customers joins in through its foreign key
+    assert selected == ["customers", "orders"]
+
+
+def test_tables_named_in_the_question_are_kept(provider):
+    index = SchemaIndex(provider, embedder=BagOfWords(), top_k=1)
+
+    selected = index.select_tables("average salary of employees and warehouses capacity")
+
+    assert {"employees", "warehouses"} <= set(selected)
+    assert "suppliers" not in selected
+
+
+def test_describe_renders_only_selected_tables(provider):
+    index = SchemaIndex(provider, embedder=BagOfWords(), top_k=1)
+
+    description = index.describe("suppliers with rating above 3")
+
+    assert "Table: suppliers" in description
+    assert "Table: employees" not in description
+
+
+def test_schema_is_embedded_once_per_structure(provider):
+    embedder = BagOfWords()
+    index = SchemaIndex(provider, embedder=embedder, top_k=1)
+
+    index.select_tables("orders amount")
+    embedded = embedder.documents
+    index.select_tables("suppliers rating")
+    assert embedder.documents == embedded
+
+    conn = sqlite3.connect(provider.db_path)
+    conn.execute("CREATE TABLE invoices (id INTEGER PRIMARY KEY, total REAL)")
+    conn.commit()
+    conn.close()
+
+    assert "invoices" in index.select_tables("invoices total")
+    assert embedder.documents > embedded
@@ -0,0 +1,102 @@
+import asyncio
+
+from app.core import orchestrator
+from app.core.metrics import COALESCED_REQUESTS
+from app.core.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight("test-share")
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"rows": [1, 2, 3]}
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("k", compute) for _ in range(20)))
+        return results, len(flight)
+
+    before = COALESCED_REQUESTS.value(flight="test-share")
+    results, in_flight = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert in_flight == 0
+    assert all(result == {"rows": [1, 2, 3]} for result in results)
+    assert COALESCED_REQUESTS.value(flight="test-share") - before == 19
+    # Followers get their own dict, so one response's extra keys stay its own
+    results[1]["timing"] = 1.0
+    assert "timing" not in results[0]
+
+
+def test_later_calls_compute_afresh():
+    flight = SingleFlight("test-sequential")
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return len(calls)
+
+    async def main():
+        return [await flight.do("k", compute) for _ in range(3)]
+
+    assert asyncio.run(main()) == [1, 2, 3]
+
+
+def test_exception_reaches_every_caller():
+    flight = SingleFlight("test-error")
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("boom")
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("k", compute) for _ in range(3)),
+                                       return_exceptions=True)
+        return results, len(flight)
+
+    results, in_flight = asyncio.run(main())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert in_flight == 0
+
+
+def test_cancelled_caller_does_not_cancel_the_computation():
+    flight = SingleFlight("test-cancel")
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    async def main():
+        first = asyncio.ensure_future(flight.do("k", compute))
+        second = asyncio.ensure_future(flight.do("k", compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second, first.cancelled()
+
+    assert asyncio.run(main()) == ("done", True)
+
+
+def test_identical_questions_are_answered_once(monkeypatch):
+    calls = []
+
+    async def answer(question, page_size):
+        calls.append(question)
+        await asyncio.sleep(0.05)
+        return {"query_type": "sql", "sql_query": "SELECT 1", "result": {}}
+
+    monkeypatch.setattr(orchestrator, "QUERY_COALESCING_ENABLED", True)
+    monkeypatch.setattr(orchestrator, "get_schema_fingerprint", lambda: "schema")
+    monkeypatch.setattr(orchestrator, "_answer", answer)
+
+    async def main():
+        return await asyncio.gather(
+            *(orchestrator.handle_query("How many orders?") for _ in range(25)),
+            orchestrator.handle_query("  how many   orders? "),
+            orchestrator.handle_query("How many customers?"),
+        )
+
+    responses = asyncio.run(main())
+    assert calls == ["How many orders?", "How many customers?"]
+    assert all(response["sql_query"] == "SELECT 1" for response in responses)
@@ -0,0 +1,179 @@
+import asyncio
+
+import pytest
+
+from app.core import orchestrator
+from app.core.intent import IntentPrediction
+from app.core.speculation import SpeculationBudget, race
+from app.rag import qa
+
+
+@pytest.fixture
+def unsure(monkeypatch):
+    """
+    Classifier unsure between SQL and RAG, leaning RAG; speculation always allowed.
+    """
+    async def predict(question):
+        return IntentPrediction("rag", 0.55, "rules")
+
+    monkeypatch.setattr(orchestrator, "predict_intent_async", predict)
+    monkeypatch.setattr(orchestrator, "SPECULATIVE_ROUTING_ENABLED", True)
+    monkeypatch.setattr(orchestrator, "QUERY_COALESCING_ENABLED", False)
+    monkeypatch.setattr(orchestrator, "_speculation_budget", SpeculationBudget(1000))
+
+
+def _write_pipeline(monkeypatch, answers):
+    """
+    A translator that always produces a DELETE; returns the executed statements.
+    """
+    executed = []
+
+    async def translate(question):
+        return "DELETE FROM customers WHERE country = 'France'"
+
+    async def execute(sql, page_size, offset=0):
+        executed.append(sql)
+        return {"query_type": "DELETE", "summary": "3 rows affected."}
+
+    async def answer(question, embedding=None, max_distance=None):
+        return {"query": question, "result": answers.pop(0)}
+
+    monkeypatch.setattr(orchestrator, "translate_to_sql", translate)
+    monkeypatch.setattr(orchestrator, "_execute", execute)
+    monkeypatch.setattr(orchestrator, "answer_from_docs", answer)
+    return executed
+
+
+def test_unsure_write_not_run_when_classifier_leans_rag(unsure, monkeypatch):
+    executed = _write_pipeline(monkeypatch, ["Deleting customers needs a data-protection review."])
+
+    response = asyncio.run(orchestrator.handle_query("what does the policy say about deleting customers"))
+
+    assert executed == []
+    assert response["query_type"] == "rag"
+    assert response["result"]["result"] == "Deleting customers needs a data-protection review."
+
+
+def test_dropped_write_falls_back_to_full_rag_route(unsure, monkeypatch):
+    # The speculative retrieval finds nothing close; the classifier's RAG route still answers
+    executed = _write_pipeline(monkeypatch, ["", "See the data retention policy."])
+
+    response = asyncio.run(orchestrator.handle_query("deleting customers"))
+
+    assert executed == []
+    assert response["result"]["result"] == "See the data retention policy."
+
+
+def test_unsure_write_runs_when_classifier_leans_sql(unsure, monkeypatch):
+    async def predict(question):
+        return IntentPrediction("sql", 0.55, "rules")
+
+    monkeypatch.setattr(orchestrator, "predict_intent_async", predict)
+    executed = _write_pipeline(monkeypatch, ["Customers are described in the policy."])
+
+    response = asyncio.run(orchestrator.handle_query("delete all customers from France"))
+
+    assert executed == ["DELETE FROM customers WHERE country = 'France'"]
+    assert response["query_type"] == "sql"
+    assert response["result"]["query_type"] == "DELETE"
+
+
+def test_rag_without_close_chunks_does_not_beat_sql(unsure, monkeypatch):
+    async def translate(question):
+        return "SELECT COUNT(*) FROM orders"
+
+    async def execute(sql, page_size, offset=0):
+        await asyncio.sleep(0.05)
+        return {"query_type": "SELECT", "columns": ["n"], "rows": [[7]]}
+
+    monkeypatch.setattr(orchestrator, "translate_to_sql", translate)
+    monkeypatch.setattr(orchestrator, "_execute", execute)
+    monkeypatch.setattr(qa, "_ensure_runtime", _fake_runtime(distance=1.8))
+
+    response = asyncio.run(orchestrator.handle_query("orders count"))
+
+    assert response["query_type"] == "sql"
+    assert response["result"]["rows"] == [[7]]
+
+
+class _FakeDoc:
+    page_content = "Refunds are approved by a manager."
+
+
+class _FakeLLM:
+    def __init__(self):
+        self.calls = 0
+
+    async def complete(self, prompt, temperature=0):
+        self.calls += 1
+        return "A manager approves refunds."
+
+
+class _FakeRuntime:
+    def __init__(self, distance):
+        self.distance = distance
+        self.llm = _FakeLLM()
+        self.prompt = _Prompt()
+
+    def retrieve(self, key, query, embedding):
+        return [(_FakeDoc(), self.distance)]
+
+
+class _Prompt:
+    def format(self, context, question):
+        return f"{context}\n{question}"
+
+
+def _fake_runtime(distance):
+    runtime = _FakeRuntime(distance)
+
+    async def ensure():
+        return runtime
+    ensure.runtime = runtime
+    return ensure
+
+
+@pytest.mark.parametrize("distance, answered", [(0.4, True), (1.8, False)])
+def test_answer_from_docs_max_distance(monkeypatch, distance, answered):
+    ensure = _fake_runtime(distance)
+    monkeypatch.setattr(qa, "_ensure_runtime", ensure)
+
+    result = asyncio.run(qa.answer_from_docs("refund policy?", max_distance=1.1))
+
+    assert bool(result["result"]) is answered
+    assert ensure.runtime.llm.calls == int(answered)
+
+
+def test_race_prefers_first_valid_and_cancels_losers():
+    cancelled = []
+
+    async def slow():
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    async def fast_invalid():
+        return ""
+
+    async def valid():
+        await asyncio.sleep(0.01)
+        return "ok"
+
+    async def main():
+        return await race({"a": slow(), "b": fast_invalid(), "c": valid()}, bool, preferred="a")
+
+    assert asyncio.run(main()) == ("c", "ok")
+    assert cancelled == ["slow"]
+
+
+def test_speculation_budget_refills(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.core.speculation.time.monotonic", lambda: now[0])
+    budget = SpeculationBudget(per_minute=60, burst=2)
+
+    assert budget.try_acquire() and budget.try_acquire()
+    assert not budget.try_acquire()
+    now[0] += 1.0
+    assert budget.try_acquire()
@@ -0,0 +1,49 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from app.core.llm import AsyncLLMClient, LLMError
+from scripts.bench_startup import import_profile
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+# Loaded on first use or during warm-up, never by importing the app
+HEAVY = ["openai", "httpx", "langchain_core", "langchain_community",
+         "langchain_huggingface", "langchain_openai", "faiss", "torch"]
+
+
+@pytest.fixture
+def env():
+    env = {key: value for key, value in os.environ.items() if key != "GROQ_API_KEY"}
+    env["PYTHONPATH"] = os.path.abspath(ROOT)
+    return env
+
+
+def test_importing_the_app_loads_no_heavy_dependency(env):
+    code = (
+        "import json, sys, app.main; "
+        f"print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    )
+    completed = subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env,
+                               capture_output=True, text=True)
+
+    assert completed.returncode == 0, completed.stderr
+    assert json.loads(completed.stdout.splitlines()[-1]) == []
+
+
+def test_import_profile_reports_app_packages(env):
+    total, packages = import_profile(env)
+
+    assert total > 0
+    assert "app" in packages
+    assert not set(HEAVY) & set(packages)
+
+
+def test_missing_api_key_fails_at_client_construction(monkeypatch):
+    monkeypatch.delenv("GROQ_API_KEY", raising=False)
+
+    with pytest.raises(LLMError, match="GROQ_API_KEY"):
+        AsyncLLMClient(base_url="http://llm.test/v1", model="stub")
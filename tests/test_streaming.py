@@ -0,0 +1,165 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core import llm, orchestrator
+from app.core.intent import IntentPrediction
+from app.core.llm import AsyncLLMClient
+from app.rag import qa
+from app.routes import query
+
+
+def _sse_body(tokens):
+    lines = []
+    for token in tokens:
+        chunk = {
+            "id": "chatcmpl-1", "object": "chat.completion.chunk", "created": 0, "model": "stub",
+            "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}],
+        }
+        lines.append(f"data: {json.dumps(chunk)}\n\n")
+    lines.append("data: [DONE]\n\n")
+    return "".join(lines).encode("utf-8")
+
+
+def _collect(client, prompt):
+    async def main():
+        try:
+            return [token async for token in client.stream_complete(prompt)]
+        finally:
+            await client.aclose()
+    return asyncio.run(main())
+
+
+def test_stream_complete_yields_deltas_and_retries_before_first_token(monkeypatch):
+    monkeypatch.setattr(llm, "LLM_BACKOFF_BASE_SECONDS", 0.001)
+    responses = [
+        httpx.Response(503, json={"error": {"message": "busy"}}),
+        httpx.Response(200, content=_sse_body(["A manager", " approves", " refunds."]),
+                       headers={"content-type": "text/event-stream"}),
+    ]
+
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return responses.pop(0)
+
+    client = AsyncLLMClient(base_url="http://llm.test/v1", api_key="test", model="stub",
+                            transport=httpx.MockTransport(handler))
+
+    assert _collect(client, "q") == ["A manager", " approves", " refunds."]
+    assert responses == []
+
+
+class _Doc:
+    id = "chunk-1"
+    page_content = "Refunds are approved by a manager."
+    metadata = {"source": "policy.pdf", "page": 2}
+
+
+class _StreamingLLM:
+    def __init__(self, tokens, error=None):
+        self.tokens, self.error = tokens, error
+
+    async def stream_complete(self, prompt, temperature=0):
+        for token in self.tokens:
+            yield token
+        if self.error:
+            raise self.error
+
+
+class _Runtime:
+    def __init__(self, llm_client):
+        self.llm = llm_client
+        self.prompt = self
+
+    def format(self, context, question):
+        return f"{context}\n{question}"
+
+    def retrieve(self, key, query, embedding):
+        return [(_Doc(), 0.3)]
+
+
+@pytest.fixture
+def rag(monkeypatch):
+    def use(llm_client):
+        async def ensure():
+            return _Runtime(llm_client)
+        monkeypatch.setattr(qa, "_ensure_runtime", ensure)
+
+    async def predict(question):
+        return IntentPrediction("rag", 0.9, "rules")
+
+    monkeypatch.setattr(orchestrator, "predict_intent_async", predict)
+    return use
+
+
+def _events(question):
+    async def main():
+        return [event async for event in orchestrator.stream_query(question)]
+    return asyncio.run(main())
+
+
+def test_rag_stream_sends_sources_then_tokens(rag):
+    rag(_StreamingLLM(["A manager", " approves refunds. "]))
+
+    events = _events("Who approves refunds?")
+
+    assert [e["type"] for e in events] == ["meta", "sources", "token", "token", "end"]
+    assert events[1]["sources"] == [{"id": "chunk-1", "source": "policy.pdf", "page": 2}]
+    assert events[-1]["result"] == "A manager approves refunds."
+
+
+def test_rag_stream_reports_failure_after_partial_answer(rag):
+    rag(_StreamingLLM(["A manager"], error=llm.LLMError("connection reset")))
+
+    events = _events("Who approves refunds?")
+
+    assert [e["type"] for e in events] == ["meta", "sources", "token", "error"]
+    assert "connection reset" in events[-1]["message"]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def stream_query(question):
+        yield {"type": "meta", "query_type": "rag"}
+        yield {"type": "token", "text": "Hi"}
+        yield {"type": "end", "query": question, "result": "Hi"}
+
+    monkeypatch.setattr(query, "stream_query", stream_query)
+    app = FastAPI()
+    app.include_router(query.router, prefix="/api")
+    return TestClient(app)
+
+
+def _parse_sse(text):
+    messages = []
+    for block in text.strip().split("\n\n"):
+        name, data = block.split("\n")
+        messages.append((name.removeprefix("event: "), json.loads(data.removeprefix("data: "))))
+    return messages
+
+
+def test_get_stream_sends_named_events(client):
+    response = client.get("/api/query/stream", params={"question": "hello"})
+
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.headers["cache-control"] == "no-cache"
+    assert _parse_sse(response.text) == [
+        ("meta", {"type": "meta", "query_type": "rag"}),
+        ("token", {"type": "token", "text": "Hi"}),
+        ("end", {"type": "end", "query": "hello", "result": "Hi"}),
+    ]
+
+
+def test_post_stream_negotiates_sse_or_ndjson(client):
+    body = {"question": "hello", "stream": True}
+
+    sse = client.post("/api/query", json=body, headers={"Accept": "text/event-stream"})
+    ndjson = client.post("/api/query", json=body)
+
+    assert [name for name, _ in _parse_sse(sse.text)] == ["meta", "token", "end"]
+    assert ndjson.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line)["type"] for line in ndjson.text.splitlines()] == ["meta", "token", "end"]
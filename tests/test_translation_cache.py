@@ -0,0 +1,72 @@
+import pytest
+
+from app.core.translation_cache import TranslationCache
+from app.utils.text import normalize_question
+
+
+class SameVector:
+    """Embeds every question identically: every entry is a perfect neighbour."""
+
+    def embed_query(self, text):
+        return [1.0, 0.0, 0.0]
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return TranslationCache(str(tmp_path / "cache.db"), embedder=SameVector())
+
+
+def test_exact_hit_and_discard(cache):
+    cache.put("How many customers?", "fp", "SELECT COUNT(*) FROM customers")
+
+    assert cache.get("how many customers", "fp").tier == "exact"
+    assert cache.get("how many customers", "other-fp").sql is None
+
+    cache.discard("How many customers?", "fp")
+    assert cache.get("how many customers", "fp").tier == "miss"
+
+
+@pytest.mark.parametrize("cached, asked, hit", [
+    ("orders before 2020", "orders prior to 2020", True),
+    ("orders before 2020", "orders after 2020", False),
+    ("most expensive products", "highest priced products", True),
+    ("most expensive products", "least expensive products", False),
+    ("top 5 customers by spend", "bottom 5 customers by spend", False),
+    ("orders sorted by amount asc", "orders sorted by amount desc", False),
+    ("customers who ordered", "customers who haven't ordered", False),
+    ("orders in 2020", "orders in 2021", False),
+])
+def test_semantic_tier_respects_direction_and_literals(cache, cached, asked, hit):
+    cache.put(cached, "fp", "SELECT 1")
+
+    lookup = cache.get(asked, "fp")
+
+    assert (lookup.tier == "semantic") is hit
+
+
+def test_rows_with_older_signatures_only_match_exactly(cache):
+    cache.put("orders before 2020", "fp", "SELECT 1")
+    # Signature as written before direction words were part of it
+    cache._conn.execute("UPDATE translations SET literals = '2020'")
+    cache._vectors.clear()
+
+    assert cache.get("orders in 2020", "fp").tier == "miss"
+    assert cache.get("orders before 2020", "fp").tier == "exact"
+
+
+@pytest.mark.parametrize("question, normalized", [
+    ("Top FIVE customers in 'France'?", "top 5 customers in 'France'"),
+    ('orders shipped to "New  York"', 'orders shipped to "New  York"'),
+    ("What's the customers' count for 'five'", "what's the customers' count for 'five'"),
+])
+def test_normalize_question_keeps_quoted_literals(question, normalized):
+    assert normalize_question(question) == normalized
+
+
+def test_quoted_literal_case_is_part_of_the_key(cache):
+    cache.put("customers in 'France'", "fp", "SELECT * FROM customers WHERE country = 'France'")
+
+    assert cache.get("Customers in 'France'?", "fp").tier == "exact"
+    # Neither tier may answer: SQLite's = on TEXT is case-sensitive
+    assert cache.get("customers in 'france'", "fp").tier == "miss"
+    assert cache.get("list customers in 'france'", "fp").tier == "miss"
@@ -0,0 +1,76 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core import orchestrator, translator
+from app.core.translation_cache import CacheLookup
+
+
+@pytest.fixture
+def threads(monkeypatch):
+    """
+    Records the thread each blocking schema call runs on.
+    """
+    seen = {}
+
+    def fingerprint():
+        seen["fingerprint"] = threading.current_thread()
+        return "fp"
+
+    def tables():
+        seen["tables"] = threading.current_thread()
+        return [{"name": "orders"}]
+
+    def description():
+        seen["description"] = threading.current_thread()
+        return "orders(id, amount)"
+
+    class Provider:
+        get_tables = staticmethod(tables)
+
+    class Cache:
+        def get(self, question, fp):
+            return CacheLookup(None, "miss", None)
+
+        def put(self, question, fp, sql, embedding=None):
+            seen["put"] = (question, fp, sql)
+
+    class LLM:
+        async def complete(self, prompt, temperature=0):
+            return "SELECT COUNT(*) FROM orders"
+
+    monkeypatch.setattr(translator, "TRANSLATION_CACHE_ENABLED", True)
+    monkeypatch.setattr(translator, "get_schema_fingerprint", fingerprint)
+    monkeypatch.setattr(translator, "get_schema_provider", lambda: Provider())
+    monkeypatch.setattr(translator, "get_schema_description", description)
+    monkeypatch.setattr(translator, "get_translation_cache", lambda: Cache())
+    monkeypatch.setattr(translator, "get_llm_client", lambda: LLM())
+    return seen
+
+
+def test_schema_introspection_runs_off_the_event_loop(threads):
+    sql = asyncio.run(translator.translate_to_sql("how many orders"))
+
+    assert sql == "SELECT COUNT(*) FROM orders"
+    assert threads["put"] == ("how many orders", "fp", sql)
+    for call in ("fingerprint", "tables", "description"):
+        assert threads[call] is not threading.main_thread(), call
+
+
+def test_forget_translation_runs_off_the_event_loop(monkeypatch):
+    seen = []
+
+    def forget(question):
+        seen.append(threading.current_thread())
+
+    async def execute(sql, page_size, offset=0):
+        return {"query_type": "ERROR", "summary": "no such table"}
+
+    monkeypatch.setattr(orchestrator, "forget_translation", forget)
+    monkeypatch.setattr(orchestrator, "_execute", execute)
+
+    response = asyncio.run(orchestrator._route_sql("how many orders", "SELECT * FROM nope"))
+
+    assert response["result"]["query_type"] == "ERROR"
+    assert seen and seen[0] is not threading.main_thread()
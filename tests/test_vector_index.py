@@ -0,0 +1,134 @@
+import os
+
+import faiss
+import numpy as np
+import pytest
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from app.rag import vector_index
+from app.rag.vector_index import (
+    DOCSTORE_FILE,
+    LEGACY_DOCSTORE_FILE,
+    load_vector_store,
+    migrate_pickle_docstore,
+)
+
+TEXTS = [
+    "Refunds need a manager's approval.",
+    "Travel is booked through the portal.",
+    "Laptops are replaced every three years.",
+]
+
+
+@pytest.fixture
+def embeddings():
+    return DeterministicFakeEmbedding(size=16)
+
+
+def test_legacy_store_is_not_unpickled_on_load(tmp_path, embeddings, monkeypatch):
+    # A store as saved by FAISS.save_local: index.faiss plus a pickled docstore
+    FAISS.from_texts(TEXTS, embeddings).save_local(str(tmp_path))
+
+    def no_unpickling(f):
+        raise AssertionError("serving must not unpickle")
+
+    monkeypatch.setattr(vector_index.pickle, "load", no_unpickling)
+    with pytest.raises(FileNotFoundError, match="scripts.migrate_docstore"):
+        load_vector_store(str(tmp_path), embeddings, mmap=False)
+
+    assert os.path.exists(tmp_path / LEGACY_DOCSTORE_FILE)
+    assert not os.path.exists(tmp_path / DOCSTORE_FILE)
+
+
+def test_migrated_legacy_store_loads(tmp_path, embeddings):
+    FAISS.from_texts(TEXTS, embeddings).save_local(str(tmp_path))
+
+    assert migrate_pickle_docstore(str(tmp_path))
+
+    assert os.path.exists(tmp_path / DOCSTORE_FILE)
+    assert not os.path.exists(tmp_path / LEGACY_DOCSTORE_FILE)
+    store = load_vector_store(str(tmp_path), embeddings, mmap=False)
+    assert store.similarity_search(TEXTS[1], k=1)[0].page_content == TEXTS[1]
+    assert not migrate_pickle_docstore(str(tmp_path))
+
+
+def test_missing_docstore_raises(tmp_path, embeddings):
+    FAISS.from_texts(TEXTS, embeddings).save_local(str(tmp_path))
+    os.remove(tmp_path / LEGACY_DOCSTORE_FILE)
+
+    with pytest.raises(FileNotFoundError):
+        load_vector_store(str(tmp_path), embeddings, mmap=False)
+
+
+@pytest.mark.parametrize("path", ["vectorstore/db_faiss", "data/faiss_index"])
+def test_shipped_stores_load(path):
+    root = os.path.join(os.path.dirname(__file__), "..", path)
+    store = load_vector_store(root, DeterministicFakeEmbedding(size=384))
+    assert store.index.ntotal == len(store.index_to_docstore_id) > 0
+
+
+@pytest.mark.parametrize("n, configured, expected", [
+    (10, "auto", "flat"),
+    (50_001, "auto", "ivf_flat"),
+    (2_000_000, "auto", "ivf_pq"),
+    (10, "hnsw", "hnsw"),
+])
+def test_choose_index_type(n, configured, expected):
+    assert vector_index.choose_index_type(n, configured) == expected
+
+
+def test_choose_index_type_rejects_unknown():
+    with pytest.raises(ValueError, match="Unknown FAISS index type"):
+        vector_index.choose_index_type(10, "lsh")
+
+
+@pytest.mark.parametrize("index_type", ["ivf_flat", "ivf_pq", "hnsw"])
+def test_built_index_keeps_positions(index_type):
+    vectors = np.random.default_rng(0).standard_normal((2000, 16)).astype(np.float32)
+
+    index = vector_index.build_faiss_index(vectors, index_type)
+    vector_index.tune_search(index, nprobe=1024, ef_search=256)
+
+    assert index.ntotal == 2000
+    _, positions = index.search(vectors[[3, 1500]], 1)
+    assert positions[:, 0].tolist() == [3, 1500]
+
+
+def _saved_store(path, embeddings, texts):
+    store = vector_index.create_vector_store(str(path), embeddings, dim=16)
+    store.add_texts(texts)
+    vector_index.save_vector_store(store, str(path))
+    return store
+
+
+def test_search_index_is_served_and_versioned(tmp_path, embeddings):
+    texts = [f"policy section {i}" for i in range(400)]
+    store = _saved_store(tmp_path, embeddings, texts)
+
+    assert vector_index.write_search_index(store, str(tmp_path), "ivf_flat") == "ivf_flat"
+    version = vector_index.read_index_version(str(tmp_path))
+    served = load_vector_store(str(tmp_path), embeddings)
+
+    assert isinstance(served.index, faiss.IndexIVFFlat)
+    assert served.similarity_search(texts[42], k=1)[0].page_content == texts[42]
+
+    store.add_texts(["a new section"])
+    vector_index.save_vector_store(store, str(tmp_path))
+    vector_index.write_search_index(store, str(tmp_path), "flat")
+    assert vector_index.read_index_version(str(tmp_path)) != version
+    assert not os.path.exists(tmp_path / vector_index.SEARCH_INDEX_FILE)
+    assert isinstance(load_vector_store(str(tmp_path), embeddings).index, faiss.IndexFlatL2)
+
+
+def test_stale_search_index_falls_back_to_flat(tmp_path, embeddings):
+    store = _saved_store(tmp_path, embeddings, [f"policy section {i}" for i in range(400)])
+    vector_index.write_search_index(store, str(tmp_path), "ivf_flat")
+
+    # Indexer saved new chunks but died before rebuilding the search index
+    store.add_texts(["a new section"])
+    vector_index.save_vector_store(store, str(tmp_path))
+
+    served = load_vector_store(str(tmp_path), embeddings)
+    assert isinstance(served.index, faiss.IndexFlatL2)
+    assert served.index.ntotal == 401